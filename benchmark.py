@@ -0,0 +1,496 @@
+# -*- coding: utf-8 -*-
+"""benchmark.py
+
+# **Pruebas de rendimiento de los algoritmos de busqueda**
+
+Mide como escalan los algoritmos de la clase `TreeSearch` de `transmilenio.py`:
+
+*   BFS `(bfs_shortest_path)`
+*   DFS `(dfs_paths)`
+*   UCS `(ucs)`
+*   A*, Dijkstra y voraz `(astar_search)`
+
+Cada algoritmo se ejecuta sobre la red real de Transmilenio (`data/stops.txt` y `data/transfers.txt`) y sobre grafos sinteticos de 10^2 a 10^6 vertices:
+
+*   `grid`: cuadricula con estaciones cada 500 metros.
+*   `geometric`: grafo geometrico aleatorio. Los vertices se ubican al azar y se conectan con todos los vertices a menos de un radio, elegido para que cada vertice tenga en promedio unos 6 vecinos.
+*   `trunk`: troncales y alimentadores con la forma de los corredores actuales. Varias troncales rectas salen de un portal central con estaciones cada 700 metros, cada cierto numero de estaciones sale un ramal alimentador, y cada cierto numero de estaciones las troncales vecinas se conectan entre si como las conexiones entre corredores (por ejemplo Calle 100 o AV. Jimenez).
+
+Los pesos de las aristas son la distancia del gran circulo entre sus extremos, igual que en la red real, por lo que la heuristica de A* es admisible en todos los grafos.
+
+Una consulta que supera el tiempo maximo (`--timeout`, por defecto 10 segundos) se interrumpe, el algoritmo se marca como `timed_out` en ese grafo y no se mide en los grafos mas grandes del mismo generador. El tiempo maximo usa `signal.setitimer`, disponible solo en sistemas tipo Unix.
+
+Por cada consulta se mide el tiempo de reloj, los vertices expandidos (`TreeSearch.last_expanded`), el tamaño maximo de la frontera (`TreeSearch.last_peak_frontier`) y el pico de memoria reservada durante la busqueda (`tracemalloc`, en una ejecucion aparte para no afectar el tiempo, con el mismo tiempo maximo). Cada consulta se ejecuta una vez sin medir y luego se mide `--repeat` veces (por defecto 5), tomando el menor tiempo. Las consultas son pares origen-destino aleatorios pero reproducibles (`--seed`), y el destino siempre es alcanzable desde el origen. Las tablas heuristicas de A* y del algoritmo voraz se calculan antes de medir.
+
+Los resultados se guardan en JSON. Con `--baseline` se comparan contra un archivo anterior y el programa termina con error si algun algoritmo es mas lento que el limite de tolerancia, lo que permite detectar regresiones de rendimiento entre versiones. Un aumento menor a `--noise-floor` (por defecto 1 milisegundo) no se considera regresion, porque en las consultas mas rapidas la variacion entre ejecuciones supera la tolerancia:
+
+```
+python benchmark.py --output base.json
+python benchmark.py --output nuevo.json --baseline base.json --tolerance 0.25
+```
+"""
+
+import argparse
+from math import ceil, cos, pi, radians, sin, sqrt
+import json
+import platform
+import random
+import signal
+import statistics
+import sys
+from time import perf_counter, strftime
+import tracemalloc
+
+from transmilenio import EARTH_RADIUS, Graph, NetworkLoader, TreeSearch, great_circle_distances
+
+# Coordenadas de referencia de los grafos sinteticos (centro de Bogota)
+ORIGIN = (4.60, -74.08)
+# Metros por grado de latitud
+METERS_PER_DEGREE = EARTH_RADIUS * 1000 * pi / 180
+
+# Algoritmos medidos
+ALGORITHMS = ('bfs', 'dfs', 'ucs', 'astar', 'dijkstra', 'greedy')
+# Generadores de grafos sinteticos
+GENERATORS = ('grid', 'geometric', 'trunk')
+# Tamaños por defecto de los grafos sinteticos
+SIZES = (100, 1000, 10000, 100000, 1000000)
+# Tiempo maximo, en segundos, de una consulta. DFS solo evita repetir los
+# vertices de la ruta actual, por lo que en grafos con ciclos (cuadriculas,
+# grafos geometricos) puede recorrer un numero exponencial de rutas.
+TIMEOUT = 10.0
+# Numero de veces que se mide el tiempo de cada consulta
+REPEAT = 5
+# Diferencia minima, en segundos, entre la mediana anterior y la actual para
+# considerar una regresion. Por debajo de este valor la variacion del tiempo
+# entre ejecuciones es mayor que la tolerancia relativa.
+NOISE_FLOOR = 0.001
+
+"""# **Generadores de grafos**
+
+Todos los generadores reciben el numero de vertices y un generador de numeros aleatorios, y devuelven un objeto de la clase `Graph` con ids `0..n-1`.
+"""
+
+'''
+Convierte una posicion en metros, relativa a ORIGIN, en coordenadas
+geograficas (latitud, longitud).
+'''
+def to_coordinates(x, y):
+    latitude = ORIGIN[0] + y / METERS_PER_DEGREE
+    longitude = ORIGIN[1] + x / (METERS_PER_DEGREE * cos(radians(ORIGIN[0])))
+    return latitude, longitude
+
+'''
+Construye un grafo a partir de las posiciones de los vertices, en metros, y
+de la lista de aristas. El peso de cada arista es la distancia del gran
+circulo entre sus extremos.
+Entradas:
+    * points: Lista de posiciones (x, y) en metros
+    * edges: Lista de pares (u, v) de indices de vertices
+Salida: Objeto de la clase Graph.
+'''
+def build_graph(points, edges):
+    latitudes = []
+    longitudes = []
+    for x, y in points:
+        latitude, longitude = to_coordinates(x, y)
+        latitudes.append(latitude)
+        longitudes.append(longitude)
+
+    frms = [u for u, v in edges]
+    tos = [v for u, v in edges]
+    costs = great_circle_distances([latitudes[u] for u in frms], [longitudes[u] for u in frms],
+                                   [latitudes[v] for v in tos], [longitudes[v] for v in tos])
+
+    graph = Graph()
+    graph.add_vertices(range(len(points)), latitudes, longitudes)
+    graph.add_edges(frms, tos, costs)
+    return graph
+
+'''
+Cuadricula de n vertices con una estacion cada spacing metros. Cada vertice
+se conecta con sus vecinos de la derecha y de abajo.
+'''
+def grid_graph(n, rng, spacing = 500):
+    columns = int(ceil(sqrt(n)))
+    points = [((i % columns) * spacing, (i // columns) * spacing) for i in range(n)]
+    edges = []
+    for i in range(n):
+        if (i + 1) % columns != 0 and i + 1 < n:
+            edges.append((i, i + 1))
+        if i + columns < n:
+            edges.append((i, i + columns))
+    return build_graph(points, edges)
+
+'''
+Grafo geometrico aleatorio de n vertices ubicados al azar en un cuadrado con
+un vertice cada spacing metros en promedio. Cada par de vertices a menos de
+un radio se conecta; el radio se elige para que cada vertice tenga en
+promedio degree vecinos. Los vertices se agrupan en celdas del tamaño del
+radio, por lo que solo se comparan vertices de celdas vecinas.
+'''
+def geometric_graph(n, rng, spacing = 500, degree = 6):
+    side = spacing * sqrt(n)
+    radius = spacing * sqrt(degree / pi)
+    points = [(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(n)]
+
+    cells = {}
+    for i, (x, y) in enumerate(points):
+        cells.setdefault((int(x // radius), int(y // radius)), []).append(i)
+
+    edges = []
+    squared = radius * radius
+    for (cx, cy), members in cells.items():
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            others = cells.get((cx + dx, cy + dy))
+            if others is None:
+                continue
+            for i in members:
+                xi, yi = points[i]
+                for j in others:
+                    if (dx, dy) == (0, 0) and j <= i:
+                        continue
+                    xj, yj = points[j]
+                    if (xi - xj) ** 2 + (yi - yj) ** 2 <= squared:
+                        edges.append((i, j))
+    return build_graph(points, edges)
+
+'''
+Red de troncales y alimentadores. De un portal central salen trunks
+troncales rectas con estaciones cada spacing metros. Cada branch_every
+estaciones de una troncal sale un ramal alimentador de hasta branch_length
+estaciones, perpendicular a la troncal, y cada link_every estaciones la
+troncal se conecta con la estacion a la misma altura de la troncal vecina.
+Las troncales crecen por turnos hasta completar n vertices.
+'''
+def trunk_graph(n, rng, trunks = 8, spacing = 700, branch_every = 4, branch_length = 6, link_every = 10):
+    points = [(0.0, 0.0)]
+    edges = []
+    # Ultima estacion y numero de estaciones de cada troncal
+    last = [0] * trunks
+    stations = [0] * trunks
+    # Estacion de cada troncal por numero de estacion, para las conexiones
+    by_position = [{} for _ in range(trunks)]
+    angles = [2 * pi * t / trunks + rng.uniform(-0.1, 0.1) for t in range(trunks)]
+
+    while len(points) < n:
+        for t in range(trunks):
+            if len(points) >= n:
+                break
+            position = stations[t] + 1
+            dx, dy = cos(angles[t]), sin(angles[t])
+            node = len(points)
+            points.append((dx * spacing * position, dy * spacing * position))
+            edges.append((last[t], node))
+            last[t] = node
+            stations[t] = position
+            by_position[t][position] = node
+
+            neighbour = by_position[(t + 1) % trunks].get(position)
+            if position % link_every == 0 and neighbour is not None:
+                edges.append((node, neighbour))
+            previous = by_position[(t - 1) % trunks].get(position)
+            if position % link_every == 0 and previous is not None and trunks > 2:
+                edges.append((previous, node))
+
+            if position % branch_every == 0:
+                (x, y) = points[node]
+                parent = node
+                for b in range(1, branch_length + 1):
+                    if len(points) >= n:
+                        break
+                    child = len(points)
+                    points.append((x - dy * spacing * b, y + dx * spacing * b))
+                    edges.append((parent, child))
+                    parent = child
+
+    return build_graph(points, edges)
+
+'''
+Carga la red real de Transmilenio.
+'''
+def transmilenio_graph(n, rng):
+    graph, station = NetworkLoader().load()
+    return graph
+
+GENERATOR_FUNCTIONS = {
+    'grid': grid_graph,
+    'geometric': geometric_graph,
+    'trunk': trunk_graph,
+    'transmilenio': transmilenio_graph,
+}
+
+"""# **Ejecucion de las pruebas**"""
+
+class QueryTimeout(Exception):
+    pass
+
+def _raise_timeout(signum, frame):
+    raise QueryTimeout()
+
+'''
+Ejecuta una busqueda con un tiempo maximo.
+Entradas:
+    * search: Funcion de busqueda
+    * start, goal: Argumentos de la busqueda
+    * timeout: Segundos maximos, o None para no limitar el tiempo
+Excepciones:
+    * QueryTimeout: Se produce cuando la busqueda supera el tiempo maximo.
+'''
+def call_with_timeout(search, start, goal, timeout):
+    if timeout is None or not hasattr(signal, 'setitimer'):
+        return search(start, goal)
+
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return search(start, goal)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+'''
+Escoge consultas origen-destino aleatorias en las cuales el destino es
+alcanzable desde el origen.
+Entradas:
+    * frozen: Objeto de la clase FrozenGraph
+    * count: Numero de consultas
+    * rng: Generador de numeros aleatorios
+Salida: Lista de pares (start, goal) de ids.
+'''
+def choose_queries(frozen, count, rng):
+    queries = []
+    n = frozen.num_vertices
+    attempts = 0
+    while len(queries) < count and attempts < 10 * count:
+        attempts = attempts + 1
+        source = rng.randrange(n)
+        parents = frozen.breadth_first_tree(source)[1]
+        reachable = [i for i in range(n) if parents[i] != -1 and i != source]
+        if reachable:
+            queries.append((frozen.ids[source], frozen.ids[rng.choice(reachable)]))
+    return queries
+
+'''
+Obtiene la funcion que ejecuta una consulta de un algoritmo.
+Entradas:
+    * tree: Objeto de la clase TreeSearch cuyo grafo es un FrozenGraph
+    * algorithm: Nombre del algoritmo
+    * heuristics: Tabla heuristica hacia el destino de la consulta
+Salida: Funcion que recibe (start, goal) y ejecuta la busqueda.
+'''
+def search_function(tree, algorithm, heuristics):
+    frozen = tree.graph
+    if algorithm == 'bfs':
+        return tree.bfs_shortest_path
+    if algorithm == 'dfs':
+        return tree.dfs_paths
+    if algorithm == 'ucs':
+        return tree.ucs
+    if algorithm == 'astar':
+        return lambda start, goal: tree.astar_search(frozen, heuristics, start, goal)
+    if algorithm == 'dijkstra':
+        return lambda start, goal: tree.astar_search(frozen, None, start, goal)
+    if algorithm == 'greedy':
+        return lambda start, goal: tree.astar_search(frozen, heuristics, start, goal, gn = False)
+    raise ValueError('Algoritmo de busqueda desconocido: ' + str(algorithm))
+
+'''
+Mide un algoritmo sobre un conjunto de consultas.
+Entradas:
+    * tree: Objeto de la clase TreeSearch cuyo grafo es un FrozenGraph
+    * algorithm: Nombre del algoritmo
+    * queries: Lista de pares (start, goal)
+    * repeat: Numero de veces que se mide el tiempo de cada consulta. Se toma
+    el menor. Antes de medir la consulta se ejecuta una vez sin medir.
+    * memory: Si es True se mide el pico de memoria de cada consulta.
+    * timeout: Tiempo maximo de cada ejecucion de una consulta, incluida la de
+    memoria. Al superarlo no se miden las consultas restantes.
+Salida: Diccionario con las medidas del algoritmo. Si ninguna consulta
+termino a tiempo las medidas son None.
+'''
+def measure(tree, algorithm, queries, repeat = REPEAT, memory = True, timeout = TIMEOUT):
+    times = []
+    expanded = []
+    frontiers = []
+    memories = []
+    timed_out = False
+
+    for start, goal in queries:
+        heuristics = None
+        if algorithm in ('astar', 'greedy'):
+            heuristics = tree.heuristic_table(tree.graph, goal)
+        search = search_function(tree, algorithm, heuristics)
+
+        best = float('inf')
+        try:
+            # Ejecucion de calentamiento: llena las caches y reserva la
+            # memoria de la busqueda antes de medir
+            call_with_timeout(search, start, goal, timeout)
+            for _ in range(repeat):
+                begin = perf_counter()
+                call_with_timeout(search, start, goal, timeout)
+                best = min(best, perf_counter() - begin)
+        except QueryTimeout:
+            timed_out = True
+            break
+        times.append(best)
+        expanded.append(tree.last_expanded)
+        frontiers.append(tree.last_peak_frontier)
+
+        if memory:
+            tracemalloc.start()
+            try:
+                call_with_timeout(search, start, goal, timeout)
+                memories.append(tracemalloc.get_traced_memory()[1])
+            except QueryTimeout:
+                timed_out = True
+                break
+            finally:
+                tracemalloc.stop()
+
+    return {
+        'algorithm': algorithm,
+        'queries': len(times),
+        'timed_out': timed_out,
+        'wall_time_mean': statistics.mean(times) if times else None,
+        'wall_time_median': statistics.median(times) if times else None,
+        'wall_time_max': max(times) if times else None,
+        'expanded_mean': statistics.mean(expanded) if times else None,
+        'expanded_max': max(expanded) if times else None,
+        'peak_frontier_max': max(frontiers) if times else None,
+        'peak_memory_max': max(memories) if memories else None,
+    }
+
+'''
+Ejecuta todas las pruebas.
+Entradas:
+    * generators: Nombres de los grafos a medir
+    * sizes: Numero de vertices de los grafos sinteticos
+    * algorithms: Nombres de los algoritmos a medir
+    * queries: Numero de consultas por grafo
+    * seed: Semilla de los generadores y de las consultas
+    * repeat, memory, timeout: Ver measure
+    * log: Archivo donde se informa el avance, o None
+Salida: Lista de diccionarios, uno por grafo y algoritmo.
+'''
+def run(generators, sizes, algorithms, queries = 5, seed = 0, repeat = REPEAT, memory = True,
+        timeout = TIMEOUT, log = None):
+    results = []
+    for generator in generators:
+        # Algoritmos que superaron el tiempo maximo en un grafo mas pequeño
+        skipped = set()
+        for size in ((None,) if generator == 'transmilenio' else sizes):
+            rng = random.Random('%s-%s-%s' % (seed, generator, size))
+            begin = perf_counter()
+            graph = GENERATOR_FUNCTIONS[generator](size, rng)
+            frozen = graph.freeze()
+            build_time = perf_counter() - begin
+            del graph
+
+            tree = TreeSearch(frozen)
+            pairs = choose_queries(frozen, queries, rng)
+            for algorithm in algorithms:
+                if algorithm in skipped:
+                    continue
+                result = {
+                    'graph': generator,
+                    'vertices': frozen.num_vertices,
+                    'edges': len(frozen.targets),
+                    'build_time': build_time,
+                }
+                result.update(measure(tree, algorithm, pairs, repeat, memory, timeout))
+                results.append(result)
+                if result['timed_out']:
+                    skipped.add(algorithm)
+                if log is None:
+                    continue
+                if result['queries'] == 0:
+                    log.write('%-12s %8d %-9s supero el tiempo maximo\n' % (
+                        generator, result['vertices'], algorithm))
+                else:
+                    log.write('%-12s %8d %-9s %10.3f ms %10.1f expandidos\n' % (
+                        generator, result['vertices'], algorithm,
+                        result['wall_time_median'] * 1000, result['expanded_mean']))
+                log.flush()
+    return results
+
+'''
+Compara los resultados con los de un archivo anterior. Se compara la mediana
+del tiempo de cada grafo y algoritmo presentes en ambos.
+Entradas:
+    * results: Lista de resultados de run
+    * baseline: Lista de resultados anteriores
+    * tolerance: Aumento relativo maximo permitido del tiempo (0.25 = 25%)
+    * noise_floor: Aumento minimo, en segundos, para considerar una
+    regresion. Evita que las consultas de menos de un milisegundo fallen por
+    la variacion normal del tiempo.
+Salida: Lista de tuplas (grafo, vertices, algoritmo, tiempo anterior, tiempo
+actual) de las pruebas que superan la tolerancia.
+'''
+def compare(results, baseline, tolerance, noise_floor = NOISE_FLOOR):
+    previous = {(r['graph'], r['vertices'], r['algorithm']): r for r in baseline}
+    regressions = []
+    for result in results:
+        key = (result['graph'], result['vertices'], result['algorithm'])
+        if key not in previous or previous[key]['wall_time_median'] is None:
+            continue
+        before = previous[key]['wall_time_median']
+        after = result['wall_time_median']
+        if after is None or (after > before * (1 + tolerance) and after - before > noise_floor):
+            regressions.append(key + (before, after))
+    return regressions
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Pruebas de rendimiento de los algoritmos de TreeSearch')
+    parser.add_argument('--graphs', nargs = '+', default = ('transmilenio',) + GENERATORS,
+                        choices = ('transmilenio',) + GENERATORS)
+    parser.add_argument('--sizes', nargs = '+', type = int, default = SIZES)
+    parser.add_argument('--max-size', type = int, default = None,
+                        help = 'Omite los tamaños mayores a este valor')
+    parser.add_argument('--algorithms', nargs = '+', default = ALGORITHMS, choices = ALGORITHMS)
+    parser.add_argument('--queries', type = int, default = 5)
+    parser.add_argument('--repeat', type = int, default = REPEAT)
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--timeout', type = float, default = TIMEOUT,
+                        help = 'Tiempo maximo de cada consulta en segundos')
+    parser.add_argument('--no-memory', action = 'store_true',
+                        help = 'No mide el pico de memoria')
+    parser.add_argument('--output', default = 'benchmark.json')
+    parser.add_argument('--baseline', default = None,
+                        help = 'Archivo JSON de resultados anteriores')
+    parser.add_argument('--tolerance', type = float, default = 0.25)
+    parser.add_argument('--noise-floor', type = float, default = NOISE_FLOOR,
+                        help = 'Aumento minimo del tiempo, en segundos, para considerar una regresion')
+    args = parser.parse_args(argv)
+
+    sizes = [size for size in args.sizes if args.max_size is None or size <= args.max_size]
+    results = run(args.graphs, sizes, args.algorithms, args.queries, args.seed, args.repeat,
+                  not args.no_memory, args.timeout, sys.stderr)
+
+    report = {
+        'created': strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent = 2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance, args.noise_floor)
+        for graph, vertices, algorithm, before, after in regressions:
+            if after is None:
+                print('Regresion: %s %d %s %.3f ms -> supero el tiempo maximo' % (
+                    graph, vertices, algorithm, before * 1000))
+            else:
+                print('Regresion: %s %d %s %.3f ms -> %.3f ms' % (
+                    graph, vertices, algorithm, before * 1000, after * 1000))
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+"""server.py
+
+# **Servidor de rutas**
+
+Servidor asincrono (`asyncio`) que responde consultas de rutas sobre la red de `transmilenio.py` usando las clases `TreeSearch` y `Station`. El protocolo es JSON por lineas sobre TCP o sobre un socket Unix: cada linea es una consulta y el servidor responde cada una con una linea.
+
+Consulta:
+
+```
+{"id": 1, "start": "Portal Norte", "goal": "AV. Jiménez", "algorithm": "astar"}
+```
+
+`start` y `goal` pueden ser el nombre o el id de la estacion, o unas coordenadas `[latitud, longitud]` (por ejemplo de un GPS), que se asignan a la estacion mas cercana con `SpatialIndex`. `algorithm` es cualquiera de los aceptados por `TreeSearch.route` (por defecto `ucs`) y `metric` la metrica de la heuristica. Con `sma` la busqueda guarda a lo mas `TreeSearch.MAX_SEARCH_NODES` nodos, y si la ruta no cabe la respuesta es un error. La respuesta repite el `id` e incluye la ruta en ids (`path`) y en nombres (`stations`) y su costo en metros (`cost`), o un mensaje de error (`error`). Cada linea recibida tiene exactamente una linea de respuesta, tambien cuando la consulta no es un objeto JSON o la busqueda falla por un error interno. La consulta `{"op": "stats"}` devuelve los contadores del servidor.
+
+*   **Procesamiento fuera del ciclo de eventos:** las busquedas se ejecutan en un pool de procesos (por defecto) o de hilos. Cada proceso o hilo tiene su propio objeto `TreeSearch`, con su propia cache de rutas y de heuristicas. Con `--snapshot` los procesos abren la misma instantanea binaria (`GraphSnapshot`) y comparten sus paginas de memoria.
+*   **Concurrencia limitada:** como maximo `max_concurrency` busquedas se envian al pool al mismo tiempo; las demas esperan. Si ya hay `max_queue` consultas esperando, las nuevas se rechazan de inmediato con el error `overloaded` en lugar de acumularse.
+*   **Contrapresion:** cada conexion puede tener como maximo `max_pipeline` consultas sin responder. Al llegar al limite el servidor deja de leer esa conexion hasta responder alguna, y el control de flujo de TCP frena al cliente. Las respuestas se escriben esperando a que se vacie el buffer de salida (`drain`).
+*   **Agrupacion de consultas:** las consultas identicas `(start, goal, algorithm, metric)` que llegan mientras otra igual se esta calculando no se vuelven a calcular: esperan el resultado de la primera.
+
+El mismo archivo incluye un generador de carga que abre varias conexiones, envia consultas aleatorias y mide la latencia (p50, p90, p99) y el numero de consultas por segundo:
+
+```
+python server.py serve --port 8765
+python server.py load --port 8765 --requests 5000 --concurrency 64
+```
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import os
+import random
+import sys
+import threading
+from time import perf_counter
+
+from transmilenio import GraphSnapshot, NetworkLoader, SpatialIndex, TreeSearch
+
+# Algoritmos aceptados por el servidor
+ALGORITHMS = ('bfs', 'dfs', 'ucs', 'astar', 'dijkstra', 'greedy', 'alt', 'ch', 'sma')
+
+"""# **Procesos del pool**
+
+> Cada proceso (o hilo) del pool carga la red una sola vez al iniciar y guarda su propio objeto `TreeSearch`, ya que este guarda estado de cada consulta (caches y estadisticas) y no se puede compartir entre hilos.
+"""
+
+_worker = threading.local()
+
+'''
+Inicializa un proceso o hilo del pool.
+Entrada:
+    * source: Objeto FrozenGraph ya cargado (pool de hilos), o tupla
+    ('snapshot', ruta) o ('csv', stops, transfers) para cargar la red en el
+    proceso (pool de procesos).
+'''
+def _init_worker(source):
+    if source[0] == 'snapshot':
+        _worker.snapshot = GraphSnapshot(source[1])
+        graph = _worker.snapshot.frozen
+    elif source[0] == 'csv':
+        graph = NetworkLoader(source[1], source[2]).load()[0].freeze()
+    else:
+        graph = source[1]
+    _worker.tree = TreeSearch(graph)
+
+'''
+Calcula el costo en metros de una ruta sumando el peso de cada arista.
+'''
+def path_cost(frozen, path):
+    cost = 0.0
+    for a, b in zip(path, path[1:]):
+        u, v = frozen.index[a], frozen.index[b]
+        cost = cost + min(frozen.weights[k] for k in frozen.edges(u) if frozen.targets[k] == v)
+    return cost
+
+'''
+Calcula una ruta en un proceso o hilo del pool.
+Salida: Tupla (ruta, costo). La ruta es None si no existe.
+'''
+def _route_job(start, goal, algorithm, metric):
+    tree = _worker.tree
+    path = tree.route(start, goal, algorithm, metric)
+    if path is None:
+        return None, None
+    return path, path_cost(tree.graph, path)
+
+"""# **Clase RouteServer**"""
+
+class Overloaded(Exception):
+    pass
+
+class RouteServer:
+
+    '''
+    Inicializacion. Carga la red y crea el pool.
+    Entradas:
+        * stops_path, transfers_path: Archivos de la red (ver NetworkLoader)
+        * snapshot: Ruta opcional de una instantanea binaria (ver
+        GraphSnapshot). Si se indica se usa en lugar de los archivos CSV.
+        * executor: process (pool de procesos) o thread (pool de hilos)
+        * workers: Numero de procesos o hilos. Por defecto el numero de
+        nucleos.
+        * max_concurrency: Numero maximo de busquedas en el pool al mismo
+        tiempo. Por defecto 2 por proceso o hilo.
+        * max_queue: Numero maximo de consultas esperando turno antes de
+        rechazar las nuevas.
+        * max_pipeline: Numero maximo de consultas sin responder por conexion.
+    '''
+    def __init__(self, stops_path = None, transfers_path = None, snapshot = None, executor = 'process',
+                 workers = None, max_concurrency = None, max_queue = 1024, max_pipeline = 32):
+        if snapshot is not None:
+            self.snapshot = GraphSnapshot(snapshot)
+            self.frozen = self.snapshot.frozen
+            self.station = self.snapshot.station
+            source = ('snapshot', snapshot)
+        else:
+            self.snapshot = None
+            graph, self.station = NetworkLoader(stops_path, transfers_path).load()
+            self.frozen = graph.freeze()
+            source = ('csv', stops_path, transfers_path)
+        self.spatial = SpatialIndex(self.frozen)
+
+        workers = workers or os.cpu_count() or 1
+        if executor == 'process':
+            self.executor = ProcessPoolExecutor(workers, initializer = _init_worker, initargs = (source,))
+        elif executor == 'thread':
+            self.executor = ThreadPoolExecutor(workers, initializer = _init_worker,
+                                               initargs = (('frozen', self.frozen),))
+        else:
+            raise ValueError('Tipo de pool desconocido: ' + str(executor))
+
+        self.max_concurrency = max_concurrency or 2 * workers
+        self.max_queue = max_queue
+        self.max_pipeline = max_pipeline
+        self.semaphore = None
+        self.in_flight = {}
+        self.server = None
+
+        self.requests = 0
+        self.computed = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.errors = 0
+        self.waiting = 0
+        self.running = 0
+
+    '''
+    Empieza a escuchar conexiones.
+    Entradas:
+        * host, port: Direccion TCP
+        * path: Ruta de un socket Unix. Si se indica se usa en lugar de TCP.
+    '''
+    async def start(self, host = '127.0.0.1', port = 8765, path = None):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_connection, path)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    '''
+    Deja de escuchar conexiones y cierra el pool.
+    '''
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown()
+        if self.snapshot is not None:
+            self.snapshot.close()
+
+    '''
+    Contadores del servidor.
+    '''
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'computed': self.computed,
+            'coalesced': self.coalesced,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'waiting': self.waiting,
+            'running': self.running,
+            'in_flight': len(self.in_flight),
+        }
+
+    '''
+    Atiende una conexion: lee consultas por lineas y responde cada una en
+    cuanto termina, sin esperar a las anteriores. Deja de leer mientras la
+    conexion tenga max_pipeline consultas sin responder.
+    '''
+    async def handle_connection(self, reader, writer):
+        pipeline = asyncio.Semaphore(self.max_pipeline)
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await pipeline.acquire()
+                line = await reader.readline()
+                if not line:
+                    pipeline.release()
+                    break
+                task = asyncio.ensure_future(self.respond(line, writer, lock, pipeline))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions = True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    '''
+    Responde una consulta y libera su lugar en la conexion.
+    '''
+    async def respond(self, line, writer, lock, pipeline):
+        try:
+            # Cada linea recibida tiene una linea de respuesta, aun si la
+            # consulta falla de una forma no prevista
+            try:
+                response = await self.handle_request(line)
+            except Exception as error:
+                self.errors = self.errors + 1
+                response = {'error': 'Error interno: ' + type(error).__name__}
+            async with lock:
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        finally:
+            pipeline.release()
+
+    '''
+    Interpreta una consulta y calcula su respuesta.
+    Entrada:
+        * line: Linea JSON de la consulta
+    Salida: Diccionario de la respuesta.
+    '''
+    async def handle_request(self, line):
+        self.requests = self.requests + 1
+        try:
+            message = json.loads(line)
+        except ValueError:
+            self.errors = self.errors + 1
+            return {'error': 'La consulta no es JSON valido'}
+        if not isinstance(message, dict):
+            self.errors = self.errors + 1
+            return {'error': 'La consulta debe ser un objeto JSON'}
+
+        response = {'id': message.get('id')}
+        if message.get('op') == 'stats':
+            response['stats'] = self.stats()
+            return response
+
+        try:
+            start = self.resolve(message.get('start'))
+            goal = self.resolve(message.get('goal'))
+            algorithm = message.get('algorithm', 'ucs')
+            metric = message.get('metric', 'great_circle')
+            if algorithm not in ALGORITHMS:
+                raise ValueError('Algoritmo de busqueda desconocido: ' + str(algorithm))
+            path, cost = await self.route(start, goal, algorithm, metric)
+        except Overloaded:
+            self.rejected = self.rejected + 1
+            response['error'] = 'overloaded'
+            return response
+        except (KeyError, ValueError, TypeError, MemoryError) as error:
+            # MemoryError: con sma la ruta no cabe en max_search_nodes nodos
+            self.errors = self.errors + 1
+            response['error'] = str(error.args[0]) if error.args else str(error)
+            return response
+        except Exception as error:
+            # Por ejemplo BrokenProcessPool si un proceso del pool termino
+            self.errors = self.errors + 1
+            response['error'] = 'Error interno: ' + type(error).__name__
+            return response
+
+        response['path'] = path
+        response['cost'] = cost
+        response['stations'] = None if path is None else self.station.convert_id_to_station(path)
+        return response
+
+    '''
+    Obtiene el id de una estacion a partir de su id, de su nombre o de unas
+    coordenadas [latitud, longitud], que se asignan a la estacion mas cercana.
+    Excepciones:
+        * KeyError: Se produce cuando la estacion no existe.
+    '''
+    def resolve(self, value):
+        if isinstance(value, list):
+            if len(value) != 2:
+                raise ValueError('Coordenadas invalidas: ' + str(value))
+            nearest = self.spatial.nearest(float(value[0]), float(value[1]))
+            if not nearest:
+                raise KeyError('No hay estaciones')
+            return nearest[0][1]
+        if value in self.frozen.index:
+            return value
+        id = self.station.get_id_by_name(value) if isinstance(value, str) else None
+        if id is None:
+            raise KeyError('Estacion desconocida: ' + str(value))
+        return id
+
+    '''
+    Calcula una ruta, agrupando las consultas identicas que estan en curso.
+    La busqueda se ejecuta en una tarea propia, de modo que si el cliente que
+    la pidio primero se desconecta las demas consultas igual reciben el
+    resultado.
+    Salida: Tupla (ruta, costo).
+    Excepciones:
+        * Overloaded: Se produce cuando hay max_queue consultas esperando.
+    '''
+    async def route(self, start, goal, algorithm, metric):
+        key = (start, goal, algorithm, metric)
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced = self.coalesced + 1
+            return await asyncio.shield(task)
+
+        if self.waiting >= self.max_queue:
+            raise Overloaded()
+
+        task = asyncio.ensure_future(self.compute(key))
+        self.in_flight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        del self.in_flight[key]
+        # Marcar la excepcion como leida aunque ningun cliente siga esperando
+        if not task.cancelled():
+            task.exception()
+
+    '''
+    Espera un lugar en el pool y ejecuta la busqueda en el.
+    '''
+    async def compute(self, key):
+        self.waiting = self.waiting + 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting = self.waiting - 1
+
+        self.running = self.running + 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, _route_job, *key)
+            self.computed = self.computed + 1
+            return result
+        finally:
+            self.running = self.running - 1
+            self.semaphore.release()
+
+"""# **Generador de carga**"""
+
+'''
+Percentil p (0 a 100) de una lista ordenada, por el metodo del rango mas
+cercano.
+'''
+def percentile(values, p):
+    if not values:
+        return None
+    rank = max(1, int(round(p / 100.0 * len(values) + 0.5)))
+    return values[min(rank, len(values)) - 1]
+
+'''
+Abre una conexion con el servidor.
+'''
+async def open_connection(host, port, path):
+    if path is not None:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+'''
+Envia una consulta y espera su respuesta.
+'''
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode('utf-8') + b'\n')
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError('El servidor cerro la conexion')
+    return json.loads(line)
+
+'''
+Genera carga contra el servidor. Cada conexion envia una consulta y espera
+su respuesta antes de enviar la siguiente, por lo que concurrency es el
+numero de consultas en curso.
+Entradas:
+    * host, port, path: Direccion del servidor (path para un socket Unix)
+    * requests: Numero total de consultas
+    * concurrency: Numero de conexiones simultaneas
+    * stations: Lista de ids de estaciones entre las cuales se escogen los
+    pares origen-destino
+    * algorithm: Algoritmo de las consultas
+    * distinct: Numero de pares distintos. Un numero pequeño produce muchas
+    consultas identicas al mismo tiempo. None para pares al azar.
+    * seed: Semilla de los pares
+Salida: Diccionario con el resumen de la prueba.
+'''
+async def load_test(host, port, path, requests, concurrency, stations, algorithm = 'ucs',
+                    distinct = None, seed = 0):
+    rng = random.Random(seed)
+    pairs = [tuple(rng.sample(stations, 2)) for _ in range(distinct or requests)]
+    messages = [{'id': i, 'start': pairs[i % len(pairs)][0], 'goal': pairs[i % len(pairs)][1],
+                 'algorithm': algorithm} for i in range(requests)]
+    latencies = []
+    errors = {}
+    queue = iter(messages)
+
+    async def client():
+        reader, writer = await open_connection(host, port, path)
+        try:
+            for message in queue:
+                began = perf_counter()
+                response = await request(reader, writer, message)
+                latencies.append(perf_counter() - began)
+                if 'error' in response:
+                    errors[response['error']] = errors.get(response['error'], 0) + 1
+        finally:
+            writer.close()
+
+    began = perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = perf_counter() - began
+
+    reader, writer = await open_connection(host, port, path)
+    server_stats = (await request(reader, writer, {'op': 'stats'}))['stats']
+    writer.close()
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'errors': errors,
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed > 0 else None,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p90_ms': percentile(latencies, 90) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': latencies[-1] * 1000,
+        'server': server_stats,
+    }
+
+async def serve(args):
+    server = RouteServer(snapshot = args.snapshot, executor = args.executor, workers = args.workers,
+                         max_concurrency = args.max_concurrency, max_queue = args.max_queue,
+                         max_pipeline = args.max_pipeline)
+    await server.start(args.host, args.port, args.unix)
+    sys.stderr.write('Servidor de rutas en %s\n' % (args.unix or '%s:%d' % (args.host, args.port)))
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Servidor de rutas de Transmilenio')
+    commands = parser.add_subparsers(dest = 'command')
+    commands.required = True
+
+    for name in ('serve', 'load'):
+        command = commands.add_parser(name)
+        command.add_argument('--host', default = '127.0.0.1')
+        command.add_argument('--port', type = int, default = 8765)
+        command.add_argument('--unix', default = None, help = 'Ruta de un socket Unix')
+
+    serve_parser = commands.choices['serve']
+    serve_parser.add_argument('--snapshot', default = None)
+    serve_parser.add_argument('--executor', choices = ('process', 'thread'), default = 'process')
+    serve_parser.add_argument('--workers', type = int, default = None)
+    serve_parser.add_argument('--max-concurrency', type = int, default = None)
+    serve_parser.add_argument('--max-queue', type = int, default = 1024)
+    serve_parser.add_argument('--max-pipeline', type = int, default = 32)
+
+    load_parser = commands.choices['load']
+    load_parser.add_argument('--requests', type = int, default = 1000)
+    load_parser.add_argument('--concurrency', type = int, default = 32)
+    load_parser.add_argument('--algorithm', choices = ALGORITHMS, default = 'ucs')
+    load_parser.add_argument('--distinct', type = int, default = None,
+                             help = 'Numero de pares origen-destino distintos')
+    load_parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    graph, station = NetworkLoader().load()
+    report = asyncio.run(load_test(args.host, args.port, args.unix, args.requests, args.concurrency,
+                                   list(graph.vert_dict.keys()), args.algorithm, args.distinct,
+                                   args.seed))
+    print(json.dumps(report, indent = 2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
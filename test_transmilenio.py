@@ -0,0 +1,502 @@
+'''
+Pruebas de transmilenio.py sobre la red de la carpeta data. Se ejecutan con:
+    python -m unittest test_transmilenio
+'''
+
+import os
+import random
+import tempfile
+import unittest
+
+from transmilenio import (ContractionHierarchy, FrozenGraph, Graph, GraphSnapshot, HubLabels, NetworkLoader,
+                          Node, NodePool, SpatialIndex, Timetable, TreeSearch, great_circle_distance)
+
+
+'''
+Construye un grafo conexo de n vertices con coordenadas al azar en Bogota: un
+arbol aleatorio mas extra * n aristas. El peso de cada arista es la distancia
+del gran circulo por un factor entre 1 y 1.5, por lo que la heuristica
+geografica es admisible.
+'''
+def random_graph(n, seed, extra = 2):
+    rng = random.Random(seed)
+    graph = Graph()
+    for node in range(n):
+        graph.add_vertex(node, (rng.uniform(4.55, 4.75), rng.uniform(-74.15, -74.05)))
+    edges = [(node, rng.randrange(node)) for node in range(1, n)]
+    edges += [tuple(rng.sample(range(n), 2)) for _ in range(extra * n)]
+    for frm, to in edges:
+        frm_vertex, to_vertex = graph.get_vertex(frm), graph.get_vertex(to)
+        if to_vertex not in frm_vertex.adjacent:
+            distance = great_circle_distance(frm_vertex.get_coordinates(), to_vertex.get_coordinates())
+            graph.add_edge(frm, to, distance * rng.uniform(1, 1.5))
+    return graph
+
+'''
+Costo de una ruta sumando los pesos actuales de sus aristas.
+'''
+def path_cost(graph, path):
+    return sum(graph.get_vertex(a).get_weight(graph.get_vertex(b)) for a, b in zip(path, path[1:]))
+
+'''
+Distancias de Dijkstra desde un vertice sobre una instantanea nueva del
+grafo, por id.
+'''
+def dijkstra(graph, source):
+    frozen = FrozenGraph(graph) if isinstance(graph, Graph) else graph
+    distances = frozen.shortest_path_tree(frozen.index[source])[0]
+    return dict(zip(frozen.ids, distances))
+
+
+class ParallelRouteMatrixTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph, cls.station = NetworkLoader().load()
+        cls.tree = TreeSearch(cls.graph)
+        cls.ids = sorted(cls.graph.get_vertices())
+
+    def test_empty_sources(self):
+        matrix = self.tree.parallel_route_matrix([], self.ids, workers = 2)
+        self.assertEqual(len(matrix.costs), 0)
+        self.assertEqual(matrix.targets, self.ids)
+
+    def test_empty_targets(self):
+        matrix = self.tree.parallel_route_matrix(self.ids, [], workers = 2)
+        self.assertEqual(len(matrix.costs), 0)
+        self.assertEqual(matrix.sources, self.ids)
+
+    def test_matches_route_matrix(self):
+        sources = self.ids[:5]
+        parallel = self.tree.parallel_route_matrix(sources, self.ids, workers = 2)
+        serial = self.tree.route_matrix(sources, self.ids)
+        self.assertEqual(list(parallel.costs), list(serial.costs))
+
+
+class GraphTest(unittest.TestCase):
+
+    def test_add_vertices_keeps_existing(self):
+        graph, station = NetworkLoader().load()
+        neighbors = len(graph.get_vertex(0).get_connections())
+        count = graph.num_vertices
+        self.assertEqual(graph.add_vertices([0, 1000], [4.7, 4.7], [-74.0, -74.0]), 1)
+        self.assertEqual(graph.num_vertices, count + 1)
+        self.assertEqual(graph.num_vertices, len(graph.vert_dict))
+        self.assertEqual(len(graph.get_vertex(0).get_connections()), neighbors)
+
+
+class DynamicGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = random_graph(30, 3)
+        self.tree = TreeSearch(self.graph)
+        self.tree.precompute_all_pairs()
+        self.tree.build_landmarks(3)
+        self.edges = sorted((u.get_id(), v.get_id()) for u in self.graph for v in u.adjacent
+                            if u.get_id() < v.get_id())
+
+    def change(self, rng):
+        operation = rng.random()
+        if operation < 0.35:
+            self.graph.close_edge(*rng.choice(self.edges))
+        elif operation < 0.6 and self.graph.closed:
+            self.graph.reopen_edge(*rng.choice(sorted(self.graph.closed)))
+        else:
+            self.graph.set_weight(*rng.choice(self.edges), rng.uniform(500, 5000))
+
+    def assert_matches_dijkstra(self):
+        for source in self.graph.get_vertices():
+            expected = dijkstra(self.graph, source)
+            for goal, distance in expected.items():
+                result = self.tree.shortest_route(source, goal)
+                if distance == float('inf'):
+                    self.assertIsNone(result)
+                    continue
+                cost, path = result
+                self.assertAlmostEqual(cost, distance, places = 6)
+                self.assertEqual((path[0], path[-1]), (source, goal))
+                self.assertAlmostEqual(path_cost(self.graph, path), distance, places = 6)
+
+    def test_repair_matches_dijkstra(self):
+        rng = random.Random(4)
+        for _ in range(40):
+            for _ in range(rng.randint(1, 3)):
+                self.change(rng)
+            self.assert_matches_dijkstra()
+            # Las tablas se repararon en lugar de construirse de nuevo
+            frozen = self.graph.freeze()
+            self.assertIs(self.tree.all_pairs.frozen, frozen)
+            self.assertIs(self.tree.landmarks.frozen, frozen)
+            for i, landmark in enumerate(self.tree.landmarks.landmarks):
+                expected = frozen.shortest_path_tree(landmark)[0]
+                for x, distance in enumerate(expected):
+                    self.assertAlmostEqual(self.tree.landmarks.from_landmark[i * frozen.num_vertices + x],
+                                           distance, places = 6)
+
+    def test_frozen_graph_matches_rebuild(self):
+        rng = random.Random(5)
+        for _ in range(40):
+            for _ in range(rng.randint(1, 3)):
+                self.change(rng)
+            patched, fresh = self.graph.freeze(), FrozenGraph(self.graph)
+            for name in ('offsets', 'targets', 'weights'):
+                self.assertEqual(list(getattr(patched, name)), list(getattr(fresh, name)))
+
+    def test_changelog_overflow(self):
+        version = self.tree.all_pairs.frozen.version
+        frm, to = self.edges[0]
+        for i in range(Graph.MAX_CHANGES // 2 + 1):
+            self.graph.set_weight(frm, to, 1000 + i)
+        self.assertIsNone(self.graph.changes_since(version))
+        self.assertEqual(self.tree.repair(), [])
+
+        self.assert_matches_dijkstra()
+        self.assertIsNot(self.tree.all_pairs.frozen, self.graph.freeze())
+        for goal, distance in dijkstra(self.graph, frm).items():
+            self.assertAlmostEqual(path_cost(self.graph, self.tree.route(frm, goal, 'alt')), distance, places = 6)
+
+
+class ContractionHierarchyTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = random_graph(60, 6)
+        # Vertice sin aristas: no hay ruta hacia el ni desde el
+        cls.graph.add_vertex(60, (4.6, -74.1))
+        cls.tree = TreeSearch(cls.graph)
+        cls.expected = {source: dijkstra(cls.graph, source) for source in cls.graph.get_vertices()}
+
+    def test_route_matches_dijkstra(self):
+        for source, distances in self.expected.items():
+            for goal, distance in distances.items():
+                path = self.tree.route(source, goal, 'ch')
+                if distance == float('inf'):
+                    self.assertIsNone(path)
+                    continue
+                self.assertEqual((path[0], path[-1]), (source, goal))
+                self.assertAlmostEqual(path_cost(self.graph, path), distance, places = 6)
+
+    def test_save_and_load(self):
+        hierarchy = self.tree.build_contraction_hierarchy()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'red.ch')
+            hierarchy.save(path)
+            loaded = ContractionHierarchy.load(path)
+        self.assertEqual(loaded.version, hierarchy.version)
+        for source in self.expected:
+            for goal in self.expected:
+                self.assertEqual(loaded.query(source, goal), hierarchy.query(source, goal))
+
+
+class HubLabelsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = random_graph(60, 7)
+        cls.graph.add_vertex(60, (4.6, -74.1))
+        cls.tree = TreeSearch(cls.graph)
+        cls.labels = cls.tree.build_hub_labels()
+        cls.expected = {source: dijkstra(cls.graph, source) for source in cls.graph.get_vertices()}
+
+    def test_distance_matches_dijkstra(self):
+        for source, distances in self.expected.items():
+            for goal, distance in distances.items():
+                if distance == float('inf'):
+                    self.assertEqual(self.tree.distance(source, goal), distance)
+                else:
+                    self.assertAlmostEqual(self.tree.distance(source, goal), distance, places = 6)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'red.hl')
+            self.labels.save(path)
+            loaded = HubLabels.load(path)
+        self.assertEqual(loaded.version, self.labels.version)
+        for source in self.expected:
+            for goal in self.expected:
+                self.assertEqual(loaded.distance(source, goal), self.labels.distance(source, goal))
+
+
+class TimetableTest(unittest.TestCase):
+
+    '''
+    Dos lineas: A recorre 1 -> 2 -> 3 a las 07:00 y a las 07:30, y B recorre
+    2 -> 4 a las 07:05, 07:20, 07:40 y 08:00. Para ir de 1 a 4 hay que
+    cambiar de A a B en la estacion 2.
+    '''
+    def setUp(self):
+        self.trips = []
+        for departure in ('07:00', '07:30'):
+            t = Timetable.parse_time(departure)
+            self.trips.append(('A', [1, 2, 3], [t, t + 600, t + 1200], [t, t + 630, t + 1200]))
+        for departure in ('07:05', '07:20', '07:40', '08:00'):
+            t = Timetable.parse_time(departure)
+            self.trips.append(('B', [2, 4], [t, t + 600], [t, t + 600]))
+        self.timetable = Timetable(self.trips)
+
+    def test_earliest_arrival_with_transfer(self):
+        journey = self.timetable.earliest_arrival(1, 4, '06:55')
+        # El bus de B de las 07:05 sale antes de llegar a la estacion 2
+        self.assertEqual(journey.legs, [('A', 1, Timetable.parse_time('07:00'), 2, Timetable.parse_time('07:10')),
+                                        ('B', 2, Timetable.parse_time('07:20'), 4, Timetable.parse_time('07:30'))])
+        self.assertEqual(journey.arrival, Timetable.parse_time('07:30'))
+        self.assertEqual(journey.transfers, 1)
+
+    def test_transfer_time(self):
+        # A llega a la estacion 2 a las 07:40, cuando sale el bus de B: con
+        # un minuto de transbordo se pierde y sin transbordo se alcanza
+        self.assertEqual(self.timetable.earliest_arrival(1, 4, '07:01').arrival, Timetable.parse_time('08:10'))
+        timetable = Timetable(self.trips, transfer_time = 0)
+        self.assertEqual(timetable.earliest_arrival(1, 4, '07:01').arrival, Timetable.parse_time('07:50'))
+
+    def test_without_transfer_and_unreachable(self):
+        journey = self.timetable.earliest_arrival(1, 3, '07:00')
+        self.assertEqual(journey.legs, [('A', 1, Timetable.parse_time('07:00'), 3, Timetable.parse_time('07:20'))])
+        self.assertEqual(journey.transfers, 0)
+        self.assertIsNone(self.timetable.earliest_arrival(1, 4, '07:31'))
+        self.assertIsNone(self.timetable.earliest_arrival(4, 1, '07:00'))
+
+    def test_profile(self):
+        journeys = self.timetable.profile(1, 4, '06:50', '07:35')
+        self.assertEqual([(journey.departure, journey.arrival) for journey in journeys],
+                         [(Timetable.parse_time('07:00'), Timetable.parse_time('07:30')),
+                          (Timetable.parse_time('07:30'), Timetable.parse_time('08:10'))])
+
+
+class ParetoRoutesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = random_graph(40, 8)
+        cls.tree = TreeSearch(cls.graph)
+        # Seis lineas que recorren caminos al azar en ambas direcciones
+        rng = random.Random(9)
+        cls.lines = {}
+        for k in range(6):
+            walk = [rng.randrange(40)]
+            while len(walk) < 10:
+                following = sorted(v.get_id() for v in cls.graph.get_vertex(walk[-1]).adjacent
+                                   if v.get_id() not in walk)
+                if not following:
+                    break
+                walk.append(rng.choice(following))
+            cls.lines['L%d' % k] = [walk, walk[::-1]]
+
+    def assert_valid_front(self, start, goal, front, max_transfers):
+        for i, (distance, transfers, path, legs) in enumerate(front):
+            self.assertEqual((path[0], path[-1]), (start, goal))
+            self.assertAlmostEqual(path_cost(self.graph, path), distance, places = 6)
+            self.assertEqual(transfers, len(legs) - 1)
+            self.assertLessEqual(transfers, max_transfers)
+            for other_distance, other_transfers, _, _ in front[:i] + front[i + 1:]:
+                self.assertFalse(other_distance <= distance and other_transfers <= transfers)
+
+    def test_front_is_non_dominated(self):
+        for start in range(0, 40, 3):
+            for goal in range(40):
+                if start != goal:
+                    front = self.tree.pareto_routes(start, goal, self.lines)
+                    self.assert_valid_front(start, goal, front, 4)
+
+    def test_front_contains_shortest_route(self):
+        max_transfers = self.graph.num_vertices
+        for start in range(0, 40, 3):
+            for goal, distance in dijkstra(self.graph, start).items():
+                if start != goal:
+                    front = self.tree.pareto_routes(start, goal, self.lines, max_transfers)
+                    self.assert_valid_front(start, goal, front, max_transfers)
+                    self.assertAlmostEqual(front[0][0], distance, places = 6)
+
+
+class MemoryBoundedSearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = random_graph(60, 10)
+        cls.tree = TreeSearch(cls.graph)
+        cls.pairs = [(start, goal) for start in range(0, 60, 7) for goal in range(0, 60, 3)]
+
+    def test_node_pool(self):
+        pool = NodePool(3)
+        root = pool.allocate(7, -1, 0.0, 1.0, 0, 0)
+        first = pool.allocate(8, root, 1.0, 2.0, 1, 0)
+        second = pool.allocate(9, root, 2.0, 3.0, 1, 0)
+        self.assertEqual(pool.path(second), [7, 9])
+        with self.assertRaises(IndexError):
+            pool.allocate(10, first, 3.0, 4.0, 2, 0)
+
+        # La posicion liberada se reutiliza y los hermanos siguen enlazados
+        pool.release(second)
+        self.assertEqual(pool.first_child[root], first)
+        child = pool.allocate(10, first, 3.0, 4.0, 2, 0)
+        self.assertEqual(child, second)
+        self.assertEqual(pool.path(child), [7, 8, 10])
+        self.assertEqual(pool.used, 3)
+
+    def test_optimal_with_enough_nodes(self):
+        for start, goal in self.pairs:
+            path = self.tree.memory_bounded_search(start, goal, max_nodes = 1000)
+            self.assertEqual((path[0], path[-1]), (start, goal))
+            self.assertAlmostEqual(path_cost(self.graph, path), dijkstra(self.graph, start)[goal], places = 6)
+
+    def test_route_longer_than_max_nodes(self):
+        for start, goal in self.pairs:
+            length = len(self.tree.ucs(start, goal))
+            for max_nodes in range(1, length):
+                with self.assertRaises(MemoryError):
+                    self.tree.memory_bounded_search(start, goal, max_nodes = max_nodes)
+
+    def test_few_nodes_optimal_or_memory_error(self):
+        for start, goal in self.pairs:
+            distance = dijkstra(self.graph, start)[goal]
+            length = len(self.tree.ucs(start, goal))
+            for max_nodes in (length, length + 1):
+                try:
+                    path = self.tree.memory_bounded_search(start, goal, max_nodes = max_nodes)
+                except MemoryError:
+                    continue
+                self.assertAlmostEqual(path_cost(self.graph, path), distance, places = 6)
+
+
+class AddToOpenTest(unittest.TestCase):
+
+    def test_add_to_open(self):
+        tree = TreeSearch(NetworkLoader().load()[0])
+        worse, better = Node(1, None), Node(1, None)
+        worse.f, better.f = 5, 3
+        self.assertFalse(tree.add_to_open([better], worse))
+        self.assertTrue(tree.add_to_open([worse], better))
+        self.assertTrue(tree.add_to_open([], worse))
+
+
+class StationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph, self.station = NetworkLoader().load()
+
+    def test_index_follows_replaced_entry(self):
+        self.assertEqual(self.station.get_id_by_name('Portal Norte'), 0)
+        self.station.stations['Portal Norte'] = [9999, (4.754228, -74.046161)]
+        self.assertEqual(self.station.convert_id_to_station([9999]), ['Portal Norte'])
+        self.assertEqual(self.station.get_id_by_name('Portal Norte'), 9999)
+        self.assertEqual(self.station.get_station_by_id(self.station.stations, 9999), 'Portal Norte')
+
+    def test_index_follows_new_dictionary(self):
+        self.station.stations = {'Norte': [7, (4.75, -74.04)]}
+        self.assertEqual(self.station.convert_id_to_station([7, 0]), ['Norte', None])
+
+
+class NetworkLoaderTest(unittest.TestCase):
+
+    def write(self, directory, name, text):
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding = 'utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_repeated_stop_names(self):
+        with tempfile.TemporaryDirectory() as directory:
+            stops = self.write(directory, 'stops.txt', 'stop_id,stop_name,stop_lat,stop_lon\n'
+                               '1,Portal,4.750,-74.040\n2,Portal,4.751,-74.041\n3,Calle 100,4.680,-74.050\n')
+            transfers = self.write(directory, 'transfers.txt', 'from_stop_id,to_stop_id\n1,2\n2,3\n')
+            graph, station = NetworkLoader(stops, transfers).load()
+        path = TreeSearch(graph).ucs(1, 3)
+        self.assertEqual(station.convert_id_to_station(path), ['Portal', 'Portal', 'Calle 100'])
+        self.assertEqual(station.get_id_by_name('Portal'), 1)
+        self.assertAlmostEqual(graph.get_vertex(2).get_weight(graph.get_vertex(3)),
+                               great_circle_distance((4.751, -74.041), (4.680, -74.050)))
+
+
+class GraphSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph, self.station = NetworkLoader().load()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'red.tmgs')
+        self.graph.save_snapshot(self.path, self.station)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        frozen = self.graph.freeze()
+        snapshot = GraphSnapshot(self.path)
+        try:
+            for name in ('offsets', 'targets', 'weights', 'latitudes', 'longitudes'):
+                # Los arreglos son vistas sobre el archivo mapeado, sin copias
+                self.assertIsInstance(getattr(snapshot.frozen, name), memoryview)
+                self.assertEqual(list(getattr(snapshot.frozen, name)), list(getattr(frozen, name)))
+            self.assertEqual(list(snapshot.frozen.ids), list(frozen.ids))
+            self.assertEqual(snapshot.version, self.graph.version)
+            self.assertEqual(snapshot.station.stations, self.station.stations)
+            self.assertEqual(TreeSearch(snapshot.frozen).route(0, 24), TreeSearch(self.graph).route(0, 24))
+
+            # Guardar de nuevo la instantanea leida da el mismo archivo
+            copy = os.path.join(self.directory.name, 'copia.tmgs')
+            GraphSnapshot.save(snapshot.frozen, copy, snapshot.station)
+            with open(self.path, 'rb') as original, open(copy, 'rb') as saved:
+                self.assertEqual(original.read(), saved.read())
+        finally:
+            snapshot.close()
+
+    def test_corrupted_data(self):
+        with open(self.path, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0x01]))
+        with self.assertRaises(ValueError):
+            GraphSnapshot(self.path)
+        # Sin verificar el CRC32 el archivo se abre
+        GraphSnapshot(self.path, verify = False).close()
+
+
+class RouteCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph, self.station = NetworkLoader().load()
+        self.tree = TreeSearch(self.graph)
+
+    def test_cached_path_is_a_copy(self):
+        path = self.tree.route(0, 24, 'astar')
+        expected = list(path)
+        path.append(999)
+        self.assertEqual(self.tree.route(0, 24, 'astar'), expected)
+        self.assertTrue(self.tree.last_stats.cached)
+
+    def test_metric_ignored_without_heuristic(self):
+        self.tree.route(0, 24, 'ucs', 'great_circle')
+        self.tree.route(0, 24, 'ucs', 'euclidean')
+        self.assertTrue(self.tree.last_stats.cached)
+        self.assertEqual(len(self.tree.route_cache), 1)
+
+
+class SpatialIndexTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph, cls.station = NetworkLoader().load()
+        cls.index = SpatialIndex(cls.graph)
+
+    def linear_scan(self, latitude, longitude, k):
+        distances = [(great_circle_distance((latitude, longitude), vertex.get_coordinates()), node)
+                     for node, vertex in self.graph.vert_dict.items()]
+        return sorted(distances)[:k]
+
+    def test_nearest_far_from_network(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            latitude, longitude = rng.uniform(-90, 90), rng.uniform(-180, 180)
+            self.assertEqual(self.index.nearest(latitude, longitude, 3),
+                             self.linear_scan(latitude, longitude, 3))
+
+    def test_nearest_inside_network(self):
+        rng = random.Random(2)
+        for _ in range(500):
+            latitude, longitude = rng.uniform(4.45, 4.9), rng.uniform(-74.25, -74.0)
+            self.assertEqual(self.index.nearest(latitude, longitude, 2),
+                             self.linear_scan(latitude, longitude, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
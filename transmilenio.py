@@ -76,12 +76,75 @@ Como inicio de la ruta se escogio el Portal norte, mientras que el final de la r
 
 Este proyecto requiere de ciertas dependencias, las cuales se describen a continuacion:
 
-*   `PriorityQueue`: Clase que permite implementar una cola de prioridad en Python. Para saber mas la documentacion esta [aqui](https://docs.python.org/3/library/queue.html).
-*   `Geopy.distance`: Permite implementar metricas de distancia entre 2 puntos terrestes con coordenadas de latitud y longitud. En este caso el algoritmo a utilizar es great_circle. La documentacion de las distancias se encuentra en [este enlace](https://geopy.readthedocs.io/en/stable/#module-geopy.distance).
+*   `heapq`: Modulo que implementa un monticulo binario sobre listas, utilizado como cola de prioridad sin bloqueos. Para saber mas la documentacion esta [aqui](https://docs.python.org/3/library/heapq.html).
+*   `deque`: Cola doble de `collections`, utilizada como cola FIFO en BFS. La documentacion esta [aqui](https://docs.python.org/3/library/collections.html#collections.deque).
+*   `math`: Funciones trigonometricas con las que `great_circle_distance` calcula la distancia del gran circulo entre 2 puntos terrestres con coordenadas de latitud y longitud, con la misma formula y radio que `great_circle` de GeoPy, por lo que GeoPy ya no es necesario. La documentacion esta [aqui](https://docs.python.org/3/library/math.html).
 """
 
-from queue import PriorityQueue
-from geopy.distance import geodesic, great_circle
+from array import array
+from collections import OrderedDict, deque
+import csv
+import gc
+from heapq import heapify, heappush, heappop, nsmallest
+import json
+import mmap
+import os
+from math import asin, atan2, cos, pi, radians, sin, sqrt
+import struct
+import sys
+from time import monotonic, perf_counter
+import zlib
+
+# Los modulos de multiprocessing solo se importan al usar SharedGraph o
+# TreeSearch.parallel_route_matrix, para que importar este modulo sea rapido.
+
+# Radio medio de la tierra en kilometros, el mismo utilizado por GeoPy
+EARTH_RADIUS = 6371.009
+
+'''
+Formula del gran circulo (Vincenty para la esfera, con atan2) que comparten
+todas las distancias del modulo. Recibe el seno y el coseno de la latitud y
+la longitud en radianes de cada punto, para que quien calcula muchas
+distancias desde un mismo punto, o hacia los vertices de un FrozenGraph (ver
+FrozenGraph.trigonometric), no repita esos calculos.
+Salida: La distancia en metros entre los 2 puntos.
+'''
+def _great_circle(sin_lat1, cos_lat1, lng1, sin_lat2, cos_lat2, lng2):
+    delta_lng = lng2 - lng1
+    cos_delta_lng, sin_delta_lng = cos(delta_lng), sin(delta_lng)
+    d = atan2(sqrt((cos_lat2 * sin_delta_lng) ** 2 +
+                   (cos_lat1 * sin_lat2 -
+                    sin_lat1 * cos_lat2 * cos_delta_lng) ** 2),
+              sin_lat1 * sin_lat2 + cos_lat1 * cos_lat2 * cos_delta_lng)
+    return EARTH_RADIUS * d * 1000
+
+'''
+Calcula la distancia del gran circulo, en metros, entre 2 coordenadas
+geograficas. Usa la misma formula y radio que great_circle de GeoPy y da
+exactamente el mismo resultado, sin necesidad de importar GeoPy.
+Entradas:
+    * frm: Coordenadas (latitud, longitud) del sitio 1
+    * to: Coordenadas (latitud, longitud) del sitio 2
+Salida: La distancia en metros entre los 2 puntos.
+'''
+def great_circle_distance(frm, to):
+    lat1, lat2 = radians(frm[0]), radians(to[0])
+    return _great_circle(sin(lat1), cos(lat1), radians(frm[1]), sin(lat2), cos(lat2), radians(to[1]))
+
+'''
+Calcula en un solo recorrido la distancia del gran circulo, en metros, entre
+pares de coordenadas. Cada distancia es igual a la de great_circle_distance.
+Entradas:
+    * latitudes1, longitudes1: Coordenadas de origen de cada par
+    * latitudes2, longitudes2: Coordenadas de destino de cada par
+Salida: Arreglo array('d') con la distancia de cada par.
+'''
+def great_circle_distances(latitudes1, longitudes1, latitudes2, longitudes2):
+    distances = array('d', [0.0]) * len(latitudes1)
+    for i, (x1, y1, x2, y2) in enumerate(zip(latitudes1, longitudes1, latitudes2, longitudes2)):
+        lat1, lat2 = radians(x1), radians(x2)
+        distances[i] = _great_circle(sin(lat1), cos(lat1), radians(y1), sin(lat2), cos(lat2), radians(y2))
+    return distances
 
 """# **Clase Vertex**
 
@@ -187,12 +250,26 @@ class Vertex:
 > Con esta clase se engloba la estructura de datos de un grafo para su correspondiente representacion. Ademas, algunos metodos de esta clase estan diseñados para crear vertices, obtener vertices u obtener el grafo en forma de diccionario de la forma `{int : [list]...}`
 
 Para la construccion del grafo se utilizo diccionarios de la clase vertex.
+
+El atributo `version` se incrementa cada vez que se agrega un vertice o una arista. Las instantaneas, tablas y caches construidas a partir del grafo guardan la version con la que fueron calculadas para no ser reutilizadas despues de un cambio.
+
+Para los cierres de estaciones o de carriles el grafo tiene cambios dinamicos: `close_edge`, `reopen_edge` y `set_weight`. Estos cambios se registran (`changes_since`), de modo que la instantanea `FrozenGraph` y las tablas de rutas mas cortas (`AllPairsTable`, `Landmarks`) se reparan aplicando solo los cambios en lugar de calcularse de nuevo.
 """
 
 class Graph:
+
+    # Numero maximo de cambios guardados en el registro de cambios dinamicos
+    MAX_CHANGES = 4096
+
     def __init__(self):
         self.vert_dict = {}
         self.num_vertices = 0
+        self.version = 0
+        self.closed = {}
+        self._frozen = None
+        self._changes = []
+        self._changes_base = 0
+        self._changes_version = 0
 
     '''
     Permite la iteracion sobre esta clase.
@@ -211,6 +288,7 @@ class Graph:
         agregado.
     '''
     def add_vertex(self, node, coordinates):
+        self.version = self.version + 1
         self.num_vertices = self.num_vertices + 1
         new_vertex = Vertex(node, coordinates)
         self.vert_dict[node] = new_vertex
@@ -242,9 +320,151 @@ class Graph:
         if to not in self.vert_dict:
             self.add_vertex(to)
 
+        self.version = self.version + 1
         self.vert_dict[frm].add_neighbor(self.vert_dict[to], cost)
         self.vert_dict[to].add_neighbor(self.vert_dict[frm], cost)
 
+    '''
+    Agrega varios vertices al grafo en una sola operacion. La version del
+    grafo se incrementa una sola vez. Los IDs que ya existen se omiten, de
+    modo que sus vertices conservan sus coordenadas y sus aristas.
+    Entradas:
+        * nodes: Secuencia con los IDs de los nuevos nodos
+        * latitudes, longitudes: Secuencias con las coordenadas de cada nodo
+    Salida: Numero de vertices agregados.
+    '''
+    def add_vertices(self, nodes, latitudes, longitudes):
+        vert_dict = self.vert_dict
+        added = 0
+        for node, x, y in zip(nodes, latitudes, longitudes):
+            if node not in vert_dict:
+                vert_dict[node] = Vertex(node, (x, y))
+                added = added + 1
+        self.num_vertices = self.num_vertices + added
+        self.version = self.version + 1
+        return added
+
+    '''
+    Agrega varias aristas (en ambas direcciones) en una sola operacion. Los
+    vertices deben existir. La version del grafo se incrementa una sola vez.
+    Entradas:
+        * frms: Secuencia con los IDs de origen
+        * tos: Secuencia con los IDs de destino
+        * costs: Secuencia con el costo de cada arista
+    '''
+    def add_edges(self, frms, tos, costs):
+        vert_dict = self.vert_dict
+        for frm, to, cost in zip(frms, tos, costs):
+            frm_vertex = vert_dict[frm]
+            to_vertex = vert_dict[to]
+            frm_vertex.adjacent[to_vertex] = cost
+            to_vertex.adjacent[frm_vertex] = cost
+        self.version = self.version + 1
+
+    '''
+    Registra el cambio de peso de una arista en ambas direcciones e
+    incrementa la version. Si el grafo cambio de otra forma desde el ultimo
+    cambio registrado (por ejemplo se agregaron aristas), el registro empieza
+    de nuevo desde la version actual.
+    '''
+    def _log_change(self, frm, to, old, new):
+        if self._changes_version != self.version:
+            self._changes = []
+            self._changes_base = self.version
+
+        self.version = self.version + 1
+        self._changes.append((self.version, frm, to, old, new))
+        self._changes.append((self.version, to, frm, old, new))
+        self._changes_version = self.version
+
+        if len(self._changes) > Graph.MAX_CHANGES:
+            dropped = len(self._changes) // 2
+            self._changes_base = self._changes[dropped - 1][0]
+            del self._changes[:dropped]
+
+    '''
+    Cierra una arista en ambas direcciones (por ejemplo por un cierre de
+    estacion o de carril). La arista deja de estar en el grafo y su peso se
+    guarda en el atributo closed para reabrirla con reopen_edge. Cerrar una
+    arista ya cerrada no tiene efecto.
+    Entradas:
+        * frm, to: IDs de los vertices de la arista
+    Excepciones:
+        * ValueError: Se produce cuando la arista no existe.
+    '''
+    def close_edge(self, frm, to):
+        if (frm, to) in self.closed:
+            return
+        frm_vertex, to_vertex = self.get_vertex(frm), self.get_vertex(to)
+        if frm_vertex is None or to_vertex is None or to_vertex not in frm_vertex.adjacent:
+            raise ValueError('La arista ' + str(frm) + ' - ' + str(to) + ' no existe')
+
+        cost = frm_vertex.adjacent.pop(to_vertex)
+        to_vertex.adjacent.pop(frm_vertex, None)
+        self.closed[(frm, to)] = cost
+        self.closed[(to, frm)] = cost
+        self._log_change(frm, to, cost, float('inf'))
+
+    '''
+    Reabre una arista cerrada con close_edge, con el peso que tenia al
+    cerrarla (o el asignado despues con set_weight).
+    Entradas:
+        * frm, to: IDs de los vertices de la arista
+    Excepciones:
+        * ValueError: Se produce cuando la arista no esta cerrada.
+    '''
+    def reopen_edge(self, frm, to):
+        if (frm, to) not in self.closed:
+            raise ValueError('La arista ' + str(frm) + ' - ' + str(to) + ' no esta cerrada')
+
+        cost = self.closed.pop((frm, to))
+        self.closed.pop((to, frm), None)
+        self.vert_dict[frm].adjacent[self.vert_dict[to]] = cost
+        self.vert_dict[to].adjacent[self.vert_dict[frm]] = cost
+        self._log_change(frm, to, float('inf'), cost)
+
+    '''
+    Cambia el peso de una arista en ambas direcciones (por ejemplo por un
+    desvio). Si la arista esta cerrada se cambia el peso con el que se
+    reabrira.
+    Entradas:
+        * frm, to: IDs de los vertices de la arista
+        * cost: Nuevo costo de la arista
+    Excepciones:
+        * ValueError: Se produce cuando la arista no existe.
+    '''
+    def set_weight(self, frm, to, cost):
+        if (frm, to) in self.closed:
+            self.closed[(frm, to)] = cost
+            self.closed[(to, frm)] = cost
+            return
+        frm_vertex, to_vertex = self.get_vertex(frm), self.get_vertex(to)
+        if frm_vertex is None or to_vertex is None or to_vertex not in frm_vertex.adjacent:
+            raise ValueError('La arista ' + str(frm) + ' - ' + str(to) + ' no existe')
+
+        old = frm_vertex.adjacent[to_vertex]
+        if old == cost:
+            return
+        frm_vertex.adjacent[to_vertex] = cost
+        to_vertex.adjacent[frm_vertex] = cost
+        self._log_change(frm, to, old, cost)
+
+    '''
+    Obtiene los cambios dinamicos (close_edge, reopen_edge y set_weight)
+    hechos despues de una version del grafo.
+    Entrada:
+        * version: Version del grafo con la que se calculo una instantanea o
+        una tabla
+    Salida: Lista de tuplas (frm, to, peso anterior, peso nuevo), una por
+    direccion y en el orden en que se hicieron. Una arista cerrada tiene peso
+    inf. None si el grafo tuvo otros cambios despues de version (por ejemplo
+    se agregaron vertices o aristas) o si el registro ya no llega hasta ella.
+    '''
+    def changes_since(self, version):
+        if version < self._changes_base or self._changes_version != self.version:
+            return None
+        return [(frm, to, old, new) for changed, frm, to, old, new in self._changes if changed > version]
+
     '''
     Metodo que obtiene todos los vertices del grafo
     Salidas:
@@ -266,345 +486,4039 @@ class Graph:
 
         return graph
 
-"""# **Clase Node**
+    '''
+    Construye una instantanea inmutable del grafo en formato CSR (compressed
+    sparse row), la cual es utilizada por los algoritmos de busqueda de la
+    clase TreeSearch. La instantanea se guarda y se reutiliza mientras la
+    version del grafo no cambie, es decir, mientras no se agreguen vertices o
+    aristas. Si desde la instantanea anterior solo hubo cambios dinamicos
+    (ver changes_since), la nueva instantanea se obtiene aplicando esos
+    cambios a la anterior (ver FrozenGraph.apply_changes).
+    Salida:
+        * Objeto de la clase FrozenGraph
+    '''
+    def freeze(self):
+        if self._frozen is None or self._frozen.version != self.version:
+            changes = self.changes_since(self._frozen.version) if self._frozen is not None else None
+            if changes is not None:
+                self._frozen = self._frozen.apply_changes(changes, self.version)
+            else:
+                self._frozen = FrozenGraph(self)
+        return self._frozen
 
-> El uso de esta clase se limita a facilitar la programacion y el manejo de los vertices en el algoritmo A*. Si bien se pudo utilizar la clase Vertex para este objetivo, no es lo mas adecuado, puestoq ue tienen objetivos diferentes, ademas de parametros, algunos similares pero en su mayoria no implmenetados en Vertex por convencion de abstraccion del problema.
+    '''
+    Guarda una instantanea binaria del grafo (ver GraphSnapshot).
+    Entradas:
+        * path: Ruta del archivo
+        * station: Objeto opcional de la clase Station cuyos nombres se
+        guardan junto al grafo
+    '''
+    def save_snapshot(self, path, station = None):
+        GraphSnapshot.save(self, path, station)
+
+"""# **Clase FrozenGraph**
+
+> Representacion compacta de solo lectura de un objeto de la clase `Graph`. Cada vertice recibe un indice entero contiguo `0..n-1` en el orden en que fue agregado al grafo, y las aristas se guardan en arreglos planos del modulo `array`:
+
+*   `offsets`: los vecinos del vertice `i` ocupan las posiciones `offsets[i]` a `offsets[i + 1] - 1` de `targets` y `weights`.
+*   `targets`: indice del vertice destino de cada arista.
+*   `weights`: peso de cada arista.
+*   `latitudes` y `longitudes`: coordenadas de cada vertice.
+
+Los vecinos de un vertice se recorren con `range(offsets[i], offsets[i + 1])` sin construir listas ni diccionarios intermedios. El orden de los vecinos es el mismo de `Vertex.adjacent`, por lo que las busquedas devuelven las mismas rutas que sobre el grafo original.
 """
 
-class Node:
+class FrozenGraph:
 
-    # Initialize the class
-    def __init__(self, name, parent):
-        self.name = name
-        self.parent = parent
-        self.g = 0 # Distancia al nodo de inicio
-        self.h = 0 # Distance al nodo objetivo
-        self.f = 0 # Total costo
+    __slots__ = ('ids', 'index', 'num_vertices', 'version', 'offsets',
+                 'targets', 'weights', 'latitudes', 'longitudes',
+                 '_trigonometric', '_reverse')
 
-    # Comparacion de los nodos
-    def __eq__(self, other):
-        return self.name == other.name
+    '''
+    Inicializacion
+    Entradas:
+        * graph: Objeto de la clase Graph del cual se toma la instantanea.
+    '''
+    def __init__(self, graph):
+        self.ids = list(graph.vert_dict.keys())
+        self.index = {node: i for i, node in enumerate(self.ids)}
+        self.num_vertices = len(self.ids)
+        self.version = graph.version
+
+        self.offsets = array('l', [0])
+        self.targets = array('l')
+        self.weights = array('d')
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self._trigonometric = None
+        self._reverse = None
+
+        for node in self.ids:
+            vertex = graph.vert_dict[node]
+            (x, y) = vertex.get_coordinates()
+            self.latitudes.append(x)
+            self.longitudes.append(y)
+
+            for neighbor, weight in vertex.adjacent.items():
+                self.targets.append(self.index[neighbor.id])
+                self.weights.append(weight)
+            self.offsets.append(len(self.targets))
 
-    # Ordenamiento de los vertices
-    def __lt__(self, other):
-         return self.f < other.f
+    '''
+    Construye una instantanea directamente a partir de arreglos ya existentes,
+    sin pasar por un objeto de la clase Graph. Los arreglos pueden ser objetos
+    array, listas o memoryview (por ejemplo sobre memoria compartida).
+    Entradas:
+        * ids: Secuencia con el id original de cada vertice
+        * offsets, targets, weights: Arreglos CSR de las aristas
+        * latitudes, longitudes: Coordenadas de cada vertice
+        * version: Version del grafo de origen
+        * index: Diccionario {id: indice interno} ya construido para ids. Si
+        es None se construye.
+    Salida: Objeto de la clase FrozenGraph.
+    '''
+    @classmethod
+    def from_arrays(cls, ids, offsets, targets, weights, latitudes, longitudes, version = 0, index = None):
+        frozen = cls.__new__(cls)
+        frozen.ids = ids
+        frozen.index = index if index is not None else {node: i for i, node in enumerate(ids)}
+        frozen.num_vertices = len(ids)
+        frozen.version = version
+        frozen.offsets = offsets
+        frozen.targets = targets
+        frozen.weights = weights
+        frozen.latitudes = latitudes
+        frozen.longitudes = longitudes
+        frozen._trigonometric = None
+        frozen._reverse = None
+        return frozen
 
-    # Impresion de los nodos
-    def __repr__(self):
-        return ('({0},{1})'.format(self.position, self.f))
+    '''
+    Obtiene el indice interno de un vertice dado su id.
+    Entrada:
+        * node: ID del vertice
+    Salida:
+        Indice entero del vertice. Genera KeyError si el vertice no existe.
+    '''
+    def get_index(self, node):
+        return self.index[node]
 
-"""# **Clase TreeSearch**
+    '''
+    Obtiene el id original de un vertice dado su indice interno.
+    '''
+    def get_id(self, i):
+        return self.ids[i]
 
-En esta clase se dan todos los metodos de busqueda y recorrido del grafo, incluyendo la busqueda no informada e informada.
+    '''
+    Obtiene las coordenadas geograficas (latitud, longitud) de un vertice dado
+    su indice interno.
+    '''
+    def get_coordinates(self, i):
+        return (self.latitudes[i], self.longitudes[i])
 
-> *   BFS `(bfs_shortest_path)`: Busqueda por anchura. Este tipo de busqueda utiliza una cola para guardar los vecinos de un nodo.
-*   DFS `(dfs_paths)`: Busqueda por profundidad. Este algoritmo utiliza una pila para almacenar todos los nodos adyacentes de los nodos que ha visitado
-*   UCS `(ucs)`: Busqueda por costo unitario. Algoritmo similar a bfs, pero evalua los costos a traves de una cola de prioridades.
-*   A* `(astar_search)`: Algoritmod e busqueda informada, el cual tiene en cuenta el costo unitario de un vertice con sus adyacentes, ademas de un costo heristico calculado
+    '''
+    Obtiene el rango de posiciones de las aristas de un vertice dentro de los
+    arreglos targets y weights.
+    Entrada:
+        * i: Indice interno del vertice
+    Salida:
+        Objeto range con las posiciones de las aristas del vertice i.
+    '''
+    def edges(self, i):
+        return range(self.offsets[i], self.offsets[i + 1])
+
+    '''
+    Obtiene la instantanea con todas las aristas invertidas, utilizada por las
+    busquedas hacia atras (por ejemplo las bidireccionales). Se calcula una
+    sola vez por instantanea. Como Graph.add_edge agrega ambas direcciones,
+    para los grafos de este proyecto tiene las mismas aristas que el original.
+    Salida: Objeto de la clase FrozenGraph con los mismos vertices.
+    '''
+    def reverse(self):
+        if self._reverse is None:
+            n = self.num_vertices
+            offsets, targets, weights = self.offsets, self.targets, self.weights
+
+            # Contar las aristas que llegan a cada vertice
+            reverse_offsets = array('l', [0]) * (n + 1)
+            for v in targets:
+                reverse_offsets[v + 1] = reverse_offsets[v + 1] + 1
+            for i in range(n):
+                reverse_offsets[i + 1] = reverse_offsets[i + 1] + reverse_offsets[i]
+
+            # Ubicar cada arista en la fila de su vertice destino
+            position = array('l', reverse_offsets[:n])
+            reverse_targets = array('l', [0]) * len(targets)
+            reverse_weights = array('d', [0.0]) * len(targets)
+            for u in range(n):
+                for k in range(offsets[u], offsets[u + 1]):
+                    v = targets[k]
+                    reverse_targets[position[v]] = u
+                    reverse_weights[position[v]] = weights[k]
+                    position[v] = position[v] + 1
+
+            self._reverse = FrozenGraph.from_arrays(self.ids, reverse_offsets, reverse_targets,
+                                                    reverse_weights, self.latitudes,
+                                                    self.longitudes, self.version)
+            self._reverse.index = self.index
+            self._reverse._reverse = self
+        return self._reverse
+
+    '''
+    Construye una nueva instantanea aplicando cambios de peso, cierres y
+    reaperturas de aristas (ver Graph.changes_since) sin recorrer el grafo
+    original. Solo se reconstruyen las filas de los vertices que cambiaron;
+    el resto de los arreglos se copia por bloques, y los ids, el indice y las
+    coordenadas se comparten con esta instantanea. Cada fila queda en el mismo
+    orden que en una instantanea nueva (una arista reabierta queda al final,
+    como en Vertex.adjacent). Si ya se habia calculado la instantanea
+    invertida tambien se le aplican los cambios.
+    Entradas:
+        * changes: Lista de tuplas (frm, to, peso anterior, peso nuevo). Las
+        aristas cerradas tienen peso inf.
+        * version: Version del grafo despues de los cambios
+    Salida: Objeto de la clase FrozenGraph.
+    '''
+    def apply_changes(self, changes, version):
+        frozen = self._patched(changes, version, False)
+        frozen._trigonometric = self._trigonometric
+        if self._reverse is not None:
+            reverse = self._reverse._patched([(to, frm, old, new) for frm, to, old, new in changes], version, True)
+            reverse._trigonometric = self._trigonometric
+            reverse._reverse = frozen
+            frozen._reverse = reverse
+        return frozen
+
+    '''
+    Aplica los cambios a las filas de esta instantanea. Con sorted_rows las
+    aristas reabiertas se insertan en orden de vertice destino, que es el
+    orden de las filas de la instantanea invertida.
+    '''
+    def _patched(self, changes, version, sorted_rows):
+        index = self.index
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        inf = float('inf')
+
+        rows = {}
+        for frm, to, old, new in changes:
+            u, v = index[frm], index[to]
+            row = rows.get(u)
+            if row is None:
+                row = rows[u] = list(zip(targets[offsets[u]:offsets[u + 1]], weights[offsets[u]:offsets[u + 1]]))
+            position = next((i for i, (t, w) in enumerate(row) if t == v), None)
+            if new == inf:
+                if position is not None:
+                    del row[position]
+            elif position is not None:
+                row[position] = (v, new)
+            elif sorted_rows:
+                position = next((i for i, (t, w) in enumerate(row) if t > v), len(row))
+                row.insert(position, (v, new))
+            else:
+                row.append((v, new))
+
+        # Solo cambiaron pesos: se comparten offsets y targets
+        if all([t for t, w in row] == list(targets[offsets[u]:offsets[u + 1]]) for u, row in rows.items()):
+            new_weights = array('d', weights)
+            for u, row in rows.items():
+                for k, (t, w) in zip(range(offsets[u], offsets[u + 1]), row):
+                    new_weights[k] = w
+            return FrozenGraph.from_arrays(self.ids, offsets, targets, new_weights, self.latitudes,
+                                           self.longitudes, version, index)
+
+        new_offsets = array('l', offsets)
+        new_targets = array('l')
+        new_weights = array('d')
+        affected = sorted(rows)
+        previous = 0
+        delta = 0
+        for position, u in enumerate(affected):
+            start, end = offsets[u], offsets[u + 1]
+            new_targets.extend(targets[previous:start])
+            new_weights.extend(weights[previous:start])
+            new_targets.extend(t for t, w in rows[u])
+            new_weights.extend(w for t, w in rows[u])
+            previous = end
+
+            # Desplazar los offsets hasta la siguiente fila modificada
+            delta = delta + len(rows[u]) - (end - start)
+            if delta != 0:
+                last = affected[position + 1] if position + 1 < len(affected) else self.num_vertices
+                for i in range(u + 1, last + 1):
+                    new_offsets[i] = offsets[i] + delta
+        new_targets.extend(targets[previous:])
+        new_weights.extend(weights[previous:])
+
+        return FrozenGraph.from_arrays(self.ids, new_offsets, new_targets, new_weights, self.latitudes,
+                                       self.longitudes, version, index)
+
+    '''
+    Repara en su lugar un arbol de rutas mas cortas calculado sobre una
+    version anterior de esta instantanea, recorriendo solo la parte afectada
+    por los cambios (Dijkstra dinamico):
+        * Los vertices de affected, cuya ruta usaba una arista que subio de
+        peso o se cerro, pierden su distancia y la recuperan desde sus vecinos
+        no afectados.
+        * Las aristas de decreased, que bajaron de peso o se reabrieron,
+        mejoran la distancia de su vertice destino si corresponde.
+    A partir de esos vertices se propaga una busqueda de Dijkstra que solo
+    sigue las aristas que mejoran alguna distancia.
+    Entradas:
+        * distances, parents: Arreglos con la distancia y el predecesor de cada
+        vertice (-1 si no se alcanza). El vertice v esta en la posicion
+        base + v.
+        * base: Posicion del vertice 0 en distances y parents
+        * affected: Conjunto de indices internos cuya ruta usaba una arista
+        que subio de peso
+        * decreased: Lista de tuplas (u, v, peso nuevo) de las aristas que
+        bajaron de peso
+    Salida: Lista de los vertices cuya distancia cambio, en el orden en que
+    quedaron definitivos (el predecesor de un vertice aparece antes que el).
+    '''
+    def repair_shortest_paths(self, distances, parents, base, affected, decreased):
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        reverse = self.reverse()
+        reverse_offsets, reverse_targets, reverse_weights = reverse.offsets, reverse.targets, reverse.weights
+        inf = float('inf')
+        heap = []
+
+        for x in affected:
+            distances[base + x] = inf
+            parents[base + x] = -1
+        for x in affected:
+            for k in range(reverse_offsets[x], reverse_offsets[x + 1]):
+                y = reverse_targets[k]
+                if y not in affected:
+                    d = distances[base + y] + reverse_weights[k]
+                    if d < distances[base + x]:
+                        distances[base + x] = d
+                        parents[base + x] = y
+            if distances[base + x] != inf:
+                heappush(heap, (distances[base + x], x))
+
+        for u, v, w in decreased:
+            d = distances[base + u] + w
+            if d < distances[base + v]:
+                distances[base + v] = d
+                parents[base + v] = u
+                heappush(heap, (d, v))
+
+        order = []
+        while heap:
+            d, u = heappop(heap)
+            if d > distances[base + u]:
+                continue
+            order.append(u)
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                nd = d + weights[k]
+                if nd < distances[base + v]:
+                    distances[base + v] = nd
+                    parents[base + v] = u
+                    heappush(heap, (nd, v))
+        return order
+
+    '''
+    Resume una lista de cambios (ver Graph.changes_since) en el cambio neto de
+    cada arista, con indices internos.
+    Salida: Tupla (increased, decreased). increased es una lista de tuplas
+    (u, v, peso anterior) de las aristas que subieron de peso o se cerraron, y
+    decreased una lista de tuplas (u, v, peso nuevo) de las que bajaron de
+    peso o se reabrieron.
+    '''
+    def net_changes(self, changes):
+        index = self.index
+        net = {}
+        for frm, to, old, new in changes:
+            key = (index[frm], index[to])
+            net[key] = (net[key][0] if key in net else old, new)
+        increased = [(u, v, old) for (u, v), (old, new) in net.items() if new > old]
+        decreased = [(u, v, new) for (u, v), (old, new) in net.items() if new < old]
+        return increased, decreased
+
+    '''
+    Obtiene los senos y cosenos de las latitudes y las longitudes en radianes
+    de todos los vertices, que se calculan una sola vez por instantanea.
+    Salida: Tupla (sin_lats, cos_lats, lngs) de arreglos array('d').
+    '''
+    def trigonometric(self):
+        if self._trigonometric is None:
+            latitudes = [radians(x) for x in self.latitudes]
+            self._trigonometric = (
+                array('d', [sin(x) for x in latitudes]),
+                array('d', [cos(x) for x in latitudes]),
+                array('d', [radians(y) for y in self.longitudes]),
+            )
+        return self._trigonometric
+
+    '''
+    Calcula la distancia del gran circulo, en metros, desde un vertice hacia
+    todos los vertices del grafo. Da las mismas distancias que
+    great_circle_distance, pero trabaja directamente sobre los arreglos de
+    coordenadas y reutiliza los senos y cosenos de las latitudes, que se
+    calculan una sola vez por instantanea.
+    Entrada:
+        * i: Indice interno del vertice de referencia
+    Salida:
+        Arreglo array('d') en el cual la posicion j es la distancia en metros
+        entre el vertice i y el vertice j.
+    '''
+    def distances_from(self, i):
+        sin_lats, cos_lats, lngs = self.trigonometric()
+
+        sin_lat1, cos_lat1, lng1 = sin_lats[i], cos_lats[i], lngs[i]
+
+        distances = array('d', [0.0]) * self.num_vertices
+        for j, (sin_lat2, cos_lat2, lng2) in enumerate(zip(sin_lats, cos_lats, lngs)):
+            distances[j] = _great_circle(sin_lat1, cos_lat1, lng1, sin_lat2, cos_lat2, lng2)
+        return distances
+
+    '''
+    Calcula el arbol de rutas mas cortas (Dijkstra) desde un vertice.
+    Entradas:
+        * source: Indice interno del vertice de origen
+        * targets: Iterable opcional de indices internos. Si se indica, la
+        busqueda se detiene en cuanto todos ellos hayan sido cerrados.
+    Salida:
+        Tupla (distances, parents, order). distances y parents son listas por
+        indice interno con la distancia desde source (inf si no se alcanzo) y el
+        predecesor en el arbol (-1 si no se alcanzo; source es su propio
+        predecesor). order es la lista de vertices en el orden en que fueron
+        cerrados, por lo que el predecesor de un vertice siempre aparece antes
+        que el.
+    '''
+    def shortest_path_tree(self, source, targets = None):
+        offsets, edge_targets, weights = self.offsets, self.targets, self.weights
+        n = self.num_vertices
+
+        distances = [float('inf')] * n
+        distances[source] = 0.0
+        parents = [-1] * n
+        parents[source] = source
+        closed = bytearray(n)
+        order = []
+
+        pending = None
+        if targets is not None:
+            is_target = bytearray(n)
+            for t in targets:
+                is_target[t] = 1
+            pending = sum(is_target)
+
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heappop(heap)
+            if closed[u]:
+                continue
+            closed[u] = 1
+            order.append(u)
+
+            if pending is not None and is_target[u]:
+                pending = pending - 1
+                if pending == 0:
+                    break
+
+            for k in range(offsets[u], offsets[u + 1]):
+                v = edge_targets[k]
+                nd = d + weights[k]
+                if nd < distances[v]:
+                    distances[v] = nd
+                    parents[v] = u
+                    heappush(heap, (nd, v))
+
+        return distances, parents, order
+
+    '''
+    Calcula el arbol de busqueda en anchura (BFS) desde un vertice, es decir,
+    el numero minimo de saltos hacia cada vertice.
+    Entradas:
+        * source: Indice interno del vertice de origen
+        * targets: Iterable opcional de indices internos. Si se indica, la
+        busqueda se detiene en cuanto todos ellos hayan sido descubiertos.
+    Salida:
+        Tupla (hops, parents, order) con el mismo formato de
+        shortest_path_tree.
+    '''
+    def breadth_first_tree(self, source, targets = None):
+        offsets, edge_targets = self.offsets, self.targets
+        n = self.num_vertices
+
+        hops = [float('inf')] * n
+        hops[source] = 0
+        parents = [-1] * n
+        parents[source] = source
+        order = [source]
+
+        pending = None
+        if targets is not None:
+            is_target = bytearray(n)
+            for t in targets:
+                is_target[t] = 1
+            pending = sum(is_target) - is_target[source]
+
+        queue = deque([source])
+        while queue and pending != 0:
+            u = queue.popleft()
+            for k in range(offsets[u], offsets[u + 1]):
+                v = edge_targets[k]
+                if parents[v] != -1:
+                    continue
+                parents[v] = u
+                hops[v] = hops[u] + 1
+                order.append(v)
+                queue.append(v)
+                if pending is not None and is_target[v]:
+                    pending = pending - 1
 
-Para el calculo heuristico `(construct_heristic)` se midio como la distancia en linea recta desde la estacion AV. Jimenez a las demas estaciones (Distancia total). Esta medicion se hizo utilizando la libreria `Geopy.distance` en la funcion `Station.distance`, usando el algoritmo del gran circulo, el cual toma en cuenta que la tierra es totalmente esferica, con un radio de 6371.008 Km y dando resultados con un error del 0.5% aproximadamente.
+        return hops, parents, order
 
-Aun asi, se puede utilizar cualquier medicion tomando las coordenadas (longitud y latitud) por cada estacion, como la euclidiana o la distancia de manhattan para dicho proposito. El principal problema es que este tipo de distancias no tienen en cuenta la curvatura del arco, haciendola mas ineficiente para distancias en lugares de la tierra. Para el anterior trabajo esta el metodo `heristic`, el cual, dado 2 coordenadas, devuel ve las mediciones deseadas. Esta funcion se puede usar como complemento para medir todas las distancias, reemplazando a el algoritmo del gran circulo implementado en `GeoPy`.
+"""# **Clase SharedGraph**
 
-> Si desea utilizar otro algoritmo de medicion de distancia, consulte la [documentacion de GeoPy para localizaciones](https://geopy.readthedocs.io/en/stable/#module-geopy.distance).
+> Copia de los arreglos CSR de una instantanea `FrozenGraph` en un segmento de memoria compartida (`multiprocessing.shared_memory`). Los procesos de un pool se conectan al segmento por su nombre y leen las aristas sin que el grafo, sus vertices y sus diccionarios se serialicen con pickle en cada tarea. El segmento guarda, en este orden, `offsets` (`n + 1` enteros de 64 bits), `targets` (`m` enteros de 64 bits) y `weights` (`m` reales de 64 bits).
 """
 
-class TreeSearch:
+class SharedGraph:
 
     '''
-    Inicializacion
+    Inicializacion. Crea el segmento de memoria compartida y copia en el los
+    arreglos de la instantanea.
     Entradas:
-        *graph: variable la cual puede tomar forma de objeto de la clase Graph
-        u objeto de la clase dict, dependiendo del algoritmo a ejecutar debe de 
-        cambiarse.
-    Excepciones:
-        *TypeError: Se produce cuando la variable graph tiene un valor None.
+        * frozen: Objeto de la clase FrozenGraph
     '''
-    def __init__(self, graph):
-        if graph is not None:
-            self.graph = graph
-            self.weights = []
-        else:
-            raise TypeError('El grafo tiene un valor de instancia incorrecto: None')
+    def __init__(self, frozen):
+        self.num_vertices = frozen.num_vertices
+        from multiprocessing.shared_memory import SharedMemory
+        self.num_edges = len(frozen.targets)
+        size = SharedGraph.size(self.num_vertices, self.num_edges)
+        self.memory = SharedMemory(create = True, size = max(size, 1))
+        self.name = self.memory.name
+
+        offsets, targets, weights = SharedGraph.views(self.memory, self.num_vertices, self.num_edges)
+        offsets[:] = array('q', frozen.offsets)
+        targets[:] = array('q', frozen.targets)
+        weights[:] = array('d', frozen.weights)
+        offsets.release()
+        targets.release()
+        weights.release()
 
-    #Algoritmos de busqueda no informada
     '''
-    Algoritmo BFS
+    Tamaño en bytes del segmento para un grafo de n vertices y m aristas.
+    '''
+    @staticmethod
+    def size(n, m):
+        return 8 * (n + 1) + 8 * m + 8 * m
+
+    '''
+    Obtiene las vistas (memoryview) de offsets, targets y weights sobre el
+    segmento de memoria compartida.
+    '''
+    @staticmethod
+    def views(memory, n, m):
+        buffer = memory.buf
+        start = 8 * (n + 1)
+        end = start + 8 * m
+        return (buffer[:start].cast('q'),
+                buffer[start:end].cast('q'),
+                buffer[end:end + 8 * m].cast('d'))
+
+    '''
+    Conecta un proceso al segmento de memoria compartida.
     Entradas:
-        - start: Nodo de entrada de la clase Vertex
-        - goal: Nodo objetivo de la clase Vertex
-    *Salidas: Lista con la ruta optima encontrada por este algoritmo. Cada indice
-    es el id del nodo que pertenece a aquel camino optimo.
-    *Excepciones:
-        * TypeError: Esta excepcion ocurre cuando el campo de la presente clase graph
-        no es la instancia de la clase Graph, sino una matriz o un diccionario.
+        * name: Nombre del segmento
+        * n: Numero de vertices
+        * m: Numero de aristas
+    Salida: Tupla (memory, frozen), donde frozen es un objeto de la clase
+    FrozenGraph cuyos arreglos son vistas sobre el segmento. Los ids son los
+    indices internos 0..n-1 y no hay coordenadas.
     '''
-    def bfs_shortest_path(self, start, goal):
-        if (isinstance(self.graph, dict)):
-            raise TypeError('El grafo no es instancia de la clase Graph')
+    @staticmethod
+    def attach(name, n, m):
+        from multiprocessing.shared_memory import SharedMemory
+        memory = SharedMemory(name = name)
+        offsets, targets, weights = SharedGraph.views(memory, n, m)
+        frozen = FrozenGraph.from_arrays(range(n), offsets, targets, weights, None, None)
+        return memory, frozen
+
+    '''
+    Libera y elimina el segmento de memoria compartida.
+    '''
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
 
-        explored = []
+"""**Procesos del pool**
 
-        queue = [[start]]
-    
-        if start == goal:
-            return "El objetivo es el mismo que el inicio."
-    
-        while queue:
-            
-            path = queue.pop(0)
-            
-            node = path[-1]
-            if node not in explored:
-                neighbours = self.graph.vert_dict[node].get_childrens()
-                
-                for neighbour in neighbours:
-                    new_path = list(path)
-                    new_path.append(neighbour)
-                    queue.append(new_path)
-                    
-                    if neighbour == goal:
-                        return new_path
-    
-                explored.append(node)
-    
-        return "No hay conexion entre el nodo de inicio y el objetivo."
+> Funciones ejecutadas por los procesos de `TreeSearch.parallel_route_matrix`. Cada proceso se conecta una sola vez, al iniciar, al grafo y a la matriz de salida compartidos, y luego calcula filas completas de la matriz. Al terminar el proceso se liberan las vistas y se cierran los segmentos.
+"""
+
+_shared_state = {}
+
+def _attach_route_matrix_worker(graph_name, n, m, output_name, target_indices, algorithm):
+    from multiprocessing.shared_memory import SharedMemory
+    from multiprocessing.util import Finalize
+    memory, frozen = SharedGraph.attach(graph_name, n, m)
+    output = SharedMemory(name = output_name)
+    _shared_state['memory'] = memory
+    _shared_state['output'] = output
+    _shared_state['costs'] = output.buf.cast('d')
+    _shared_state['frozen'] = frozen
+    _shared_state['targets'] = target_indices
+    _shared_state['algorithm'] = algorithm
+    Finalize(None, _detach_route_matrix_worker, exitpriority = 10)
+
+def _detach_route_matrix_worker():
+    frozen = _shared_state.pop('frozen')
+    frozen.offsets.release()
+    frozen.targets.release()
+    frozen.weights.release()
+    _shared_state.pop('costs').release()
+    _shared_state.pop('memory').close()
+    _shared_state.pop('output').close()
+
+def _route_matrix_rows(rows):
+    frozen = _shared_state['frozen']
+    costs = _shared_state['costs']
+    target_indices = _shared_state['targets']
+    columns = len(target_indices)
+    if _shared_state['algorithm'] == 'bfs':
+        tree = frozen.breadth_first_tree
+    else:
+        tree = frozen.shortest_path_tree
+
+    for row, source in rows:
+        distances = tree(source, target_indices)[0]
+        start = row * columns
+        for column, t in enumerate(target_indices):
+            costs[start + column] = distances[t]
+    return len(rows)
+
+"""# **Clase GraphSnapshot**
+
+> Archivo binario con la instantanea `FrozenGraph` de un grafo y, opcionalmente, los nombres y coordenadas de sus estaciones. El archivo se abre con `mmap` de solo lectura y los arreglos CSR se leen como vistas (`memoryview`) sobre el mapeo, sin copiarlos ni recalcular ningun peso: abrir la red toma lo que tarda el sistema operativo en mapear el archivo, y varios procesos que abren el mismo archivo comparten las mismas paginas de memoria.
+
+El archivo tiene el siguiente formato:
+
+*   Encabezado fijo: identificador `TMGS`, version del formato, longitud del encabezado JSON, y el CRC32 del encabezado JSON y del bloque de datos.
+*   Encabezado JSON: version del grafo, orden de bytes, ids de los vertices (`null` cuando son `0..n-1`), estaciones `[nombre, id, latitud, longitud]` y la posicion de cada arreglo dentro del bloque de datos.
+*   Bloque de datos, alineado a 8 bytes: `offsets` y `targets` (enteros de 64 bits), `weights`, `latitudes` y `longitudes` (reales de 64 bits).
+
+Un archivo de otro formato, de otra version del formato o con un CRC32 que no coincide genera `ValueError`.
+"""
+
+class GraphSnapshot:
+
+    # Identificador de los archivos de instantanea
+    MAGIC = b'TMGS'
+    # Version del formato del archivo
+    FORMAT_VERSION = 1
+    # Encabezado fijo: identificador, version del formato, longitud y CRC32
+    # del encabezado JSON, CRC32 del bloque de datos
+    PREFIX = struct.Struct('<4sIIII')
 
     '''
-    Algoritmo DFS
-        - start: id del Nodo de entrada
-        - goal: id del Nodo de salida
-    Salida: Lista con la ruta optima encontrada por este algoritmo. Cada indice
-    es el id del nodo que pertenece a aquel camino optimo.
+    Guarda la instantanea de un grafo en un archivo.
+    Entradas:
+        * graph: Objeto de la clase Graph o FrozenGraph
+        * path: Ruta del archivo
+        * station: Objeto opcional de la clase Station
+    '''
+    @staticmethod
+    def save(graph, path, station = None):
+        frozen = graph if isinstance(graph, FrozenGraph) else graph.freeze()
+        n = frozen.num_vertices
+
+        arrays = [('offsets', array('q', frozen.offsets)),
+                  ('targets', array('q', frozen.targets)),
+                  ('weights', array('d', frozen.weights)),
+                  ('latitudes', array('d', frozen.latitudes if frozen.latitudes is not None else [0.0] * n)),
+                  ('longitudes', array('d', frozen.longitudes if frozen.longitudes is not None else [0.0] * n))]
+
+        layout = []
+        checksum = 0
+        offset = 0
+        for name, values in arrays:
+            layout.append((name, values.typecode, len(values), offset))
+            offset = offset + len(values) * values.itemsize
+            checksum = zlib.crc32(values, checksum)
+
+        ids = list(frozen.ids)
+        stations = []
+        if station is not None:
+            for name, (id, (x, y)) in station.stations.items():
+                stations.append((name, id, x, y))
+            for id, (name, (x, y)) in station.platforms.items():
+                stations.append((name, id, x, y))
+
+        header = {'version': frozen.version,
+                  'byteorder': sys.byteorder,
+                  'ids': None if ids == list(range(n)) else ids,
+                  'stations': stations,
+                  'arrays': layout}
+        header_bytes = json.dumps(header).encode('utf-8')
+        start = GraphSnapshot.data_start(len(header_bytes))
+
+        with open(path, 'wb') as f:
+            f.write(GraphSnapshot.PREFIX.pack(GraphSnapshot.MAGIC, GraphSnapshot.FORMAT_VERSION,
+                                              len(header_bytes), zlib.crc32(header_bytes), checksum))
+            f.write(header_bytes)
+            f.write(bytes(start - GraphSnapshot.PREFIX.size - len(header_bytes)))
+            for name, values in arrays:
+                values.tofile(f)
+
+    '''
+    Posicion del bloque de datos en el archivo: el primer multiplo de 8
+    despues del encabezado JSON.
+    '''
+    @staticmethod
+    def data_start(header_length):
+        return (GraphSnapshot.PREFIX.size + header_length + 7) // 8 * 8
+
+    '''
+    Inicializacion. Abre y mapea en memoria un archivo de instantanea.
+    Entradas:
+        * path: Ruta del archivo
+        * verify: Si es True se verifica el CRC32 del bloque de datos, lo que
+        requiere leer el archivo completo una vez.
     Excepciones:
-        *TypeError: Se produce cuando el campo graph de la presente clase no 
-        es una instacia de la clase dict.
+        * ValueError: Se produce cuando el archivo no es una instantanea
+        valida.
     '''
-    def dfs_paths(self, start, goal):
-        if(isinstance(self.graph, Graph)):
-            raise TypeError('El grafo no es instancia de un diccionario.')
+    def __init__(self, path, verify = True):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        self._views = []
+
+        try:
+            buffer = self._view(memoryview(self.mmap))
+            if len(buffer) < GraphSnapshot.PREFIX.size:
+                raise ValueError('El archivo ' + str(path) + ' no tiene el formato esperado')
+            magic, format_version, length, header_checksum, checksum = GraphSnapshot.PREFIX.unpack_from(buffer)
+            if magic != GraphSnapshot.MAGIC:
+                raise ValueError('El archivo ' + str(path) + ' no tiene el formato esperado')
+            if format_version != GraphSnapshot.FORMAT_VERSION:
+                raise ValueError('El archivo ' + str(path) + ' tiene la version ' + str(format_version) +
+                                 ' del formato y se esperaba la version ' + str(GraphSnapshot.FORMAT_VERSION))
+
+            header_bytes = bytes(buffer[GraphSnapshot.PREFIX.size:GraphSnapshot.PREFIX.size + length])
+            if zlib.crc32(header_bytes) != header_checksum:
+                raise ValueError('El encabezado del archivo ' + str(path) + ' esta dañado')
+            header = json.loads(header_bytes.decode('utf-8'))
+
+            data = self._view(buffer[GraphSnapshot.data_start(length):])
+            if verify and zlib.crc32(data) != checksum:
+                raise ValueError('Los datos del archivo ' + str(path) + ' estan dañados')
+
+            arrays = {}
+            for name, typecode, size, offset in header['arrays']:
+                values = self._view(data[offset:offset + size * 8].cast(typecode))
+                if header['byteorder'] != sys.byteorder:
+                    values = array(typecode, values)
+                    values.byteswap()
+                arrays[name] = values
+        except Exception:
+            self.close()
+            raise
+
+        n = len(arrays['latitudes'])
+        ids = range(n) if header['ids'] is None else header['ids']
+        self.version = header['version']
+        self.frozen = FrozenGraph.from_arrays(ids, arrays['offsets'], arrays['targets'],
+                                              arrays['weights'], arrays['latitudes'],
+                                              arrays['longitudes'], self.version)
+
+        self.station = Station()
+        for name, id, x, y in header['stations']:
+            self.station.add_stop(id, name, (x, y))
+        self.station.build_index()
 
-        stack = [(start, [start])]
-        while stack:
-            (vertex, path) = stack.pop()
-            for next in set(self.graph[vertex]) - set(path):
-                if next == goal:
-                    return path + [next]
-                else:
-                    stack.append((next, path + [next]))
+    '''
+    Registra una vista sobre el mapeo para liberarla al cerrar el archivo.
+    '''
+    def _view(self, view):
+        self._views.append(view)
+        return view
 
     '''
-    Algoritmo UCS
+    Construye un objeto de la clase Graph, modificable, con los vertices y
+    aristas de la instantanea. El grafo conserva la version de la instantanea,
+    por lo que las jerarquias y etiquetas guardadas para esa version siguen
+    siendo validas.
+    Salida: Objeto de la clase Graph.
+    '''
+    def to_graph(self):
+        frozen = self.frozen
+        graph = Graph()
+        graph.add_vertices(frozen.ids, frozen.latitudes, frozen.longitudes)
+        vertices = [graph.vert_dict[node] for node in frozen.ids]
+        for u in range(frozen.num_vertices):
+            adjacent = vertices[u].adjacent
+            for k in frozen.edges(u):
+                adjacent[vertices[frozen.targets[k]]] = frozen.weights[k]
+        graph.version = self.version
+        return graph
+
+    '''
+    Libera las vistas y cierra el mapeo del archivo. La instantanea frozen
+    no se puede usar despues de cerrar el archivo.
+    '''
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self.mmap.close()
+
+"""# **Clase AllPairsTable**
+
+> Precomputo de todas las rutas mas cortas del grafo. Para una red del tamaño de las troncales de Transmilenio es posible calcular de antemano la distancia entre todos los pares de estaciones, ejecutando un Dijkstra por cada estacion de origen sobre la instantanea `FrozenGraph`. Se guardan dos matrices planas de `n x n`:
+
+*   `distances`: distancia minima entre cada par de vertices (`array('d')`).
+*   `next_hop`: siguiente vertice de la ruta mas corta desde el origen hacia el destino. Se guarda con el tipo entero mas pequeño que alcance para `n` (`B`, `H` o `I`), y el valor `n` indica que no hay ruta.
+
+Con estas matrices una consulta de costo es un acceso a la tabla y la reconstruccion de la ruta es un recorrido de a lo sumo `n` saltos. Como la memoria crece con `n²`, el constructor se niega a construir la tabla cuando la estimacion supera `max_bytes`.
+"""
+
+class AllPairsTable:
+
+    # Limite de memoria por defecto: 64 MB
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    '''
+    Inicializacion
     Entradas:
-        - start: Nodo de entrada de la clase Vertex
-        - goal: Nodo objetivo de la clase Vertex
-    -Salidas: Lista con la ruta optima encontrada por este algoritmo. Cada indice
-    es el id del nodo que pertenece a aquel camino optimo.
-    -Excepciones:
-        * TypeError: Esta excepcion ocurre cuando el campo de la presente clase graph
-        no es la instancia de la clase Graph, sino una matriz o un diccionario.
+        * graph: Objeto de la clase Graph o FrozenGraph
+        * max_bytes: Memoria maxima permitida para las dos matrices.
+    Excepciones:
+        * MemoryError: Se produce cuando la memoria estimada de la tabla supera
+        max_bytes.
     '''
-    def ucs(self, start, goal):
-        if (isinstance(self.graph, dict)):
-            raise TypeError('El grafo no es instancia de la clase Graph')
+    def __init__(self, graph, max_bytes = DEFAULT_MAX_BYTES):
+        frozen = graph if isinstance(graph, FrozenGraph) else graph.freeze()
+        n = frozen.num_vertices
+
+        required = AllPairsTable.estimate_memory(n)
+        if required > max_bytes:
+            raise MemoryError('La tabla de todos los pares requiere %d bytes y el limite es %d' % (required, max_bytes))
+
+        self.frozen = frozen
+        self.num_vertices = n
+        self.distances = array('d', [float('inf')]) * (n * n)
+        self.next_hop = array(AllPairsTable.next_hop_typecode(n), [n]) * (n * n)
+
+        for source in range(n):
+            distances, parents, order = frozen.shortest_path_tree(source)
+            row = source * n
+            self.distances[row:row + n] = array('d', distances)
+
+            # El primer salto de cada vertice es el de su predecesor, salvo
+            # para los hijos directos del origen. order garantiza que el
+            # predecesor se procesa antes.
+            next_hop = self.next_hop
+            next_hop[row + source] = source
+            for v in order[1:]:
+                p = parents[v]
+                next_hop[row + v] = v if p == source else next_hop[row + p]
 
-        visited = set()
-        queue = PriorityQueue()
-        queue.put((0, [start]))
+    '''
+    Repara la tabla despues de cambios dinamicos del grafo (ver
+    Graph.changes_since) en lugar de calcularla de nuevo. Para cada origen s
+    solo se recalculan los vertices x para los cuales alguna ruta mas corta
+    anterior usaba una arista (u, v) que subio de peso o se cerro, es decir,
+    d(s, u) + peso anterior = d(s, v) y d(s, v) + d(v, x) = d(s, x), y los
+    que mejoran por las aristas que bajaron de peso o se reabrieron (ver
+    FrozenGraph.repair_shortest_paths). Los vertices x se encuentran
+    recorriendo desde v, sobre la instantanea anterior, solo las aristas
+    (y, z) de alguna ruta mas corta desde s (d(s, y) + peso = d(s, z)), por lo
+    que el trabajo es proporcional al subarbol afectado y no a n.
+    Entradas:
+        * frozen: Instantanea del grafo despues de los cambios
+        * changes: Cambios hechos desde la instantanea de la tabla
+    '''
+    def update(self, frozen, changes):
+        n = self.num_vertices
+        distances, next_hop = self.distances, self.next_hop
+        increased, decreased = frozen.net_changes(changes)
+        inf = float('inf')
+        tolerance = 1e-6
+
+        # Los vertices afectados se calculan con la tabla anterior completa,
+        # antes de modificar cualquier fila
+        offsets, targets, weights = self.frozen.offsets, self.frozen.targets, self.frozen.weights
+        affected_rows = []
+        for s in range(n):
+            row = s * n
+            affected = set()
+            for u, v, old in increased:
+                dv = distances[row + v]
+                if v in affected or dv == inf or distances[row + u] + old > dv + tolerance:
+                    continue
+                affected.add(v)
+                stack = [v]
+                while stack:
+                    y = stack.pop()
+                    dy = distances[row + y]
+                    for k in range(offsets[y], offsets[y + 1]):
+                        z = targets[k]
+                        if z not in affected and dy + weights[k] <= distances[row + z] + tolerance:
+                            affected.add(z)
+                            stack.append(z)
+            affected_rows.append(affected)
+
+        for s in range(n):
+            affected = affected_rows[s]
+            if not affected and not decreased:
+                continue
+            row = s * n
+            parents = {}
+            order = frozen.repair_shortest_paths(distances, parents, row, affected, decreased)
+            for x in affected:
+                if distances[row + x] == inf:
+                    next_hop[row + x] = n
+            for v in order:
+                p = parents[row + v]
+                next_hop[row + v] = v if p == s else next_hop[row + p]
+
+        self.frozen = frozen
 
-        while queue:
-            #cost, node = queue.get()
-            pair = queue.get()
-            current = pair[1][-1]
-            #print(pair[1], type(pair[1]))
-            if current not in visited:
-                visited.add(current)
-                
-                
-                if current == goal:
-                    path = []
-                    for u in pair[1]:
-                        path.append(u.get_id())
-                    return path
-                
-                for i in self.graph.vert_dict[current.get_id()].get_connections():
-                    if i not in visited:
-                        total_cost = pair[0] + self.graph.vert_dict[current.get_id()].get_weight(i)
-                        new_path = list(pair[1])
-                        new_path.append(i)
-                        queue.put((total_cost, new_path))
-    
-    #Algoritmos de busqueda informada
     '''
-    Metodo alternativo para la medicion de la heuristica
-    Entradas: 
-        - graph: objeto de la clase Graph
-        - a: Id de un nodo
-        - b: id de un nodo
-        - method: Indica la metrica de medicion de distancia. Euclidean o 
-        manhattan
-    Salida: Numero el cual indica la distancia dado 2 puntos o coordenadas de 2
-    lugares.
+    Tipo de dato (typecode del modulo array) mas pequeño capaz de guardar los
+    indices 0..n, donde n se usa como marca de "sin ruta".
     '''
-    def heuristic(self, graph, a, b, method = 'euclidean'):
-        #Se obitnene los vertices dado el id del vertice
-        node_a = graph.get_vertex(a)
-        node_b = graph.get_vertex(b)
+    @staticmethod
+    def next_hop_typecode(n):
+        if n < 2 ** 8:
+            return 'B'
+        elif n < 2 ** 16:
+            return 'H'
+        return 'I'
 
-        #Se extraen las coordenadas
-        (x1, y1) = node_a.get_coordinates()
-        (x2, y2) = node_b.get_coordinates()
-        if method == 'euclidean':
-            return ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
-        elif method == 'manhattan':
-            return abs(x1 - x2) + abs(y1 - y2)
+    '''
+    Estima la memoria en bytes que ocuparian las matrices de distancias y de
+    siguiente salto para un grafo de n vertices.
+    '''
+    @staticmethod
+    def estimate_memory(n):
+        item_size = array(AllPairsTable.next_hop_typecode(n)).itemsize
+        return n * n * (array('d').itemsize + item_size)
+
+    '''
+    Memoria en bytes ocupada por las matrices de la tabla.
+    '''
+    def memory_usage(self):
+        return (self.distances.itemsize * len(self.distances) +
+                self.next_hop.itemsize * len(self.next_hop))
+
+    '''
+    Obtiene la distancia minima entre 2 vertices.
+    Entradas:
+        * start: id del vertice de inicio
+        * goal: id del vertice objetivo
+    Salida: Distancia minima, o inf si no existe ruta.
+    '''
+    def distance(self, start, goal):
+        index = self.frozen.index
+        return self.distances[index[start] * self.num_vertices + index[goal]]
+
+    '''
+    Reconstruye la ruta mas corta entre 2 vertices recorriendo la matriz de
+    siguiente salto.
+    Entradas:
+        * start: id del vertice de inicio
+        * goal: id del vertice objetivo
+    Salida: Lista con los ids de la ruta, o None si no existe ruta.
+    '''
+    def path(self, start, goal):
+        ids, index = self.frozen.ids, self.frozen.index
+        n = self.num_vertices
+        current = index[start]
+        target = index[goal]
+
+        path = [ids[current]]
+        while current != target:
+            current = self.next_hop[current * n + target]
+            if current == n or len(path) > n:
+                return None
+            path.append(ids[current])
+        return path
+
+"""# **Clase Landmarks**
+
+> Preprocesamiento ALT (A*, landmarks, desigualdad triangular). La distancia en linea recta subestima mucho la distancia real sobre las troncales, lo que hace que A* se comporte casi como Dijkstra. Con ALT se escogen `k` vertices de referencia (landmarks) y se guarda la distancia por la red desde cada landmark hacia todos los vertices y desde todos los vertices hacia cada landmark. Por la desigualdad triangular, para un objetivo `t` y un landmark `L`:
+
+*   `d(v, t) >= d(L, t) - d(L, v)`
+*   `d(v, t) >= d(v, L) - d(t, L)`
+
+El maximo de estas cotas sobre todos los landmarks es una heuristica admisible y consistente, normalmente mucho mas ajustada que la geografica. Los landmarks se escogen con la estrategia del mas lejano: cada nuevo landmark es el vertice mas alejado de los ya escogidos.
+"""
+
+class Landmarks:
+
+    '''
+    Inicializacion. Escoge los landmarks y calcula sus tablas de distancias.
+    Entradas:
+        * graph: Objeto de la clase Graph o FrozenGraph
+        * k: Numero de landmarks
+    '''
+    def __init__(self, graph, k = 4):
+        frozen = graph if isinstance(graph, FrozenGraph) else graph.freeze()
+        n = frozen.num_vertices
+        reverse = frozen.reverse()
+        inf = float('inf')
+
+        self.frozen = frozen
+        self.landmarks = []
+        self.from_landmark = array('d')
+        self.to_landmark = array('d')
+        self.from_parents = array('l')
+        self.to_parents = array('l')
+
+        # El primer landmark es el vertice mas alejado del vertice 0
+        closest = frozen.shortest_path_tree(0)[0] if n > 0 else []
+        while len(self.landmarks) < min(k, n):
+            landmark = -1
+            farthest = -1.0
+            for v, d in enumerate(closest):
+                if d != inf and d > farthest and v not in self.landmarks:
+                    landmark = v
+                    farthest = d
+            if landmark == -1:
+                break
+
+            distances, parents, order = frozen.shortest_path_tree(landmark)
+            self.landmarks.append(landmark)
+            self.from_landmark.extend(distances)
+            self.from_parents.extend(parents)
+            distances_to, parents, order = reverse.shortest_path_tree(landmark)
+            self.to_landmark.extend(distances_to)
+            self.to_parents.extend(parents)
+
+            # Distancia de cada vertice al landmark mas cercano ya escogido
+            if len(self.landmarks) == 1:
+                closest = distances
+            else:
+                closest = [min(a, b) for a, b in zip(closest, distances)]
+
+    '''
+    Obtiene la heuristica ALT hacia un vertice objetivo.
+    Entrada:
+        * goal: id del vertice objetivo
+    Salida: Objeto indexable por el indice interno de cada vertice, el cual
+    puede pasarse como heuristics a astar_search. Cada valor se calcula al
+    consultarlo.
+    '''
+    def heuristic(self, goal):
+        return _LandmarkHeuristic(self, self.frozen.index[goal])
+
+    '''
+    Repara las tablas de distancias despues de cambios dinamicos del grafo
+    (ver Graph.changes_since) en lugar de calcularlas de nuevo. Cada tabla es
+    un arbol de rutas mas cortas desde (o hacia) un landmark: si una arista
+    del arbol subio de peso o se cerro, solo se recalcula el subarbol que
+    cuelga de ella, y las aristas que bajaron de peso o se reabrieron solo
+    propagan sus mejoras (ver FrozenGraph.repair_shortest_paths). Los
+    landmarks escogidos no cambian.
+    Entradas:
+        * frozen: Instantanea del grafo despues de los cambios
+        * changes: Cambios hechos desde la instantanea de los landmarks
+    '''
+    def update(self, frozen, changes):
+        n = frozen.num_vertices
+        increased, decreased = frozen.net_changes(changes)
+        reverse = frozen.reverse()
+        reverse_increased = [(v, u, w) for u, v, w in increased]
+        reverse_decreased = [(v, u, w) for u, v, w in decreased]
+
+        for i in range(len(self.landmarks)):
+            base = i * n
+            for graph, distances, parents, tree_increased, tree_decreased in (
+                    (frozen, self.from_landmark, self.from_parents, increased, decreased),
+                    (reverse, self.to_landmark, self.to_parents, reverse_increased, reverse_decreased)):
+                # Subarboles de las aristas del arbol que subieron de peso. Los
+                # hijos de un vertice son los vecinos cuyo predecesor es el
+                offsets, targets = graph.offsets, graph.targets
+                stack = [v for u, v, w in tree_increased if parents[base + v] == u]
+                affected = set()
+                while stack:
+                    x = stack.pop()
+                    if x not in affected:
+                        affected.add(x)
+                        stack.extend(y for y in targets[offsets[x]:offsets[x + 1]]
+                                     if parents[base + y] == x and y != x)
+                if affected or tree_decreased:
+                    graph.repair_shortest_paths(distances, parents, base, affected, tree_decreased)
+
+        self.frozen = frozen
+
+    '''
+    Memoria en bytes ocupada por las tablas de distancias y de predecesores.
+    '''
+    def memory_usage(self):
+        return (self.from_landmark.itemsize * len(self.from_landmark) +
+                self.to_landmark.itemsize * len(self.to_landmark) +
+                self.from_parents.itemsize * len(self.from_parents) +
+                self.to_parents.itemsize * len(self.to_parents))
+
+class _LandmarkHeuristic:
+
+    __slots__ = ('rows', 'from_landmark', 'to_landmark', 'num_vertices')
+
+    def __init__(self, landmarks, goal):
+        n = landmarks.frozen.num_vertices
+        self.num_vertices = n
+        self.from_landmark = landmarks.from_landmark
+        self.to_landmark = landmarks.to_landmark
+        # Por cada landmark: (d(L, t), d(t, L), inicio de su fila en las tablas)
+        self.rows = [(self.from_landmark[i * n + goal], self.to_landmark[i * n + goal], i * n)
+                     for i in range(len(landmarks.landmarks))]
+
+    def __len__(self):
+        return self.num_vertices
+
+    def __getitem__(self, v):
+        # Las restas con distancias infinitas dan nan, el cual nunca es mayor
+        # que best, o inf cuando v no puede alcanzar el objetivo.
+        best = 0.0
+        from_landmark, to_landmark = self.from_landmark, self.to_landmark
+        for landmark_to_goal, goal_to_landmark, row in self.rows:
+            bound = landmark_to_goal - from_landmark[row + v]
+            if bound > best:
+                best = bound
+            bound = to_landmark[row + v] - goal_to_landmark
+            if bound > best:
+                best = bound
+        return best
+
+"""# **Archivos de arreglos**
+
+> Formato binario sencillo para guardar en disco los arreglos de los preprocesamientos. El archivo comienza con 4 bytes que identifican su tipo, seguidos por la longitud (entero sin signo de 32 bits) y el contenido de un encabezado JSON. El encabezado guarda los datos generales y el nombre, el tipo (`typecode`) y la longitud de cada arreglo; a continuacion van los arreglos en el mismo orden. El orden de los bytes de la maquina que escribio el archivo queda en el encabezado y los arreglos se invierten al leerlos si es diferente.
+"""
+
+def _save_arrays(path, magic, header, arrays):
+    header = dict(header)
+    header['byteorder'] = sys.byteorder
+    header['arrays'] = [(name, values.typecode, len(values)) for name, values in arrays]
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(magic)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for name, values in arrays:
+            values.tofile(f)
+
+def _load_arrays(path, magic):
+    with open(path, 'rb') as f:
+        if f.read(4) != magic:
+            raise ValueError('El archivo ' + str(path) + ' no tiene el formato esperado')
+        (length,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(length).decode('utf-8'))
+
+        arrays = {}
+        for name, typecode, size in header['arrays']:
+            values = array(typecode)
+            values.fromfile(f, size)
+            if header['byteorder'] != sys.byteorder:
+                values.byteswap()
+            arrays[name] = values
+    return header, arrays
+
+"""# **Clase ContractionHierarchy**
+
+> Jerarquias de contraccion para consultas rapidas en redes grandes. El preprocesamiento ordena los vertices por importancia y los "contrae" uno a uno: al retirar un vertice `v`, por cada par de vecinos `u -> v -> w` se agrega un atajo (shortcut) `u -> w` con el costo de ambos tramos, salvo que una busqueda de testigo (witness search) encuentre un camino igual o mas corto que no pase por `v`. Cada atajo recuerda el vertice `v` que reemplaza.
+
+El orden de contraccion se decide con una cola de prioridad por la diferencia de aristas (atajos que se agregarian menos aristas que se eliminan), el numero de vecinos ya contraidos y la profundidad del vertice en la jerarquia. Como la prioridad de un vertice solo cambia cuando se contrae uno de sus vecinos, se recalcula en ese momento y las entradas anteriores de la cola se descartan al extraerlas.
+
+Una consulta es un Dijkstra bidireccional que solo sube en la jerarquia: la busqueda hacia adelante usa las aristas hacia vertices de mayor rango y la busqueda hacia atras las aristas invertidas que llegan desde vertices de mayor rango. Al final los atajos de la ruta se desempaquetan recursivamente en las estaciones originales.
+
+Las aristas hacia arriba se guardan en dos grafos CSR (`up` y `down`) con el vertice que reemplaza cada atajo (`-1` para las aristas originales), y todo el preprocesamiento se puede guardar y leer con `save` y `load` para construirlo una sola vez por version de la red.
+"""
+
+class ContractionHierarchy:
+
+    # Identificador de los archivos de la jerarquia
+    MAGIC = b'TMCH'
+
+    '''
+    Inicializacion. Construye la jerarquia a partir de un grafo.
+    Entradas:
+        * graph: Objeto de la clase Graph o FrozenGraph. None para crear un
+        objeto vacio (usado por load).
+        * witness_limit: Numero maximo de vertices cerrados en cada busqueda
+        de testigo al contraer un vertice.
+        * priority_limit: Numero maximo de vertices cerrados en las busquedas
+        de testigo usadas solo para estimar la prioridad de un vertice.
+    '''
+    def __init__(self, graph = None, witness_limit = 100, priority_limit = 20):
+        if graph is None:
+            return
+
+        frozen = graph if isinstance(graph, FrozenGraph) else graph.freeze()
+        n = frozen.num_vertices
+        self.ids = list(frozen.ids)
+        self.index = frozen.index
+        self.version = frozen.version
+        self.num_shortcuts = 0
+
+        # Grafo de trabajo: aristas salientes y entrantes no contraidas
+        # {vecino: (costo, vertice intermedio)}
+        outgoing = [{} for _ in range(n)]
+        incoming = [{} for _ in range(n)]
+        for u in range(n):
+            for k in frozen.edges(u):
+                v = frozen.targets[k]
+                w = frozen.weights[k]
+                if u != v and (v not in outgoing[u] or w < outgoing[u][v][0]):
+                    outgoing[u][v] = (w, -1)
+                    incoming[v][u] = (w, -1)
+
+        # Todas las aristas (originales y atajos) {(u, w): (costo, intermedio)}
+        arcs = {}
+        for u in range(n):
+            for v, arc in outgoing[u].items():
+                arcs[(u, v)] = arc
+
+        contracted = bytearray(n)
+        contracted_neighbors = [0] * n
+        depth = [0] * n
+        rank = array('l', [0]) * n
+
+        priorities = [self._priority(v, outgoing, incoming, contracted_neighbors, depth, priority_limit)
+                      for v in range(n)]
+        heap = [(priority, v) for v, priority in enumerate(priorities)]
+        heap.sort()
+
+        level = 0
+        while heap:
+            priority, v = heappop(heap)
+
+            # Descartar entradas obsoletas: vertices contraidos o cuya
+            # prioridad cambio despues de insertarse
+            if contracted[v] or priority != priorities[v]:
+                continue
+
+            for u, w, cost in self._shortcuts(v, outgoing, incoming, witness_limit):
+                outgoing[u][w] = (cost, v)
+                incoming[w][u] = (cost, v)
+                arcs[(u, w)] = (cost, v)
+                self.num_shortcuts = self.num_shortcuts + 1
+
+            contracted[v] = 1
+            rank[v] = level
+            level = level + 1
+            neighbors = set(incoming[v]) | set(outgoing[v])
+            for u in incoming[v]:
+                del outgoing[u][v]
+            for w in outgoing[v]:
+                del incoming[w][v]
+
+            # Los vecinos del vertice contraido cambian de prioridad
+            for u in neighbors:
+                contracted_neighbors[u] = contracted_neighbors[u] + 1
+                depth[u] = max(depth[u], depth[v] + 1)
+                priorities[u] = self._priority(u, outgoing, incoming, contracted_neighbors, depth, priority_limit)
+                heappush(heap, (priorities[u], u))
+
+        self.rank = rank
+
+        # Grafo hacia arriba (u -> w con rango(w) > rango(u)) y grafo hacia
+        # abajo invertido (w <- u con rango(u) > rango(w), guardado en w)
+        up = [[] for _ in range(n)]
+        down = [[] for _ in range(n)]
+        for (u, w), (cost, middle) in arcs.items():
+            if rank[w] > rank[u]:
+                up[u].append((w, cost, middle))
+            else:
+                down[w].append((u, cost, middle))
+
+        self.up = ContractionHierarchy._pack(up)
+        self.down = ContractionHierarchy._pack(down)
+
+    '''
+    Convierte listas de adyacencia [(vecino, costo, intermedio)...] en arreglos
+    CSR (offsets, targets, weights, middles).
+    '''
+    @staticmethod
+    def _pack(adjacency):
+        offsets = array('l', [0])
+        targets = array('l')
+        weights = array('d')
+        middles = array('l')
+        for row in adjacency:
+            for v, cost, middle in row:
+                targets.append(v)
+                weights.append(cost)
+                middles.append(middle)
+            offsets.append(len(targets))
+        return offsets, targets, weights, middles
+
+    '''
+    Calcula los atajos necesarios para contraer el vertice v.
+    Salida: Lista de tuplas (u, w, costo) con los atajos u -> w.
+    '''
+    def _shortcuts(self, v, outgoing, incoming, limit):
+        shortcuts = []
+        for u, (cost_in, _) in incoming[v].items():
+            targets = {}
+            for w, (cost_out, _) in outgoing[v].items():
+                if w != u:
+                    targets[w] = cost_in + cost_out
+            if not targets:
+                continue
+
+            distances = self._witness_search(u, v, targets, max(targets.values()), outgoing, limit)
+            for w, cost in targets.items():
+                if distances.get(w, float('inf')) > cost:
+                    shortcuts.append((u, w, cost))
+        return shortcuts
+
+    '''
+    Busqueda de testigo: Dijkstra limitado desde u que ignora el vertice v
+    y se detiene al superar max_cost, al cerrar todos los objetivos o al cerrar
+    limit vertices.
+    Salida: Diccionario {vertice: distancia} de los vertices alcanzados.
+    '''
+    def _witness_search(self, u, v, targets, max_cost, outgoing, limit):
+        distances = {u: 0.0}
+        heap = [(0.0, u)]
+        closed = set()
+        pending = len(targets)
+        while heap and len(closed) < limit:
+            d, x = heappop(heap)
+            if x in closed:
+                continue
+            if d > max_cost:
+                break
+            closed.add(x)
+            if x in targets:
+                pending = pending - 1
+                if pending == 0:
+                    break
+            for y, (cost, _) in outgoing[x].items():
+                if y == v:
+                    continue
+                nd = d + cost
+                if nd <= max_cost and nd < distances.get(y, float('inf')):
+                    distances[y] = nd
+                    heappush(heap, (nd, y))
+        return distances
+
+    '''
+    Prioridad de contraccion de v: diferencia de aristas, mas el numero de
+    vecinos ya contraidos y la profundidad de v en la jerarquia, los cuales
+    reparten la contraccion de manera uniforme por el grafo.
+    '''
+    def _priority(self, v, outgoing, incoming, contracted_neighbors, depth, limit):
+        shortcuts = len(self._shortcuts(v, outgoing, incoming, limit))
+        removed = len(outgoing[v]) + len(incoming[v])
+        return 2 * (shortcuts - removed) + contracted_neighbors[v] + depth[v]
+
+    '''
+    Calcula la ruta mas corta entre 2 vertices con la jerarquia.
+    Entradas:
+        * start: id del vertice de inicio
+        * goal: id del vertice objetivo
+    Salida: Tupla (costo, lista de ids de la ruta), o None si no existe ruta.
+    '''
+    def query(self, start, goal):
+        source = self.index[start]
+        target = self.index[goal]
+        if source == target:
+            return 0.0, [start]
+
+        inf = float('inf')
+        forward = ({source: 0.0}, {source: source}, [(0.0, source)], self.up)
+        backward = ({target: 0.0}, {target: target}, [(0.0, target)], self.down)
+        best = inf
+        meeting = -1
+
+        while True:
+            # Cada direccion sigue mientras su menor costo pueda mejorar la ruta
+            active = [state for state in (forward, backward) if state[2] and state[2][0][0] < best]
+            if not active:
+                break
+            state = min(active, key = lambda state: state[2][0][0])
+            distances, parents, heap, (offsets, targets, weights, middles) = state
+            other = backward[0] if state is forward else forward[0]
+
+            d, u = heappop(heap)
+            if d > distances[u]:
+                continue
+            if u in other and d + other[u] < best:
+                best = d + other[u]
+                meeting = u
+
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                nd = d + weights[k]
+                if nd < distances.get(v, inf):
+                    distances[v] = nd
+                    parents[v] = u
+                    heappush(heap, (nd, v))
+
+        if meeting == -1:
+            return None
+
+        # Aristas de la jerarquia desde source hasta el punto de encuentro y
+        # desde el punto de encuentro hasta target
+        forward_path = [meeting]
+        while forward[1][forward_path[-1]] != forward_path[-1]:
+            forward_path.append(forward[1][forward_path[-1]])
+        forward_path.reverse()
+        backward_path = [meeting]
+        while backward[1][backward_path[-1]] != backward_path[-1]:
+            backward_path.append(backward[1][backward_path[-1]])
+        hierarchy_path = forward_path + backward_path[1:]
+
+        path = [source]
+        for u, w in zip(hierarchy_path, hierarchy_path[1:]):
+            self._unpack(u, w, path)
+        return best, [self.ids[v] for v in path]
+
+    '''
+    Obtiene el vertice intermedio de la arista u -> w de la jerarquia.
+    '''
+    def _middle(self, u, w):
+        if self.rank[w] > self.rank[u]:
+            offsets, targets, weights, middles = self.up
+            row, neighbor = u, w
+        else:
+            offsets, targets, weights, middles = self.down
+            row, neighbor = w, u
+        for k in range(offsets[row], offsets[row + 1]):
+            if targets[k] == neighbor:
+                return middles[k]
+        raise KeyError((u, w))
+
+    '''
+    Desempaqueta la arista u -> w agregando a path los vertices originales
+    que la forman (sin incluir u).
+    '''
+    def _unpack(self, u, w, path):
+        stack = [(u, w)]
+        while stack:
+            a, b = stack.pop()
+            middle = self._middle(a, b)
+            if middle == -1:
+                path.append(b)
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))
+
+    '''
+    Guarda la jerarquia en un archivo binario.
+    Entrada:
+        * path: Ruta del archivo
+    '''
+    def save(self, path):
+        arrays = [('rank', self.rank)]
+        for prefix, graph in (('up', self.up), ('down', self.down)):
+            for name, values in zip(('offsets', 'targets', 'weights', 'middles'), graph):
+                arrays.append((prefix + '_' + name, values))
+        header = {'ids': self.ids, 'version': self.version, 'num_shortcuts': self.num_shortcuts}
+        _save_arrays(path, ContractionHierarchy.MAGIC, header, arrays)
+
+    '''
+    Lee una jerarquia guardada con save.
+    Entrada:
+        * path: Ruta del archivo
+    Salida: Objeto de la clase ContractionHierarchy.
+    Excepciones:
+        * ValueError: Se produce cuando el archivo no es una jerarquia.
+    '''
+    @staticmethod
+    def load(path):
+        header, arrays = _load_arrays(path, ContractionHierarchy.MAGIC)
+        hierarchy = ContractionHierarchy()
+        hierarchy.ids = header['ids']
+        hierarchy.index = {node: i for i, node in enumerate(hierarchy.ids)}
+        hierarchy.version = header['version']
+        hierarchy.num_shortcuts = header['num_shortcuts']
+        hierarchy.rank = arrays['rank']
+        hierarchy.up = tuple(arrays['up_' + name] for name in ('offsets', 'targets', 'weights', 'middles'))
+        hierarchy.down = tuple(arrays['down_' + name] for name in ('offsets', 'targets', 'weights', 'middles'))
+        return hierarchy
+
+"""# **Clase HubLabels**
+
+> Etiquetado por hubs (two-hop labeling) para consultas de distancia exactas en microsegundos. Cada vertice `v` guarda dos etiquetas ordenadas por hub: `out(v)`, con pares `(hub, d(v, hub))`, e `in(v)`, con pares `(hub, d(hub, v))`. Las etiquetas cumplen que para todo par `s, t` existe un hub comun sobre una ruta mas corta, por lo que `d(s, t)` es el minimo de `d(s, h) + d(h, t)` sobre los hubs comunes de `out(s)` e `in(t)`, el cual se obtiene mezclando las dos listas ordenadas.
+
+Las etiquetas se construyen con pruned landmark labeling: los vertices se procesan en orden de importancia (por defecto, de mayor a menor rango en una jerarquia de contraccion, lo que da etiquetas varias veces mas pequeñas que ordenar por grado) y desde cada uno se ejecuta un Dijkstra hacia adelante y otro hacia atras que se podan en cuanto las etiquetas ya existentes dan una distancia igual o menor. Como los hubs se agregan en orden, cada etiqueta queda ordenada sin necesidad de ordenarla.
+
+Las etiquetas se guardan en arreglos CSR (`offsets`, `hubs` con el rango del hub y `distances`) y se pueden guardar y leer con `save` y `load`.
+"""
+
+class HubLabels:
+
+    # Identificador de los archivos de etiquetas
+    MAGIC = b'TMHL'
+
+    '''
+    Inicializacion. Construye las etiquetas a partir de un grafo.
+    Entradas:
+        * graph: Objeto de la clase Graph o FrozenGraph. None para crear un
+        objeto vacio (usado por load).
+        * order: Lista opcional de indices internos en el orden en que se
+        procesan los vertices (del mas importante al menos importante).
+        * hierarchy: Objeto opcional de la clase ContractionHierarchy del mismo
+        grafo. Si no se indica order, los vertices se ordenan por su rango en
+        esta jerarquia, la cual se construye si no se pasa.
+    '''
+    def __init__(self, graph = None, order = None, hierarchy = None):
+        if graph is None:
+            return
+
+        frozen = graph if isinstance(graph, FrozenGraph) else graph.freeze()
+        n = frozen.num_vertices
+        self.ids = list(frozen.ids)
+        self.index = frozen.index
+        self.version = frozen.version
+
+        if order is None:
+            if hierarchy is None:
+                hierarchy = ContractionHierarchy(frozen)
+            order = sorted(range(n), key = lambda v: -hierarchy.rank[v])
+
+        # Etiquetas en construccion: listas de (rango del hub, distancia)
+        out_labels = [[] for _ in range(n)]
+        in_labels = [[] for _ in range(n)]
+        reverse = frozen.reverse()
+        inf = float('inf')
+        hub_distances = [inf] * n
+
+        for rank, hub in enumerate(order):
+            # Hacia adelante: d(hub, v) va a in(v), se poda con out(hub)
+            # Hacia atras: d(v, hub) va a out(v), se poda con in(hub)
+            for graph, labels, hub_label in ((frozen, in_labels, out_labels[hub]),
+                                              (reverse, out_labels, in_labels[hub])):
+                for r, d in hub_label:
+                    hub_distances[r] = d
+
+                self._pruned_search(graph, hub, rank, labels, hub_distances)
+
+                for r, d in hub_label:
+                    hub_distances[r] = inf
+
+        self.out_labels = HubLabels._pack(out_labels)
+        self.in_labels = HubLabels._pack(in_labels)
+
+    '''
+    Dijkstra podado desde hub. Un vertice v alcanzado a distancia d solo
+    recibe el hub en su etiqueta, y solo se expande, si las etiquetas
+    existentes no dan ya una distancia menor o igual a d.
+    '''
+    def _pruned_search(self, graph, hub, rank, labels, hub_distances):
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        distances = {hub: 0.0}
+        heap = [(0.0, hub)]
+        while heap:
+            d, v = heappop(heap)
+            if d > distances[v]:
+                continue
+
+            pruned = False
+            for r, dv in labels[v]:
+                if hub_distances[r] + dv <= d:
+                    pruned = True
+                    break
+            if pruned:
+                continue
+
+            labels[v].append((rank, d))
+            for k in range(offsets[v], offsets[v + 1]):
+                w = targets[k]
+                nd = d + weights[k]
+                if nd < distances.get(w, float('inf')):
+                    distances[w] = nd
+                    heappush(heap, (nd, w))
+
+    '''
+    Convierte listas de etiquetas en arreglos CSR (offsets, hubs, distances).
+    '''
+    @staticmethod
+    def _pack(labels):
+        offsets = array('l', [0])
+        hubs = array('l')
+        distances = array('d')
+        for label in labels:
+            for hub, d in label:
+                hubs.append(hub)
+                distances.append(d)
+            offsets.append(len(hubs))
+        return offsets, hubs, distances
+
+    '''
+    Calcula la distancia minima entre 2 vertices mezclando out(start) con
+    in(goal).
+    Entradas:
+        * start: id del vertice de inicio
+        * goal: id del vertice objetivo
+    Salida: Distancia minima, o inf si no existe ruta.
+    '''
+    def distance(self, start, goal):
+        out_offsets, out_hubs, out_distances = self.out_labels
+        in_offsets, in_hubs, in_distances = self.in_labels
+        s = self.index[start]
+        t = self.index[goal]
+
+        i, i_end = out_offsets[s], out_offsets[s + 1]
+        j, j_end = in_offsets[t], in_offsets[t + 1]
+        best = float('inf')
+        while i < i_end and j < j_end:
+            a = out_hubs[i]
+            b = in_hubs[j]
+            if a == b:
+                d = out_distances[i] + in_distances[j]
+                if d < best:
+                    best = d
+                i = i + 1
+                j = j + 1
+            elif a < b:
+                i = i + 1
+            else:
+                j = j + 1
+        return best
+
+    '''
+    Tamaño del indice en bytes (arreglos de ambas etiquetas).
+    '''
+    def memory_usage(self):
+        return sum(values.itemsize * len(values) for values in self.out_labels + self.in_labels)
+
+    '''
+    Numero promedio de hubs por etiqueta.
+    '''
+    def average_label_size(self):
+        n = len(self.ids)
+        return (len(self.out_labels[1]) + len(self.in_labels[1])) / (2 * n) if n else 0.0
+
+    '''
+    Mide la latencia promedio de distance sobre una lista de consultas.
+    Entrada:
+        * pairs: Lista de tuplas (id de inicio, id objetivo)
+    Salida: Segundos promedio por consulta.
+    '''
+    def measure_latency(self, pairs):
+        if not pairs:
+            return 0.0
+        begin = perf_counter()
+        for start, goal in pairs:
+            self.distance(start, goal)
+        return (perf_counter() - begin) / len(pairs)
+
+    '''
+    Guarda las etiquetas en un archivo binario.
+    Entrada:
+        * path: Ruta del archivo
+    '''
+    def save(self, path):
+        arrays = []
+        for prefix, labels in (('out', self.out_labels), ('in', self.in_labels)):
+            for name, values in zip(('offsets', 'hubs', 'distances'), labels):
+                arrays.append((prefix + '_' + name, values))
+        _save_arrays(path, HubLabels.MAGIC, {'ids': self.ids, 'version': self.version}, arrays)
+
+    '''
+    Lee las etiquetas guardadas con save.
+    Entrada:
+        * path: Ruta del archivo
+    Salida: Objeto de la clase HubLabels.
+    Excepciones:
+        * ValueError: Se produce cuando el archivo no contiene etiquetas.
+    '''
+    @staticmethod
+    def load(path):
+        header, arrays = _load_arrays(path, HubLabels.MAGIC)
+        labels = HubLabels()
+        labels.ids = header['ids']
+        labels.index = {node: i for i, node in enumerate(labels.ids)}
+        labels.version = header['version']
+        labels.out_labels = tuple(arrays['out_' + name] for name in ('offsets', 'hubs', 'distances'))
+        labels.in_labels = tuple(arrays['in_' + name] for name in ('offsets', 'hubs', 'distances'))
+        return labels
+
+"""# **Clase Node**
+
+> El uso de esta clase se limita a facilitar la programacion y el manejo de los vertices en el algoritmo A*. Si bien se pudo utilizar la clase Vertex para este objetivo, no es lo mas adecuado, puestoq ue tienen objetivos diferentes, ademas de parametros, algunos similares pero en su mayoria no implmenetados en Vertex por convencion de abstraccion del problema.
+"""
+
+class Node:
+
+    # Sin diccionario por instancia: cada nodo ocupa un tamaño fijo
+    __slots__ = ('name', 'parent', 'g', 'h', 'f')
+
+    # Initialize the class
+    def __init__(self, name, parent):
+        self.name = name
+        self.parent = parent
+        self.g = 0 # Distancia al nodo de inicio
+        self.h = 0 # Distance al nodo objetivo
+        self.f = 0 # Total costo
+
+    # Comparacion de los nodos
+    def __eq__(self, other):
+        return self.name == other.name
+
+    # Ordenamiento de los vertices
+    def __lt__(self, other):
+         return self.f < other.f
+
+    # Impresion de los nodos
+    def __repr__(self):
+        return ('({0},{1})'.format(self.name, self.f))
+
+"""**Clase NodePool**
+
+> Nodos de busqueda guardados en arreglos, con una posicion por nodo en cada arreglo en lugar de un objeto por nodo (unos 100 bytes por nodo). El numero maximo de nodos se fija al crear el pool: los arreglos crecen por bloques a medida que se usan, sin pasar de ese maximo, y las posiciones de los nodos quitados se reutilizan. Los hijos de cada nodo forman una lista doblemente enlazada (`first_child`, `next_sibling`, `previous_sibling`) para poder quitar una hoja en tiempo constante. Lo usa la busqueda con memoria limitada (`TreeSearch.memory_bounded_search`).
+
+*   `vertices`, `parents`, `costs`, `estimates` y `depths`: indice interno del vertice, nodo padre (-1 en la raiz), g(n), f(n) y profundidad.
+*   `cursors`: siguiente arista del vertice por generar como sucesor.
+*   `forgotten`: menor f(n) de los hijos olvidados (inf si no hay).
+*   `stamps`: marca que cambia con cada modificacion del nodo, para descartar entradas obsoletas de los monticulos.
+*   `in_open`: 1 si el nodo esta en la frontera.
+*   `free`: posiciones libres dentro de los arreglos.
+*   `used`: numero de nodos en uso.
+"""
+
+class NodePool:
+
+    __slots__ = ('capacity', 'vertices', 'parents', 'costs', 'estimates', 'depths', 'cursors',
+                 'first_child', 'next_sibling', 'previous_sibling', 'forgotten', 'stamps',
+                 'in_open', 'free', 'used')
+
+    # Posiciones que se agregan a los arreglos cada vez que crecen
+    BLOCK = 1024
+
+    '''
+    Inicializacion
+    Entradas:
+        * capacity: Numero maximo de nodos
+    '''
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.vertices = array('l')
+        self.parents = array('l')
+        self.costs = array('d')
+        self.estimates = array('d')
+        self.depths = array('l')
+        self.cursors = array('l')
+        self.first_child = array('l')
+        self.next_sibling = array('l')
+        self.previous_sibling = array('l')
+        self.forgotten = array('d')
+        self.stamps = array('l')
+        self.in_open = bytearray()
+        self.free = array('l')
+        self.used = 0
+
+    '''
+    Agrega un bloque de posiciones a los arreglos, sin pasar de capacity.
+    Los arreglos se extienden sobre el mismo objeto, por lo que las
+    referencias que guarde la busqueda siguen siendo validas.
+    '''
+    def _grow(self):
+        size = len(self.vertices)
+        count = min(NodePool.BLOCK, self.capacity - size)
+        for name in NodePool.__slots__[1:-3]:
+            values = getattr(self, name)
+            values.extend(array(values.typecode, [0]) * count)
+        self.in_open.extend(bytes(count))
+        # Las posiciones nuevas se entregan en orden ascendente
+        self.free.extend(range(size + count - 1, size - 1, -1))
+
+    '''
+    Agrega un nodo como primer hijo de su padre.
+    Entradas:
+        * vertex: Indice interno del vertice
+        * parent: Nodo padre, o -1 para la raiz
+        * cost: g(n)
+        * estimate: f(n)
+        * depth: Profundidad del nodo
+        * cursor: Primera arista por generar
+    Salida: Posicion del nodo.
+    Excepciones:
+        * IndexError: Se produce cuando el pool esta lleno.
+    '''
+    def allocate(self, vertex, parent, cost, estimate, depth, cursor):
+        if not self.free:
+            if self.used >= self.capacity:
+                raise IndexError('El pool de nodos esta lleno')
+            self._grow()
+        node = self.free.pop()
+        self.used += 1
+        self.vertices[node] = vertex
+        self.parents[node] = parent
+        self.costs[node] = cost
+        self.estimates[node] = estimate
+        self.depths[node] = depth
+        self.cursors[node] = cursor
+        self.first_child[node] = -1
+        self.forgotten[node] = float('inf')
+        self.in_open[node] = 0
+        self.previous_sibling[node] = -1
+        self.next_sibling[node] = -1
+        if parent != -1:
+            sibling = self.first_child[parent]
+            self.next_sibling[node] = sibling
+            if sibling != -1:
+                self.previous_sibling[sibling] = node
+            self.first_child[parent] = node
+        return node
+
+    '''
+    Quita un nodo sin hijos y libera su posicion.
+    '''
+    def release(self, node):
+        parent = self.parents[node]
+        previous, following = self.previous_sibling[node], self.next_sibling[node]
+        if previous != -1:
+            self.next_sibling[previous] = following
+        elif parent != -1:
+            self.first_child[parent] = following
+        if following != -1:
+            self.previous_sibling[following] = previous
+        self.vertices[node] = -1
+        self.in_open[node] = 0
+        self.stamps[node] += 1
+        self.free.append(node)
+        self.used -= 1
+
+    '''
+    Obtiene los vertices desde la raiz hasta un nodo.
+    Salida: Lista con los indices internos de los vertices.
+    '''
+    def path(self, node):
+        path = []
+        while node != -1:
+            path.append(self.vertices[node])
+            node = self.parents[node]
+        return path[::-1]
+
+    '''
+    Memoria en bytes ocupada por los arreglos del pool.
+    '''
+    def memory_usage(self):
+        return sum(getattr(self, name).itemsize * len(getattr(self, name))
+                   for name in NodePool.__slots__[1:-3]) + len(self.in_open) + self.free.itemsize * len(self.free)
+
+"""**Heuristica por id**
+
+> Adaptador que permite usar un diccionario `{id: h(n)}`, como el que devuelve `construct_heristic`, en el nucleo de busqueda, el cual consulta la heuristica por indice interno de la instantanea `FrozenGraph`.
+"""
+
+class _IdHeuristic:
+
+    __slots__ = ('heuristics', 'ids')
+
+    def __init__(self, heuristics, ids):
+        self.heuristics = heuristics
+        self.ids = ids
+
+    def __getitem__(self, i):
+        return self.heuristics.get(self.ids[i])
+
+"""**Heuristica por coordenadas**
+
+> Heuristica que calcula h(n) al consultarla, a partir de las coordenadas del vertice y del objetivo, con las mismas metricas y los mismos valores de `TreeSearch.heuristic_table` pero sin construir una tabla con un valor por vertice. La usa la busqueda con memoria limitada (`TreeSearch.memory_bounded_search`).
+"""
+
+class _CoordinateHeuristic:
+
+    __slots__ = ('metric', 'latitudes', 'longitudes', 'trigonometric', 'goal')
+
+    def __init__(self, frozen, goal, metric):
+        if metric not in ('great_circle', 'euclidean', 'manhattan'):
+            raise ValueError('Metrica de distancia desconocida: ' + str(metric))
+        self.metric = metric
+        self.latitudes = frozen.latitudes
+        self.longitudes = frozen.longitudes
+        self.trigonometric = frozen.trigonometric() if metric == 'great_circle' else None
+        self.goal = goal
+
+    def __getitem__(self, v):
+        goal = self.goal
+        if self.metric == 'great_circle':
+            sin_lats, cos_lats, lngs = self.trigonometric
+            return _great_circle(sin_lats[goal], cos_lats[goal], lngs[goal], sin_lats[v], cos_lats[v], lngs[v])
+        x1, y1 = self.latitudes[v], self.longitudes[v]
+        x2, y2 = self.latitudes[goal], self.longitudes[goal]
+        if self.metric == 'euclidean':
+            return ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
+        return abs(x1 - x2) + abs(y1 - y2)
+
+"""**Potenciales balanceados**
+
+> Potenciales `p(v) = (h_t(v) - h_s(v)) / 2` de A* bidireccional (`TreeSearch.bidirectional_astar`), con `h_t` y `h_s` las heuristicas por coordenadas hacia el objetivo y hacia el inicio. Es un diccionario por indice interno que calcula `p(v)` la primera vez que se consulta un vertice, por lo que una consulta local solo calcula los potenciales de los vertices que toca y no dos tablas de `n` valores. Los valores son los mismos que con `TreeSearch.heuristic_table`.
+"""
+
+class _BalancedPotentials(dict):
+
+    __slots__ = ('to_goal', 'to_start')
+
+    def __init__(self, frozen, start, goal, metric):
+        dict.__init__(self)
+        self.to_goal = _CoordinateHeuristic(frozen, goal, metric)
+        self.to_start = _CoordinateHeuristic(frozen, start, metric)
+
+    def __missing__(self, v):
+        p = self[v] = (self.to_goal[v] - self.to_start[v]) / 2
+        return p
+
+"""# **Clase SearchStats**
+
+> Estadisticas de una consulta de `TreeSearch`. Cada busqueda guarda las suyas en `TreeSearch.last_stats`, y `route` las puede devolver junto con la ruta (`stats = True`):
+
+*   `expanded`: vertices expandidos (sacados de la frontera para recorrer sus vecinos).
+*   `generated`: entradas agregadas a la frontera, incluida la del inicio.
+*   `reopened`: veces que se encontro un camino mejor hacia un vertice que ya estaba en la frontera, por lo que se volvio a agregar. En DFS, vertices que se expandieron de nuevo por otra ruta.
+*   `peak_open`: tamaño maximo de la frontera (cola, pila o monticulo de abiertos, incluidas las entradas obsoletas).
+*   `peak_closed`: tamaño maximo del conjunto de cerrados. En DFS, la longitud maxima de la ruta actual.
+*   `heuristic_evaluations`: consultas a la heuristica o a los potenciales.
+*   `phases`: segundos de cada fase: `heuristic` (construccion de la tabla heuristica o de los potenciales en `route` y `bidirectional_astar`), `setup` (instantanea y arreglos), `search` (ciclo principal), `path` (reconstruccion de la ruta) y `cache` (consulta que `route` respondio desde la cache).
+
+Los contadores se llevan en variables locales del ciclo de busqueda y se copian al objeto una sola vez al terminar, por lo que no agregan accesos a atributos dentro del ciclo.
+"""
+
+class SearchStats:
+
+    __slots__ = ('algorithm', 'expanded', 'generated', 'reopened', 'peak_open',
+                 'peak_closed', 'heuristic_evaluations', 'phases', 'cached')
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.expanded = 0
+        self.generated = 0
+        self.reopened = 0
+        self.peak_open = 0
+        self.peak_closed = 0
+        self.heuristic_evaluations = 0
+        self.phases = {}
+        # Verdadero si route respondio desde la cache sin ejecutar la busqueda
+        self.cached = False
+
+    '''
+    Tiempo total en segundos de todas las fases.
+    '''
+    def elapsed(self):
+        return sum(self.phases.values())
+
+    '''
+    Convierte las estadisticas en un diccionario, por ejemplo para guardarlas
+    en JSON o en un registro.
+    '''
+    def to_dict(self):
+        return {name: getattr(self, name) for name in SearchStats.__slots__}
+
+    def __repr__(self):
+        return ('SearchStats(%s, expanded=%d, generated=%d, reopened=%d, peak_open=%d, '
+                'peak_closed=%d, heuristic_evaluations=%d, elapsed=%.6f)' % (
+                    self.algorithm, self.expanded, self.generated, self.reopened,
+                    self.peak_open, self.peak_closed, self.heuristic_evaluations,
+                    self.elapsed()))
+
+"""# **Clase TreeSearch**
+
+En esta clase se dan todos los metodos de busqueda y recorrido del grafo, incluyendo la busqueda no informada e informada.
+
+> *   BFS `(bfs_shortest_path)`: Busqueda por anchura. Este tipo de busqueda utiliza una cola para guardar los vecinos de un nodo.
+*   DFS `(dfs_paths)`: Busqueda por profundidad. Este algoritmo utiliza una pila para almacenar todos los nodos adyacentes de los nodos que ha visitado
+*   UCS `(ucs)`: Busqueda por costo unitario. Algoritmo similar a bfs, pero evalua los costos a traves de una cola de prioridades.
+*   A* `(astar_search)`: Algoritmod e busqueda informada, el cual tiene en cuenta el costo unitario de un vertice con sus adyacentes, ademas de un costo heristico calculado
+*   SMA* `(memory_bounded_search)`: A* con memoria limitada. Guarda a lo mas `max_search_nodes` nodos de busqueda en arreglos (`NodePool`) y, cuando se llenan, olvida las hojas con mayor f(n) y las vuelve a generar si hace falta, para grafos en los que la frontera de A* no cabe en memoria.
+
+Para el calculo heuristico `(construct_heristic)` se midio como la distancia en linea recta desde la estacion AV. Jimenez a las demas estaciones (Distancia total). Esta medicion se hace con la funcion `great_circle_distance` (usada por `Station.distance`), con el algoritmo del gran circulo, el cual toma en cuenta que la tierra es totalmente esferica, con un radio de 6371.009 Km (`EARTH_RADIUS`) y dando resultados con un error del 0.5% aproximadamente.
+
+La heuristica se puede construir hacia cualquier estacion objetivo con `heuristic_table`, la cual calcula la misma distancia del gran circulo directamente sobre los arreglos de coordenadas de `FrozenGraph` y guarda las tablas por objetivo en una cache LRU.
+
+Aun asi, se puede utilizar cualquier medicion tomando las coordenadas (longitud y latitud) por cada estacion, como la euclidiana o la distancia de manhattan para dicho proposito. El principal problema es que este tipo de distancias no tienen en cuenta la curvatura del arco, haciendola mas ineficiente para distancias en lugares de la tierra. Para el anterior trabajo esta el metodo `heristic`, el cual, dado 2 coordenadas, devuel ve las mediciones deseadas. Esta funcion se puede usar como complemento para medir todas las distancias, reemplazando a el algoritmo del gran circulo de `great_circle_distance`.
+
+> Si desea utilizar otro algoritmo de medicion de distancia, basta con cambiar `great_circle_distance` (y `_great_circle`, la formula que comparten todas las distancias del modulo) o pasar la metrica `euclidean` o `manhattan` a `heuristic_table` y `route`.
+"""
+
+class TreeSearch:
+
+    # Algoritmos de route cuyo resultado depende de la metrica
+    METRIC_ALGORITHMS = ('astar', 'greedy', 'sma')
+    # Numero maximo de nodos en memoria por defecto de memory_bounded_search
+    MAX_SEARCH_NODES = 100000
+
+    '''
+    Inicializacion
+    Entradas:
+        *graph: variable la cual puede tomar forma de objeto de la clase Graph,
+        de la clase FrozenGraph u objeto de la clase dict, dependiendo del
+        algoritmo a ejecutar debe de cambiarse.
+        *heuristic_cache_size: Numero maximo de tablas heuristicas (una por
+        nodo objetivo) que se guardan en memoria.
+        *route_cache_size: Numero maximo de rutas guardadas por route.
+        *route_cache_ttl: Segundos de vigencia de cada ruta guardada por route.
+        None indica que las rutas no expiran por tiempo.
+    Atributos:
+        *last_stats: Objeto de la clase SearchStats de la ultima busqueda
+        (BFS, DFS, UCS, A*, Dijkstra, voraz, bidireccional o SMA*).
+        *last_expanded: Numero de vertices expandidos por la ultima busqueda.
+        *last_peak_frontier: Tamaño maximo que alcanzo la frontera (cola,
+        pila o monticulo de abiertos) durante la ultima busqueda.
+        *on_expand: Funcion opcional on_expand(id, g) que se llama al expandir
+        cada vertice, con su costo acumulado (None en BFS).
+        *on_relax: Funcion opcional on_relax(frm, to, g) que se llama cada vez
+        que se agrega un vertice a la frontera desde el vertice frm.
+        *on_goal: Funcion opcional on_goal(id, g) que se llama al llegar al
+        objetivo.
+        *max_search_nodes: Numero maximo de nodos que memory_bounded_search
+        (y route con el algoritmo sma) guarda en memoria.
+        Cuando una funcion es None la busqueda solo compara una variable local
+        con None por vertice o arista, sin llamadas adicionales.
+    Excepciones:
+        *TypeError: Se produce cuando la variable graph tiene un valor None.
+    '''
+    def __init__(self, graph, heuristic_cache_size = 64, route_cache_size = 1024, route_cache_ttl = None):
+        if graph is not None:
+            self.graph = graph
+            self.weights = []
+            self.heuristic_cache = OrderedDict()
+            self.heuristic_cache_size = heuristic_cache_size
+            self.all_pairs = None
+            self.landmarks = None
+            self.contraction = None
+            self.hub_labels = None
+            self.line_graph = None
+            self.route_cache = RouteCache(route_cache_size, route_cache_ttl)
+            self.last_stats = None
+            self.last_expanded = 0
+            self.last_peak_frontier = 0
+            self.on_expand = None
+            self.on_relax = None
+            self.on_goal = None
+            self.max_search_nodes = TreeSearch.MAX_SEARCH_NODES
+        else:
+            raise TypeError('El grafo tiene un valor de instancia incorrecto: None')
+
+    #Algoritmos de busqueda no informada
+    '''
+    Algoritmo BFS
+    Entradas:
+        - start: Nodo de entrada de la clase Vertex
+        - goal: Nodo objetivo de la clase Vertex
+    *Salidas: Lista con la ruta optima encontrada por este algoritmo. Cada indice
+    es el id del nodo que pertenece a aquel camino optimo.
+    *Excepciones:
+        * TypeError: Esta excepcion ocurre cuando el campo de la presente clase graph
+        no es la instancia de la clase Graph, sino una matriz o un diccionario.
+    '''
+    def bfs_shortest_path(self, start, goal):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        if start == goal:
+            return "El objetivo es el mismo que el inicio."
+
+        stats = self._start_stats('bfs')
+        began = perf_counter()
+        frozen = self._freeze(self.graph)
+        offsets, targets, ids = frozen.offsets, frozen.targets, frozen.ids
+        source = frozen.index[start]
+        target = frozen.index[goal]
+        on_expand, on_relax, on_goal = self.on_expand, self.on_relax, self.on_goal
+
+        # Predecesor de cada nodo descubierto (-1 si no ha sido descubierto).
+        # Un nodo se encola una sola vez, la primera vez que se descubre.
+        parents = [-1] * frozen.num_vertices
+        parents[source] = source
+        queue = deque([source])
+        expanded = 0
+        generated = 1
+        peak = 1
+        found = False
+        searching = perf_counter()
+
+        while queue:
+
+            if len(queue) > peak:
+                peak = len(queue)
+            node = queue.popleft()
+            expanded = expanded + 1
+            if on_expand is not None:
+                on_expand(ids[node], None)
+
+            for k in range(offsets[node], offsets[node + 1]):
+                neighbour = targets[k]
+                if parents[neighbour] != -1:
+                    continue
+                parents[neighbour] = node
+                generated = generated + 1
+                if on_relax is not None:
+                    on_relax(ids[node], ids[neighbour], None)
+
+                if neighbour == target:
+                    found = True
+                    break
+
+                queue.append(neighbour)
+
+            if found:
+                break
+
+        # En BFS un vertice se cierra al descubrirlo, una sola vez
+        self._finish_stats(stats, began, searching, expanded, generated, 0, peak, generated, 0)
+        if not found:
+            return "No hay conexion entre el nodo de inicio y el objetivo."
+        if on_goal is not None:
+            on_goal(goal, None)
+        return self._build_path(frozen, parents, target)
+
+    '''
+    Algoritmo DFS
+        - start: id del Nodo de entrada
+        - goal: id del Nodo de salida
+    Salida: Lista con la ruta optima encontrada por este algoritmo. Cada indice
+    es el id del nodo que pertenece a aquel camino optimo.
+    Excepciones:
+        *TypeError: Se produce cuando el campo graph de la presente clase no 
+        es una instacia de la clase dict o de la clase FrozenGraph.
+    '''
+    def dfs_paths(self, start, goal):
+        if(isinstance(self.graph, Graph)):
+            raise TypeError('El grafo no es instancia de un diccionario.')
+
+        return self._dfs_paths(self.graph, start, goal)
+
+    '''
+    Implementacion de DFS sobre un diccionario {id: [vecinos...]} o sobre un
+    objeto de la clase FrozenGraph.
+    '''
+    def _dfs_paths(self, graph, start, goal):
+        if isinstance(graph, FrozenGraph):
+            frozen = graph
+            graph = lambda vertex: [frozen.ids[frozen.targets[k]] for k in frozen.edges(frozen.index[vertex])]
+        else:
+            graph = graph.__getitem__
+
+        stats = self._start_stats('dfs')
+        began = perf_counter()
+        on_expand, on_relax, on_goal = self.on_expand, self.on_relax, self.on_goal
+        stack = [(start, [start])]
+        expanded = 0
+        generated = 1
+        peak = 1
+        longest = 1
+        seen = set()
+        searching = perf_counter()
+        while stack:
+            if len(stack) > peak:
+                peak = len(stack)
+            (vertex, path) = stack.pop()
+            expanded = expanded + 1
+            seen.add(vertex)
+            if len(path) > longest:
+                longest = len(path)
+            if on_expand is not None:
+                on_expand(vertex, len(path) - 1)
+            for next in set(graph(vertex)) - set(path):
+                generated = generated + 1
+                if on_relax is not None:
+                    on_relax(vertex, next, len(path))
+                if next == goal:
+                    self._finish_stats(stats, began, searching, expanded, generated,
+                                       expanded - len(seen), peak, longest, 0)
+                    if on_goal is not None:
+                        on_goal(next, len(path))
+                    return path + [next]
+                else:
+                    stack.append((next, path + [next]))
+
+        self._finish_stats(stats, began, searching, expanded, generated,
+                           expanded - len(seen), peak, longest, 0)
+
+    '''
+    Algoritmo UCS
+    Entradas:
+        - start: Nodo de entrada de la clase Vertex, o su id
+        - goal: Nodo objetivo de la clase Vertex, o su id
+    -Salidas: Lista con la ruta optima encontrada por este algoritmo. Cada indice
+    es el id del nodo que pertenece a aquel camino optimo.
+    -Excepciones:
+        * TypeError: Esta excepcion ocurre cuando el campo de la presente clase graph
+        no es la instancia de la clase Graph, sino una matriz o un diccionario.
+    '''
+    def ucs(self, start, goal):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        if isinstance(start, Vertex):
+            start = start.get_id()
+        if isinstance(goal, Vertex):
+            goal = goal.get_id()
+
+        # UCS es Dijkstra sin heuristica: se reutiliza el nucleo de mejor primero
+        result = self._best_first_search(self.graph, None, start, goal)
+        self.last_stats.algorithm = 'ucs'
+        if result is None:
+            return None
+
+        frozen, parents, costs = result
+        return self._build_path(frozen, parents, frozen.index[goal])
+
+    '''
+    Reconstruye una ruta a partir de un arreglo de predecesores.
+    Entradas:
+        - frozen: Objeto de la clase FrozenGraph sobre el cual se hizo la busqueda
+        - parents: Lista de predecesores por indice interno. El nodo de inicio
+        es su propio predecesor.
+        - goal: Indice interno del nodo final de la ruta
+    Salida: Lista con los ids de la ruta desde el inicio hasta goal.
+    '''
+    def _build_path(self, frozen, parents, goal):
+        began = perf_counter()
+        ids = frozen.ids
+        path = [ids[goal]]
+        node = goal
+        while parents[node] != node:
+            node = parents[node]
+            path.append(ids[node])
+        if self.last_stats is not None:
+            self.last_stats.phases['path'] = perf_counter() - began
+        return path[::-1]
+
+    '''
+    Crea las estadisticas de una nueva busqueda y las deja en last_stats.
+    '''
+    def _start_stats(self, algorithm):
+        stats = SearchStats(algorithm)
+        self.last_stats = stats
+        return stats
+
+    '''
+    Copia los contadores de una busqueda a sus estadisticas y registra el
+    tiempo de las fases setup (desde began hasta searching) y search (desde
+    searching hasta ahora).
+    '''
+    def _finish_stats(self, stats, began, searching, expanded, generated, reopened,
+                      peak_open, peak_closed, heuristic_evaluations):
+        stats.phases['setup'] = searching - began
+        stats.phases['search'] = perf_counter() - searching
+        stats.expanded = expanded
+        stats.generated = generated
+        stats.reopened = reopened
+        stats.peak_open = peak_open
+        stats.peak_closed = peak_closed
+        stats.heuristic_evaluations = heuristic_evaluations
+        self.last_expanded = expanded
+        self.last_peak_frontier = peak_open
+
+    '''
+    Obtiene la instantanea CSR de un grafo. Si el grafo ya es un objeto de la
+    clase FrozenGraph se retorna el mismo objeto.
+    '''
+    def _freeze(self, graph):
+        if isinstance(graph, FrozenGraph):
+            return graph
+        return graph.freeze()
+
+    '''
+    Precalcula la tabla de rutas mas cortas entre todos los pares de vertices
+    del grafo (ver AllPairsTable). Si la tabla supera el limite de memoria no
+    se construye y las consultas de shortest_route se resuelven bajo demanda.
+    Entradas:
+        - max_bytes: Memoria maxima permitida para la tabla
+    Salida: Verdadero si la tabla fue construida, falso en caso contrario.
+    '''
+    def precompute_all_pairs(self, max_bytes = AllPairsTable.DEFAULT_MAX_BYTES):
+        try:
+            self.all_pairs = AllPairsTable(self.graph, max_bytes)
+        except MemoryError:
+            self.all_pairs = None
+        return self.all_pairs is not None
+
+    '''
+    Obtiene el costo y la ruta mas corta entre 2 vertices. Utiliza la tabla de
+    todos los pares si fue precalculada y corresponde a la instantanea actual
+    del grafo; en caso contrario ejecuta Dijkstra bajo demanda.
+    Entradas:
+        - start: id del vertice de inicio
+        - goal: id del vertice objetivo
+    Salida: Tupla (costo, lista de ids de la ruta), o None si no existe ruta.
+    '''
+    def shortest_route(self, start, goal):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        table = self.all_pairs
+        if table is not None and table.frozen is not self._freeze(self.graph):
+            self.repair()
+        if table is not None and table.frozen is self._freeze(self.graph):
+            path = table.path(start, goal)
+            if path is None:
+                return None
+            return table.distance(start, goal), path
+
+        result = self._best_first_search(self.graph, None, start, goal)
+        if result is None:
+            return None
+        frozen, parents, costs = result
+        target = frozen.index[goal]
+        return costs[target], self._build_path(frozen, parents, target)
+
+    '''
+    Calcula las k rutas mas cortas sin ciclos entre 2 vertices (algoritmo de
+    Yen), es decir, la ruta optima y las mejores rutas alternativas.
+    Cada ruta alternativa se obtiene desviandose de una ruta ya encontrada en
+    un vertice de desvio (spur): se conserva el tramo anterior (raiz), se
+    prohiben los vertices de la raiz y las aristas que usan las rutas ya
+    encontradas con la misma raiz, y se busca el tramo restante. En lugar de
+    repetir busquedas completas:
+        * Se calcula una sola vez el arbol de rutas mas cortas hacia goal sobre
+        el grafo invertido. Su distancia es una cota inferior exacta del tramo
+        restante y se usa como heuristica de A* en cada desvio.
+        * Si la ruta del arbol desde el vertice de desvio no toca ningun
+        vertice ni arista prohibida, es el tramo optimo y no se busca nada.
+        * Un desvio cuya cota inferior ya supera la peor de las rutas
+        candidatas que todavia pueden quedar entre las k mejores se descarta, y
+        las busquedas A* se cortan en esa misma cota.
+    Entradas:
+        - start: id del vertice de inicio
+        - goal: id del vertice objetivo
+        - k: Numero maximo de rutas
+    Salida: Lista de hasta k tuplas (costo, lista de ids de la ruta) ordenadas
+    por costo. Lista vacia si no existe ruta.
+    Excepciones:
+        * TypeError: Se produce cuando el grafo es un diccionario.
+    '''
+    def k_shortest_paths(self, start, goal, k = 3):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        began = perf_counter()
+        stats = self._start_stats('yen')
+        frozen = self._freeze(self.graph)
+        ids, offsets, targets, weights = frozen.ids, frozen.offsets, frozen.targets, frozen.weights
+        source, target = frozen.index[start], frozen.index[goal]
+
+        # Arbol hacia goal: distancia restante y siguiente vertice de la ruta
+        to_goal, next_hop, order = frozen.reverse().shortest_path_tree(target)
+        searching = perf_counter()
+        if to_goal[source] == float('inf') or k < 1:
+            self._finish_stats(stats, began, searching, len(order), 0, 0, 0, 0, 0)
+            return []
+
+        def tree_path(v):
+            path = [v]
+            while v != target:
+                v = next_hop[v]
+                path.append(v)
+            return path
+
+        paths = [(to_goal[source], tree_path(source))]
+        candidates = []
+        seen = set([tuple(paths[0][1])])
+        blocked = bytearray(frozen.num_vertices)
+        expanded = generated = peak_open = 0
+
+        while len(paths) < k:
+            last = paths[-1][1]
+            root_cost = 0.0
+            for i in range(len(last) - 1):
+                spur = last[i]
+                if i > 0:
+                    blocked[last[i - 1]] = 1
+                    u = last[i - 1]
+                    root_cost = root_cost + min(weights[e] for e in range(offsets[u], offsets[u + 1])
+                                                if targets[e] == spur)
+
+                # Peor costo que todavia puede entrar entre las k rutas
+                bound = float('inf')
+                missing = k - len(paths)
+                if len(candidates) >= missing:
+                    bound = nsmallest(missing, candidates)[-1][0]
+                if root_cost + to_goal[spur] > bound:
+                    continue
+
+                root = last[:i + 1]
+                banned = set(path[i + 1] for cost, path in paths if path[:i + 1] == root)
+
+                spur_path = tree_path(spur)
+                if spur_path[1] in banned or any(blocked[v] for v in spur_path):
+                    spur_path = None
+                    parents = {spur: spur}
+                    costs = {spur: 0.0}
+                    heap = [(to_goal[spur], 0.0, spur)]
+                    closed = set()
+                    limit = bound - root_cost
+                    while heap:
+                        if len(heap) > peak_open:
+                            peak_open = len(heap)
+                        f, d, u = heappop(heap)
+                        if f > limit:
+                            break
+                        if u in closed:
+                            continue
+                        if u == target:
+                            spur_path = [u]
+                            while parents[u] != u:
+                                u = parents[u]
+                                spur_path.append(u)
+                            spur_path.reverse()
+                            break
+                        closed.add(u)
+                        expanded = expanded + 1
+                        for e in range(offsets[u], offsets[u + 1]):
+                            v = targets[e]
+                            if blocked[v] or (u == spur and v in banned):
+                                continue
+                            nd = d + weights[e]
+                            if nd < costs.get(v, float('inf')) and to_goal[v] != float('inf'):
+                                costs[v] = nd
+                                parents[v] = u
+                                generated = generated + 1
+                                heappush(heap, (nd + to_goal[v], nd, v))
+                    if spur_path is None:
+                        continue
+                    spur_cost = costs[target]
+                else:
+                    spur_cost = to_goal[spur]
+
+                path = root[:-1] + spur_path
+                key = tuple(path)
+                if key not in seen:
+                    seen.add(key)
+                    heappush(candidates, (root_cost + spur_cost, path))
+
+            for v in last:
+                blocked[v] = 0
+            if not candidates:
+                break
+            paths.append(heappop(candidates))
+
+        self._finish_stats(stats, began, searching, len(order) + expanded, generated, 0, peak_open, 0, 0)
+        return [(cost, [ids[v] for v in path]) for cost, path in paths]
+
+    '''
+    Construye el grafo de lineas: un arco por cada arista del grafo y cada
+    linea que la recorre (o un arco de la conexion None si ninguna linea la
+    recorre), mas un arco por cada tramo de una linea entre 2 estaciones que
+    no son vecinas en el grafo (servicios expresos), con la distancia de la
+    ruta mas corta entre ellas. Se guarda en el atributo line_graph y se
+    reutiliza mientras no cambien la instantanea del grafo ni las lineas.
+    Entradas:
+        - frozen: Objeto de la clase FrozenGraph
+        - lines: Diccionario {linea: lista de secuencias de ids de estaciones}
+        (ver Timetable.load_lines)
+    Salida: Tupla (nombres de las lineas, offsets, targets, weights, lines)
+    con los arcos en formato CSR. La ultima linea es la conexion None.
+    '''
+    def _line_graph(self, frozen, lines):
+        if self.line_graph is not None and self.line_graph[0] is frozen and self.line_graph[1] is lines:
+            return self.line_graph[2]
+
+        names = list(lines) + [None]
+        walk = len(names) - 1
+        index = frozen.index
+        pair_lines = {}
+        for line, name in enumerate(names[:-1]):
+            for sequence in lines[name]:
+                for a, b in zip(sequence, sequence[1:]):
+                    pair_lines.setdefault((index[a], index[b]), []).append(line)
+
+        arcs = [[] for _ in range(frozen.num_vertices)]
+        for u in range(frozen.num_vertices):
+            neighbors = {}
+            for k in frozen.edges(u):
+                v = frozen.targets[k]
+                neighbors[v] = min(neighbors.get(v, float('inf')), frozen.weights[k])
+            for v, weight in neighbors.items():
+                for line in pair_lines.get((u, v), (walk,)):
+                    arcs[u].append((v, weight, line))
+        for (u, v), line_ids in pair_lines.items():
+            if v not in set(frozen.targets[k] for k in frozen.edges(u)):
+                weight = frozen.shortest_path_tree(u, (v,))[0][v]
+                for line in line_ids:
+                    arcs[u].append((v, weight, line))
+
+        offsets = array('l', [0])
+        targets = array('l')
+        weights = array('d')
+        arc_lines = array('l')
+        for u_arcs in arcs:
+            for v, weight, line in u_arcs:
+                targets.append(v)
+                weights.append(weight)
+                arc_lines.append(line)
+            offsets.append(len(targets))
+
+        result = (names, offsets, targets, weights, arc_lines)
+        self.line_graph = (frozen, lines, result)
+        return result
+
+    '''
+    Calcula el frente de Pareto de rutas entre 2 vertices con 2 criterios:
+    la distancia y el numero de transbordos (cambios de linea). Cada ruta del
+    frente es la mas corta entre las que tienen a lo sumo su numero de
+    transbordos.
+    Es una busqueda de multiples etiquetas (Martins): cada vertice guarda
+    varias etiquetas (distancia, transbordos, linea actual) y se expanden en
+    orden lexicografico (distancia, transbordos). Para que el numero de
+    etiquetas no crezca:
+        * Una etiqueta se descarta si otra del mismo vertice la domina: tiene
+        menor o igual distancia y menos o igual transbordos, contando un
+        transbordo adicional si esta en otra linea.
+        * Una etiqueta se descarta si una ruta ya encontrada hasta goal la
+        domina aun sumandole la distancia minima que le falta, que se obtiene
+        del arbol de rutas mas cortas hacia goal.
+        * No se crean etiquetas con mas de max_transfers transbordos.
+    Las etiquetas se guardan en arreglos (distancia, transbordos, vertice,
+    arco y etiqueta anterior), sin un objeto por etiqueta.
+    Entradas:
+        - start: id del vertice de inicio
+        - goal: id del vertice objetivo
+        - lines: Diccionario {linea: lista de secuencias de ids de estaciones}.
+        Por defecto las lineas de la carpeta data (ver Timetable.load_lines).
+        Las aristas que no recorre ninguna linea se pueden usar como una
+        conexion sin linea (None).
+        - max_transfers: Numero maximo de transbordos
+        - max_labels: Numero maximo de etiquetas creadas
+    Salida: Lista de tuplas (distancia, transbordos, lista de ids de la ruta,
+    lista de tramos (linea, id de inicio, id de fin)) ordenada por distancia.
+    Lista vacia si no existe ruta.
+    Excepciones:
+        * TypeError: Se produce cuando el grafo es un diccionario.
+        * MemoryError: Se produce cuando se crean mas de max_labels etiquetas.
+    '''
+    def pareto_routes(self, start, goal, lines = None, max_transfers = 4, max_labels = 1000000):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        began = perf_counter()
+        stats = self._start_stats('pareto')
+        frozen = self._freeze(self.graph)
+        if lines is None:
+            if self.line_graph is None:
+                lines = Timetable.load_lines()
+            else:
+                lines = self.line_graph[1]
+        names, offsets, targets, weights, arc_lines = self._line_graph(frozen, lines)
+        source, target = frozen.index[start], frozen.index[goal]
+        to_goal = frozen.reverse().shortest_path_tree(target)[0]
+        searching = perf_counter()
+
+        # Etiquetas en arreglos; la etiqueta 0 es el inicio (sin linea)
+        distances = array('d', [0.0])
+        transfers = array('l', [0])
+        vertices = array('l', [source])
+        arcs = array('l', [-1])
+        previous = array('l', [-1])
+        dead = bytearray(1)
+        bags = {source: [0]}
+        # Las distancias que difieren en menos de un micrometro (por el orden
+        # de las sumas, por ejemplo en los arcos expresos) se consideran iguales
+        tolerance = 1e-6
+        front = []
+        heap = [(0.0, 0, 0)]
+        expanded = generated = peak_open = 0
+
+        while heap:
+            if len(heap) > peak_open:
+                peak_open = len(heap)
+            d, t, label = heappop(heap)
+            if dead[label]:
+                continue
+            u = vertices[label]
+            lower = d + to_goal[u] + tolerance
+            if any(distances[j] <= lower and transfers[j] <= t for j in front):
+                continue
+            if u == target:
+                front.append(label)
+                continue
+
+            expanded = expanded + 1
+            line = arc_lines[arcs[label]] if label else -1
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                nd = d + weights[k]
+                new_line = arc_lines[k]
+                nt = t + 1 if line != -1 and new_line != line else t
+                if nt > max_transfers or to_goal[v] == float('inf'):
+                    continue
+
+                # Poda con las rutas ya encontradas hasta goal
+                lower = nd + to_goal[v] + tolerance
+                if any(distances[j] <= lower and transfers[j] <= nt for j in front):
+                    continue
+
+                # Dominancia entre las etiquetas del vertice v
+                bag = bags.get(v)
+                if bag is not None:
+                    dominated = False
+                    for j in bag:
+                        j_line = arc_lines[arcs[j]] if j else -1
+                        extra = 0 if j_line == new_line or j_line == -1 else 1
+                        if distances[j] <= nd + tolerance and transfers[j] + extra <= nt:
+                            dominated = True
+                            break
+                    if dominated:
+                        continue
+                    for j in bag:
+                        j_line = arc_lines[arcs[j]] if j else -1
+                        extra = 0 if j_line == new_line else 1
+                        if nd <= distances[j] + tolerance and nt + extra <= transfers[j]:
+                            dead[j] = 1
+                    bag = [j for j in bag if not dead[j]]
+                else:
+                    bag = []
+
+                new = len(distances)
+                if new >= max_labels:
+                    raise MemoryError('La busqueda supero el limite de ' + str(max_labels) + ' etiquetas')
+                distances.append(nd)
+                transfers.append(nt)
+                vertices.append(v)
+                arcs.append(k)
+                previous.append(label)
+                dead.append(0)
+                bag.append(new)
+                bags[v] = bag
+                generated = generated + 1
+                heappush(heap, (nd, nt, new))
+
+        self._finish_stats(stats, began, searching, expanded, generated, 0, peak_open, len(distances), 0)
+
+        # Una ruta de igual distancia y mas transbordos puede salir antes del
+        # monticulo por la tolerancia; se descarta al final
+        front = [label for label in front
+                 if not any(distances[j] <= distances[label] + tolerance and transfers[j] < transfers[label]
+                            for j in front)]
+
+        ids = frozen.ids
+        routes = []
+        for label in front:
+            path = []
+            legs = []
+            j = label
+            while j:
+                k = arcs[j]
+                name = names[arc_lines[k]]
+                frm, to = ids[vertices[previous[j]]], ids[vertices[j]]
+                if legs and legs[-1][0] == name:
+                    legs[-1] = (name, frm, legs[-1][2])
+                else:
+                    legs.append((name, frm, to))
+                path.append(to)
+                j = previous[j]
+            path.append(start)
+            path.reverse()
+            legs.reverse()
+            routes.append((distances[label], transfers[label], path, legs))
+        return routes
+
+    '''
+    Calcula la matriz origen-destino entre un conjunto de origenes y un
+    conjunto de destinos. Se ejecuta un solo arbol de rutas mas cortas por
+    origen, el cual se detiene en cuanto todos los destinos pedidos han sido
+    cerrados, y todas las consultas de ese origen se responden desde el arbol.
+    Entradas:
+        - sources: Lista de ids de los vertices de origen
+        - targets: Lista de ids de los vertices de destino
+        - algorithm: dijkstra o ucs (costo por distancia) o bfs (numero de
+        saltos)
+    Salida: Objeto de la clase RouteMatrix.
+    Excepciones:
+        * TypeError: Se produce cuando el grafo es un diccionario.
+        * ValueError: Se produce cuando el algoritmo no existe.
+    '''
+    def route_matrix(self, sources, targets, algorithm = 'dijkstra'):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        frozen = self._freeze(self.graph)
+        if algorithm in ('dijkstra', 'ucs'):
+            tree = frozen.shortest_path_tree
+        elif algorithm == 'bfs':
+            tree = frozen.breadth_first_tree
+        else:
+            raise ValueError('Algoritmo de busqueda desconocido: ' + str(algorithm))
+
+        matrix = RouteMatrix(frozen, sources, targets, algorithm)
+        target_indices = matrix.target_indices
+        columns = len(target_indices)
+
+        for row, source in enumerate(matrix.source_indices):
+            distances, parents, order = tree(source, target_indices)
+            matrix.costs[row * columns:(row + 1) * columns] = array('d', [distances[t] for t in target_indices])
+            matrix.parents[row] = parents
+
+        return matrix
+
+    '''
+    Calcula la matriz origen-destino repartiendo los origenes entre un pool
+    de procesos. El grafo se comparte con los procesos a traves de un segmento
+    de memoria compartida (ver SharedGraph) y cada proceso escribe sus filas
+    directamente en una matriz de salida tambien compartida. Las rutas de la
+    matriz resultante se calculan bajo demanda al pedirlas con path.
+    Entradas:
+        - sources: Lista de ids de los vertices de origen
+        - targets: Lista de ids de los vertices de destino
+        - algorithm: dijkstra, ucs o bfs
+        - workers: Numero de procesos. Por defecto el numero de nucleos.
+        - chunksize: Numero de origenes por tarea. Por defecto se reparten los
+        origenes en unas 4 tareas por proceso.
+    Salida: Objeto de la clase RouteMatrix.
+    Excepciones:
+        * TypeError: Se produce cuando el grafo es un diccionario.
+        * ValueError: Se produce cuando el algoritmo no existe.
+    '''
+    def parallel_route_matrix(self, sources, targets, algorithm = 'dijkstra', workers = None, chunksize = None):
+        from multiprocessing import Pool, cpu_count
+        from multiprocessing.shared_memory import SharedMemory
+
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+        if algorithm not in ('dijkstra', 'ucs', 'bfs'):
+            raise ValueError('Algoritmo de busqueda desconocido: ' + str(algorithm))
+
+        frozen = self._freeze(self.graph)
+        matrix = RouteMatrix(frozen, sources, targets, algorithm)
+        rows = list(enumerate(matrix.source_indices))
+        size = len(matrix.costs)
+        # Sin origenes o sin destinos la matriz esta vacia y no hay segmento
+        # de salida que compartir
+        if size == 0:
+            return matrix
+        if workers is None:
+            workers = cpu_count()
+        if chunksize is None:
+            chunksize = max(1, len(rows) // (4 * workers))
+        chunks = [rows[i:i + chunksize] for i in range(0, len(rows), chunksize)]
+
+        shared = SharedGraph(frozen)
+        output = SharedMemory(create = True, size = 8 * size)
+        try:
+            initargs = (shared.name, shared.num_vertices, shared.num_edges,
+                        output.name, matrix.target_indices, algorithm)
+            with Pool(workers, _attach_route_matrix_worker, initargs) as pool:
+                for _ in pool.imap_unordered(_route_matrix_rows, chunks):
+                    pass
+                # Los procesos terminan normalmente para cerrar los segmentos
+                pool.close()
+                pool.join()
+            matrix.costs = array('d', bytes(output.buf[:8 * size]))
+        finally:
+            output.close()
+            output.unlink()
+            shared.close()
+
+        return matrix
+
+    #Algoritmos de busqueda informada
+    '''
+    Metodo alternativo para la medicion de la heuristica
+    Entradas: 
+        - graph: objeto de la clase Graph
+        - a: Id de un nodo
+        - b: id de un nodo
+        - method: Indica la metrica de medicion de distancia. Euclidean o 
+        manhattan
+    Salida: Numero el cual indica la distancia dado 2 puntos o coordenadas de 2
+    lugares.
+    '''
+    def heuristic(self, graph, a, b, method = 'euclidean'):
+        #Se obitnene los vertices dado el id del vertice
+        node_a = graph.get_vertex(a)
+        node_b = graph.get_vertex(b)
+
+        #Se extraen las coordenadas
+        (x1, y1) = node_a.get_coordinates()
+        (x2, y2) = node_b.get_coordinates()
+        if method == 'euclidean':
+            return ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
+        elif method == 'manhattan':
+            return abs(x1 - x2) + abs(y1 - y2)
+
+    '''
+    Algoritmo A* - Dijkstra - Algoritmo Voraz
+        * Sera A* cuando exista g(n) y h(n), y estos sean mayores a 0
+        * Cuando h(n) = 0 entonces este algoritmo es Dijkstra
+        * Cuando g(n) = 0 entonces este algoritmo es un algoritmo voraz
+    Entradas:
+        - graph: El objeto de la clase Graph o FrozenGraph
+        - heuristics: Diccionario con la distancia total entre un punto de 
+        destino y final, o la tabla obtenida con heuristic_table.
+        - start: id del nodo de inicio
+        - end: id del vertice el cual es el final del recorrido
+        - gn: Booleano el cual indica si activar o no g(n). 
+        Si esta desactivado este algoritmo pasa a ser Dijkstra.
+    Salida: Lista con la ruta optima encontrada por este algoritmo. Cada indice
+    es el id del nodo que pertenece a aquel camino optimo.
+    Excepciones:
+        * TypeError: Se produce cuando el campo de esta clase graph no es un 
+        objeto de la instancia de la clase Graph, o cuando la variable gn es 
+        falsa al mismo tiempo que heuristics es None.
+    '''
+
+    def astar_search(self, graph, heuristics, start, end, gn = True):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        if gn is False and heuristics is None:
+            raise TypeError('El parametro gn no puede ser falso al mismo tiempo que heuristics es None')
+
+        result = self._best_first_search(graph, heuristics, start, end, gn)
+
+        # Retorna None si no se encontro ruta optima
+        if result is None:
+            return None
+
+        # Reconstruir la ruta desde el nodo final usando los predecesores
+        began = perf_counter()
+        frozen, parents, costs = result
+        ids = frozen.ids
+        path = []
+        current = frozen.index[end]
+        while True:
+            # Los costos nulos se muestran como 0, igual que antes de guardarlos
+            # en un arreglo de flotantes
+            cost = costs[current]
+            path.append(str(ids[current]) + ': ' + str(cost if cost else 0))
+            if parents[current] == current:
+                break
+            current = parents[current]
+        self.last_stats.phases['path'] = perf_counter() - began
+
+        # Retornar la lista en reversa.
+        return path[::-1]
+
+    '''
+    Metodo que verifica si un vecino debe de ser agregado a la lista de vertices
+    abiertos. Funcion utilizada por la implementacion original de A* con
+    listas de objetos Node; astar_search ya no la usa, pero se conserva para
+    quien la llame directamente.
+
+    Entradas:
+        * open: Lista de vertices abiertos
+        * neighbor: Vertice vecino a evaluar
+    Salidas: Retorna verdadero si se cumplen las indicaciones para que el vertice
+    vecino sea agregado a la lista de nodos abiertos, de lo contrario retorna 
+    falso.
+    '''
+    # Check if a neighbor should be added to open list
+    def add_to_open(self, open, neighbor):
+        for node in open:
+            if (neighbor == node and neighbor.f > node.f):
+                return False
+        return True
+
+    '''
+    Nucleo de busqueda de mejor primero compartido por A*, Dijkstra, el
+    algoritmo voraz y UCS. Se ejecuta sobre la instantanea CSR del grafo.
+        * La lista de vertices abiertos es un monticulo binario ordenado por
+        f(n). Los empates se resuelven por orden de insercion, igual que el
+        ordenamiento estable de la implementacion anterior.
+        * Los vertices cerrados se marcan en un bytearray indexado por vertice.
+        * El mejor g(n) conocido de cada vertice se guarda en una lista.
+        Cuando se encuentra un camino mejor se inserta una nueva entrada en el
+        monticulo y la anterior se descarta al extraerla (eliminacion perezosa).
+    Entradas:
+        - graph: Objeto de la clase Graph o FrozenGraph
+        - heuristics: Diccionario {id: h(n)}, secuencia de h(n) indexada por
+        el indice interno de cada vertice (ver heuristic_table) o None
+        - start: id del nodo de inicio
+        - end: id del nodo objetivo
+        - gn: Booleano el cual indica si activar o no g(n).
+    Salida: Tupla (frozen, parents, costs), donde frozen es la instantanea
+    utilizada, parents la lista de predecesores y costs la lista de g(n), ambas
+    por indice interno. Retorna None si no existe ruta entre start y end.
+    '''
+    def _best_first_search(self, graph, heuristics, start, end, gn = True):
+        if heuristics is None:
+            stats = self._start_stats('dijkstra')
+        else:
+            stats = self._start_stats('astar' if gn is True else 'greedy')
+        began = perf_counter()
+        frozen = self._freeze(graph)
+        offsets, targets, weights = frozen.offsets, frozen.targets, frozen.weights
+        ids = frozen.ids
+        source = frozen.index[start]
+        target = frozen.index[end]
+        n = frozen.num_vertices
+        on_expand, on_relax, on_goal = self.on_expand, self.on_relax, self.on_goal
+
+        if isinstance(heuristics, dict):
+            heuristics = _IdHeuristic(heuristics, ids)
+
+        # El estado de cada vertice se guarda en arreglos compactos de 8 bytes
+        # por vertice (sin un objeto float por costo), por lo que la memoria de
+        # una consulta es fija: 17 bytes por vertice mas el monticulo
+        inf = float('inf')
+        parents = array('l', [-1]) * n
+        parents[source] = source
+        costs = array('d', [inf]) * n
+        costs[source] = 0.0
+        closed = bytearray(n)
+
+        # Cada entrada del monticulo es (f, orden de insercion, indice)
+        open = [(0, 0, source)]
+        counter = 1
+        expanded = 0
+        reopened = 0
+        peak = 1
+        found = False
+        searching = perf_counter()
+
+        while open:
+            # Obtener el nodo con el menor costo
+            f, _, current = heappop(open)
+
+            # Descartar entradas obsoletas de nodos ya cerrados
+            if closed[current]:
+                continue
+            closed[current] = 1
+            expanded = expanded + 1
+            if on_expand is not None:
+                on_expand(ids[current], costs[current])
+
+            if current == target:
+                found = True
+                break
+
+            current_g = costs[current]
+
+            # Iterar sobre los vecinos del nodo actual
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[k]
+                if closed[neighbor]:
+                    continue
+
+                g = current_g + weights[k] if gn is True else 0
+
+                # Solo se abre el vecino si mejora el mejor g(n) conocido. En el
+                # algoritmo voraz g(n) siempre es 0, por lo que cada vertice
+                # conserva a proposito el padre con el que se descubrio primero
+                known = costs[neighbor]
+                if g >= known:
+                    continue
+                if known != inf:
+                    reopened = reopened + 1
+                costs[neighbor] = g
+                parents[neighbor] = current
+                if on_relax is not None:
+                    on_relax(ids[current], ids[neighbor], g)
+
+                h = heuristics[neighbor] if heuristics is not None else 0
+                heappush(open, (g + h, counter, neighbor))
+                counter = counter + 1
+            if len(open) > peak:
+                peak = len(open)
+
+        # Se evalua la heuristica una vez por cada entrada agregada al monticulo
+        self._finish_stats(stats, began, searching, expanded, counter, reopened, peak, expanded,
+                           counter - 1 if heuristics is not None else 0)
+        if not found:
+            return None
+        if on_goal is not None:
+            on_goal(end, costs[target])
+        return frozen, parents, costs
+
+    '''
+    Busqueda A* con memoria limitada (SMA*). Los nodos de busqueda se guardan
+    en un NodePool de max_nodes posiciones, de modo que la memoria de la
+    consulta no depende del tamaño del grafo ni de la parte que se recorre.
+    Mientras hay posiciones libres la busqueda es A*: se expande el nodo
+    abierto de menor f(n) = g(n) + h(n) generando todos sus sucesores. Cuando
+    el pool se llena se olvida la hoja de mayor f(n) (la menos profunda en los
+    empates) y su padre guarda ese valor, de modo que el subarbol olvidado solo
+    se vuelve a generar cuando su f(n) sea el menor de la frontera.
+        * f(n) nunca baja de padre a hijo (pathmax). Desde que el pool se
+        llena por primera vez, cuando un nodo ya genero todos sus sucesores su
+        f(n) sube al menor f(n) de sus hijos y de los olvidados. Con una
+        heuristica admisible la ruta devuelta siempre es optima.
+        * Si la ruta tiene mas vertices que max_nodes siempre se produce
+        MemoryError. Con max_nodes apenas mayor que la ruta tambien se puede
+        producir, cuando una rama mas profunda que la ruta llena el pool.
+        * Un sucesor no se genera si ya hay en memoria un nodo del mismo
+        vertice con g(n) menor o igual, lo que tambien descarta los ciclos.
+        * La heuristica se calcula al consultarla, sin tablas por vertice.
+        * Con max_nodes muy por debajo de los nodos que expande A* (menos de
+        la mitad, en cuadriculas con muchas rutas del mismo costo incluso
+        menos) la busqueda puede olvidar y regenerar los mismos subarboles
+        muchas veces y tardar mucho mas que A*. Conviene usarla cuando la
+        memoria es el limite y no el tiempo.
+    Entradas:
+        - start: id del nodo de inicio
+        - goal: id del nodo objetivo
+        - metric: Metrica de la heuristica (ver heuristic_table), o alt para
+        usar la heuristica de landmarks (ver build_landmarks).
+        - max_nodes: Numero maximo de nodos en memoria. Por defecto
+        max_search_nodes.
+    Salida: Lista con los ids de la ruta optima, o None si no existe ruta.
+    Excepciones:
+        * TypeError: Se produce cuando el grafo es un diccionario.
+        * ValueError: Se produce cuando la metrica no existe.
+        * MemoryError: Se produce cuando la busqueda necesita una rama de mas
+        de max_nodes nodos, en particular cuando la ruta no cabe en max_nodes
+        nodos.
+    '''
+    def memory_bounded_search(self, start, goal, metric = 'great_circle', max_nodes = None):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        began = perf_counter()
+        frozen = self._freeze(self.graph)
+        if metric == 'alt':
+            heuristics = self._landmark_heuristic(goal)
+        else:
+            heuristics = _CoordinateHeuristic(frozen, frozen.index[goal], metric)
+        heuristic_time = perf_counter() - began
+
+        result = self._memory_bounded_search(frozen, heuristics, start, goal,
+                                             self.max_search_nodes if max_nodes is None else max_nodes)
+        self.last_stats.phases['heuristic'] = heuristic_time
+        if result is None:
+            return None
+        ids = frozen.ids
+        return [ids[v] for v in result]
+
+    '''
+    Nucleo de SMA* de memory_bounded_search sobre la instantanea CSR.
+        * La frontera es un monticulo de (f, -profundidad, marca, nodo) y las
+        hojas candidatas a olvidarse otro de (-f, profundidad, marca, nodo).
+        Cada cambio de un nodo incrementa su marca en el pool y agrega entradas
+        nuevas, por lo que las anteriores se descartan al extraerlas
+        (eliminacion perezosa). Cuando un monticulo acumula muchas entradas
+        obsoletas se reconstruye solo con las vigentes.
+        * El cursor de cada nodo es la siguiente arista por generar. Cuando un
+        nodo con hijos olvidados vuelve a ser el mejor, su cursor vuelve a la
+        primera arista y se generan de nuevo los sucesores que no estan en
+        memoria.
+    Entradas:
+        - frozen: Objeto de la clase FrozenGraph
+        - heuristics: Objeto indexable por indice interno con h(n)
+        - start: id del nodo de inicio
+        - goal: id del nodo objetivo
+        - max_nodes: Numero maximo de nodos en memoria
+    Salida: Lista con los indices internos de la ruta, o None si no existe.
+    '''
+    def _memory_bounded_search(self, frozen, heuristics, start, goal, max_nodes):
+        stats = self._start_stats('sma')
+        began = perf_counter()
+        offsets, targets, weights = frozen.offsets, frozen.targets, frozen.weights
+        ids = frozen.ids
+        source = frozen.index[start]
+        target = frozen.index[goal]
+        on_expand, on_relax, on_goal = self.on_expand, self.on_relax, self.on_goal
+
+        inf = float('inf')
+        pool = NodePool(max_nodes)
+        vertices, parents, costs, estimates = pool.vertices, pool.parents, pool.costs, pool.estimates
+        depths, cursors, first_child, next_sibling = pool.depths, pool.cursors, pool.first_child, pool.next_sibling
+        forgotten, stamps, in_open = pool.forgotten, pool.stamps, pool.in_open
+        # Nodo en memoria con el menor g(n) de cada vertice
+        best = {}
+        open = []
+        leaves = []
+        limit = 4 * max_nodes + 16
+
+        # Agrega las entradas vigentes de un nodo a los monticulos
+        def refresh(node):
+            stamps[node] += 1
+            if in_open[node]:
+                heappush(open, (estimates[node], -depths[node], stamps[node], node))
+            if first_child[node] == -1:
+                heappush(leaves, (-estimates[node], depths[node], stamps[node], node))
+
+        # Sube el f(n) de los nodos que ya generaron todos sus sucesores al
+        # menor f(n) de sus hijos y de los olvidados. Mientras no se olvide
+        # ningun nodo la busqueda es un A* y no hace falta
+        def backup(node):
+            if not bounded:
+                return
+            while node != -1 and cursors[node] == offsets[vertices[node] + 1]:
+                value = forgotten[node]
+                child = first_child[node]
+                while child != -1:
+                    if estimates[child] < value:
+                        value = estimates[child]
+                    child = next_sibling[child]
+                if value == estimates[node]:
+                    break
+                estimates[node] = value
+                refresh(node)
+                node = parents[node]
+
+        # Calcula el f(n) de todos los nodos en memoria, de los mas profundos
+        # a la raiz, la primera vez que se llena el pool
+        def backup_all():
+            nodes = [node for node in range(len(vertices)) if vertices[node] != -1]
+            nodes.sort(key = depths.__getitem__, reverse = True)
+            for node in nodes:
+                if cursors[node] == offsets[vertices[node] + 1]:
+                    value = forgotten[node]
+                    child = first_child[node]
+                    while child != -1:
+                        if estimates[child] < value:
+                            value = estimates[child]
+                        child = next_sibling[child]
+                    if value != estimates[node]:
+                        estimates[node] = value
+                        refresh(node)
+
+        bounded = False
+        root = pool.allocate(source, -1, 0.0, heuristics[source], 0, offsets[source])
+        best[source] = root
+        in_open[root] = 1
+        refresh(root)
+        expanded = 0
+        generated = 1
+        reopened = 0
+        evaluations = 1
+        peak_open = 1
+        peak_nodes = 1
+        found = -1
+        searching = perf_counter()
+
+        while True:
+            # Nodo abierto de menor f(n), el mas profundo en los empates
+            while open and (not in_open[open[0][3]] or stamps[open[0][3]] != open[0][2]):
+                heappop(open)
+            if not open or open[0][0] == inf:
+                break
+            current = open[0][3]
+            vertex = vertices[current]
+            if vertex == target:
+                found = current
+                break
+
+            # Un nodo con un g(n) peor que otro del mismo vertice no se expande
+            other = best.get(vertex)
+            if other is None:
+                best[vertex] = current
+            elif other != current and costs[other] <= costs[current]:
+                in_open[current] = 0
+                estimates[current] = inf
+                refresh(current)
+                backup(parents[current])
+                continue
+
+            # Se vuelven a generar los hijos olvidados
+            end = offsets[vertex + 1]
+            if cursors[current] == end:
+                cursors[current] = offsets[vertex]
+                forgotten[current] = inf
+                reopened = reopened + 1
+            expanded = expanded + 1
+            if on_expand is not None:
+                on_expand(ids[vertex], costs[current])
+
+            g = costs[current]
+            added = False
+            while cursors[current] < end:
+                k = cursors[current]
+                neighbor = targets[k]
+                child_g = g + weights[k]
+                other = best.get(neighbor)
+                if other is not None and costs[other] <= child_g:
+                    cursors[current] = k + 1
+                    continue
+                h = heuristics[neighbor]
+                evaluations = evaluations + 1
+                if h == inf:
+                    cursors[current] = k + 1
+                    continue
+
+                # Sin posiciones libres se olvida la hoja de mayor f(n). Despues
+                # del primer sucesor se deja de generar y el nodo sigue abierto
+                if pool.used == max_nodes:
+                    if added:
+                        break
+                    if not bounded:
+                        bounded = True
+                        backup_all()
+                    victim = -1
+                    while leaves:
+                        entry = heappop(leaves)
+                        node = entry[3]
+                        if (stamps[node] == entry[2] and first_child[node] == -1 and
+                                node != current and node != root):
+                            victim = node
+                            break
+                    if victim == -1:
+                        raise MemoryError('La ruta no cabe en ' + str(max_nodes) + ' nodos')
+                    parent = parents[victim]
+                    if estimates[victim] < forgotten[parent]:
+                        forgotten[parent] = estimates[victim]
+                    if best.get(vertices[victim]) == victim:
+                        del best[vertices[victim]]
+                    pool.release(victim)
+                    in_open[parent] = 1
+                    refresh(parent)
+                    backup(parent)
+
+                cursors[current] = k + 1
+                child = pool.allocate(neighbor, current, child_g, max(estimates[current], child_g + h),
+                                      depths[current] + 1, offsets[neighbor])
+                best[neighbor] = child
+                in_open[child] = 1
+                refresh(child)
+                generated = generated + 1
+                added = True
+                if on_relax is not None:
+                    on_relax(ids[vertex], ids[neighbor], child_g)
+
+            if cursors[current] == end and forgotten[current] == inf:
+                in_open[current] = 0
+            refresh(current)
+            backup(current)
+
+            if len(open) > peak_open:
+                peak_open = len(open)
+            if pool.used > peak_nodes:
+                peak_nodes = pool.used
+            # Reconstruccion de los monticulos con muchas entradas obsoletas
+            if len(open) > limit:
+                open = [entry for entry in open if in_open[entry[3]] and stamps[entry[3]] == entry[2]]
+                heapify(open)
+            if len(leaves) > limit:
+                leaves = [entry for entry in leaves if stamps[entry[3]] == entry[2] and first_child[entry[3]] == -1]
+                heapify(leaves)
+
+        self._finish_stats(stats, began, searching, expanded, generated, reopened, peak_open,
+                           peak_nodes, evaluations)
+        if found == -1:
+            return None
+        if on_goal is not None:
+            on_goal(goal, costs[found])
+        return pool.path(found)
+
+    '''
+    Algoritmo de Dijkstra bidireccional. Crece una frontera hacia adelante
+    desde start y otra hacia atras desde goal, y se detiene cuando la suma de
+    los menores costos de ambas fronteras no puede mejorar la mejor ruta
+    encontrada. El numero de vertices expandidos queda en last_expanded.
+    Entradas:
+        - start: id del nodo de inicio
+        - goal: id del nodo objetivo
+    Salida: Lista con los ids de la ruta optima, o None si no existe ruta.
+    Excepciones:
+        * TypeError: Se produce cuando el grafo es un diccionario.
+    '''
+    def bidirectional_dijkstra(self, start, goal):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        return self._bidirectional_search(start, goal, None)
+
+    '''
+    Algoritmo A* bidireccional con potenciales balanceados. Con h_t(v) la
+    heuristica hacia goal y h_s(v) la heuristica hacia start, la frontera hacia
+    adelante usa p(v) = (h_t(v) - h_s(v)) / 2 y la frontera hacia atras -p(v).
+    Ambas son consistentes si la heuristica lo es, por lo que se conserva la
+    misma condicion de parada de Dijkstra bidireccional. Los potenciales se
+    calculan solo para los vertices que toca la busqueda (ver
+    _BalancedPotentials). El numero de vertices expandidos queda en
+    last_expanded.
+    Entradas:
+        - start: id del nodo de inicio
+        - goal: id del nodo objetivo
+        - metric: Metrica de la heuristica (ver heuristic_table)
+    Salida: Lista con los ids de la ruta optima, o None si no existe ruta.
+    Excepciones:
+        * TypeError: Se produce cuando el grafo es un diccionario.
+        * ValueError: Se produce cuando la metrica no existe.
+    '''
+    def bidirectional_astar(self, start, goal, metric = 'great_circle'):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        began = perf_counter()
+        frozen = self._freeze(self.graph)
+        potentials = _BalancedPotentials(frozen, frozen.index[start], frozen.index[goal], metric)
+        heuristic_time = perf_counter() - began
+        path = self._bidirectional_search(start, goal, potentials)
+        self.last_stats.phases['heuristic'] = heuristic_time
+        return path
+
+    '''
+    Nucleo de las busquedas bidireccionales.
+    Entradas:
+        - start: id del nodo de inicio
+        - goal: id del nodo objetivo
+        - potentials: p(v) por indice interno (secuencia o diccionario), o None
+        para Dijkstra.
+        La clave de un vertice en la frontera hacia adelante es g(v) + p(v) y en
+        la frontera hacia atras g(v) - p(v).
+    Salida: Lista con los ids de la ruta optima, o None si no existe ruta.
+    '''
+    def _bidirectional_search(self, start, goal, potentials):
+        stats = self._start_stats('bidirectional_dijkstra' if potentials is None else 'bidirectional_astar')
+        began = perf_counter()
+        frozen = self._freeze(self.graph)
+        n = frozen.num_vertices
+        ids = frozen.ids
+        source = frozen.index[start]
+        target = frozen.index[goal]
+        on_expand, on_relax, on_goal = self.on_expand, self.on_relax, self.on_goal
+        self.last_expanded = 0
+        self.last_peak_frontier = 0
+
+        if source == target:
+            return [start]
+
+        inf = float('inf')
+        # Estado de cada direccion: (grafo, costos, predecesores, cerrados, monticulo, signo del potencial)
+        forward = (frozen, array('d', [inf]) * n, array('l', [-1]) * n, bytearray(n), [], 1)
+        backward = (frozen.reverse(), array('d', [inf]) * n, array('l', [-1]) * n, bytearray(n), [], -1)
+        for (graph, costs, parents, closed, heap, sign), node in ((forward, source), (backward, target)):
+            costs[node] = 0.0
+            parents[node] = node
+            heap.append((sign * potentials[node] if potentials is not None else 0.0, node))
+
+        best = inf
+        meeting = -1
+        expanded = 0
+        generated = 2
+        reopened = 0
+        peak = 2
+        searching = perf_counter()
+
+        while True:
+            # Descartar entradas obsoletas en el tope de cada monticulo
+            for state in (forward, backward):
+                heap, closed = state[4], state[3]
+                while heap and closed[heap[0][1]]:
+                    heappop(heap)
+            if not forward[4] or not backward[4]:
+                break
+
+            # Condicion de parada: ninguna ruta restante puede ser mejor
+            if forward[4][0][0] + backward[4][0][0] >= best:
+                break
+
+            # Expandir la frontera con el menor costo
+            if forward[4][0][0] <= backward[4][0][0]:
+                state, other = forward, backward
+            else:
+                state, other = backward, forward
+            graph, costs, parents, closed, heap, sign = state
+            other_costs = other[1]
+
+            key, u = heappop(heap)
+            closed[u] = 1
+            expanded = expanded + 1
+            if on_expand is not None:
+                on_expand(ids[u], costs[u])
+            offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+            g_u = costs[u]
+
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                g_v = g_u + weights[k]
+                if g_v < costs[v]:
+                    if costs[v] != inf:
+                        reopened = reopened + 1
+                    costs[v] = g_v
+                    parents[v] = u
+                    if on_relax is not None:
+                        on_relax(ids[u], ids[v], g_v)
+                    heappush(heap, (g_v + sign * potentials[v] if potentials is not None else g_v, v))
+                    generated = generated + 1
+                if g_v + other_costs[v] < best:
+                    best = g_v + other_costs[v]
+                    meeting = v
+            if len(heap) + len(other[4]) > peak:
+                peak = len(heap) + len(other[4])
+
+        self._finish_stats(stats, began, searching, expanded, generated, reopened, peak, expanded,
+                           generated if potentials is not None else 0)
+        if meeting == -1:
+            return None
+        if on_goal is not None:
+            on_goal(goal, best)
+
+        # Unir la ruta hacia adelante hasta el punto de encuentro con la ruta
+        # hacia atras desde el punto de encuentro
+        joining = perf_counter()
+        path = self._build_path(frozen, forward[2], meeting)
+        backward_parents = backward[2]
+        node = meeting
+        while backward_parents[node] != node:
+            node = backward_parents[node]
+            path.append(ids[node])
+        stats.phases['path'] = perf_counter() - joining
+        return path
+
+    '''
+    Metodo el cual calcula la funcion heuristica para cada estacion o ubicacion
+    geografica.
+
+    Entradas:
+        * graph: Grafo de la clase graph
+        * station: objeto de la clase Station. Se conserva por compatibilidad,
+        la distancia se calcula con FrozenGraph.distances_from.
+        * goal: id del vertice objetivo. Por defecto la estacion AV. Jimenez.
+    Salida: Diccionario el cual contiene la distancia desde una ubicacion 
+    geografica a todas las demas registradas.
+    '''
+    def construct_heristic(self, graph, station, goal = 24):
+        frozen = self._freeze(graph)
+        return dict(zip(frozen.ids, self.heuristic_table(frozen, goal)))
+
+    '''
+    Obtiene la tabla heuristica desde todos los vertices hasta un vertice
+    objetivo. Las tablas se guardan en una cache LRU por (objetivo, metrica) de
+    tamaño heuristic_cache_size; una tabla solo se reutiliza si fue calculada
+    sobre la misma instantanea del grafo.
+    Entradas:
+        * graph: Objeto de la clase Graph o FrozenGraph
+        * goal: id del vertice objetivo
+        * metric: Metrica de distancia. great_circle (distancia del gran
+        circulo en metros), euclidean o manhattan (sobre las coordenadas, igual
+        que el metodo heuristic).
+    Salida: Arreglo array('d') indexado por el indice interno de cada vertice,
+    el cual puede pasarse directamente como heuristics a astar_search.
+    Excepciones:
+        * ValueError: Se produce cuando la metrica no existe.
+    '''
+    def heuristic_table(self, graph, goal, metric = 'great_circle'):
+        frozen = self._freeze(graph)
+        cache = self.heuristic_cache
+        key = (goal, metric)
+
+        entry = cache.get(key)
+        if entry is not None and entry[0] is frozen:
+            cache.move_to_end(key)
+            return entry[1]
+
+        i = frozen.index[goal]
+        if metric == 'great_circle':
+            table = frozen.distances_from(i)
+        elif metric == 'euclidean':
+            (x2, y2) = frozen.get_coordinates(i)
+            table = array('d', [((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
+                                for x1, y1 in zip(frozen.latitudes, frozen.longitudes)])
+        elif metric == 'manhattan':
+            (x2, y2) = frozen.get_coordinates(i)
+            table = array('d', [abs(x1 - x2) + abs(y1 - y2)
+                                for x1, y1 in zip(frozen.latitudes, frozen.longitudes)])
+        else:
+            raise ValueError('Metrica de distancia desconocida: ' + str(metric))
+
+        cache[key] = (frozen, table)
+        cache.move_to_end(key)
+        if len(cache) > self.heuristic_cache_size:
+            cache.popitem(last = False)
+        return table
+
+    '''
+    Obtiene la ruta entre 2 vertices con el algoritmo indicado, guardando el
+    resultado en la cache de rutas (route_cache). Una ruta guardada solo se
+    reutiliza si fue calculada con la version actual del grafo.
+    Entradas:
+        * start: id del vertice de inicio
+        * goal: id del vertice objetivo
+        * algorithm: bfs, dfs, ucs, astar, dijkstra, greedy, alt (A* con la
+        heuristica de landmarks, ver build_landmarks), sma (A* con memoria
+        limitada, ver memory_bounded_search) o ch (jerarquias de contraccion,
+        ver build_contraction_hierarchy)
+        * metric: Metrica de la heuristica para astar, greedy y sma (ver
+        heuristic_table).
+        * stats: Si es True tambien se devuelven las estadisticas de la
+        consulta (ver SearchStats). Si la ruta se tomo de la cache sus
+        estadisticas tienen cached = True y ningun vertice expandido.
+    Salida: Lista con los ids de la ruta, o None si no existe ruta. Si stats
+    es True, tupla (ruta, objeto de la clase SearchStats).
+    Excepciones:
+        * TypeError: Se produce cuando el grafo es un diccionario.
+        * ValueError: Se produce cuando el algoritmo no existe.
+    '''
+    def route(self, start, goal, algorithm = 'ucs', metric = 'great_circle', stats = False):
+        if (isinstance(self.graph, dict)):
+            raise TypeError('El grafo no es instancia de la clase Graph')
+
+        began = perf_counter()
+        # La metrica solo cambia el resultado de los algoritmos con heuristica
+        # por coordenadas
+        key = (start, goal, algorithm, metric if algorithm in TreeSearch.METRIC_ALGORITHMS else None)
+        version = self.graph.version
+        path = self.route_cache.get(key, version)
+        if path is not RouteCache.MISSING:
+            self.last_stats = SearchStats(algorithm)
+            self.last_stats.cached = True
+            self.last_stats.phases['cache'] = perf_counter() - began
+            # Las rutas se guardan como tuplas y cada consulta recibe su
+            # propia lista, que puede modificar sin alterar la cache
+            path = None if path is None else list(path)
+            return (path, self.last_stats) if stats else path
+
+        # Las consultas triviales (inicio igual al objetivo) y las jerarquias
+        # de contraccion no pasan por los nucleos de busqueda
+        self.last_stats = None
+        path = self._route(start, goal, algorithm, metric)
+        if self.last_stats is None:
+            self.last_stats = SearchStats(algorithm)
+            self.last_stats.phases['search'] = perf_counter() - began
+        self.last_stats.algorithm = algorithm
+        self.route_cache.put(key, version, None if path is None else tuple(path))
+        return (path, self.last_stats) if stats else path
+
+    '''
+    Ejecuta el algoritmo indicado sin pasar por la cache y normaliza la salida
+    a una lista de ids o None.
+    '''
+    def _route(self, start, goal, algorithm, metric):
+        if algorithm == 'bfs':
+            if start == goal:
+                return [start]
+            path = self.bfs_shortest_path(start, goal)
+            return path if isinstance(path, list) else None
+        elif algorithm == 'dfs':
+            if start == goal:
+                return [start]
+            return self._dfs_paths(self._freeze(self.graph), start, goal)
+        elif algorithm == 'ucs':
+            return self.ucs(start, goal)
+        elif algorithm == 'sma':
+            return self.memory_bounded_search(start, goal, metric)
+        elif algorithm == 'ch':
+            if self.contraction is None or self.contraction.version != self.graph.version:
+                self.build_contraction_hierarchy()
+            result = self.contraction.query(start, goal)
+            return result[1] if result is not None else None
+        elif algorithm in ('astar', 'dijkstra', 'greedy', 'alt'):
+            began = perf_counter()
+            heuristics = None
+            if algorithm == 'alt':
+                heuristics = self._landmark_heuristic(goal)
+            elif algorithm != 'dijkstra':
+                heuristics = self.heuristic_table(self.graph, goal, metric)
+            heuristic_time = perf_counter() - began
+            result = self._best_first_search(self.graph, heuristics, start, goal, algorithm != 'greedy')
+            if heuristics is not None:
+                self.last_stats.phases['heuristic'] = heuristic_time
+            if result is None:
+                return None
+            frozen, parents, costs = result
+            return self._build_path(frozen, parents, frozen.index[goal])
+        raise ValueError('Algoritmo de busqueda desconocido: ' + str(algorithm))
+
+    '''
+    Construye el preprocesamiento ALT (ver la clase Landmarks) sobre la
+    instantanea actual del grafo y lo guarda en el atributo landmarks.
+    Entradas:
+        * k: Numero de landmarks
+    Salida: Objeto de la clase Landmarks.
+    '''
+    def build_landmarks(self, k = 4):
+        self.landmarks = Landmarks(self._freeze(self.graph), k)
+        return self.landmarks
+
+    '''
+    Construye las jerarquias de contraccion (ver la clase
+    ContractionHierarchy) sobre la instantanea actual del grafo y las guarda
+    en el atributo contraction. Tambien se puede asignar a contraction una
+    jerarquia leida con ContractionHierarchy.load.
+    Salida: Objeto de la clase ContractionHierarchy.
+    '''
+    def build_contraction_hierarchy(self):
+        self.contraction = ContractionHierarchy(self._freeze(self.graph))
+        return self.contraction
+
+    '''
+    Construye el etiquetado por hubs (ver la clase HubLabels) sobre la
+    instantanea actual del grafo y lo guarda en el atributo hub_labels. Si ya
+    existe una jerarquia de contraccion vigente se reutiliza su orden.
+    Salida: Objeto de la clase HubLabels.
+    '''
+    def build_hub_labels(self):
+        hierarchy = self.contraction
+        if hierarchy is not None and hierarchy.version != self.graph.version:
+            hierarchy = None
+        self.hub_labels = HubLabels(self._freeze(self.graph), hierarchy = hierarchy)
+        return self.hub_labels
+
+    '''
+    Obtiene la distancia minima entre 2 vertices. Usa el etiquetado por hubs
+    si fue construido con la version actual del grafo; en caso contrario usa
+    shortest_route.
+    Entradas:
+        - start: id del vertice de inicio
+        - goal: id del vertice objetivo
+    Salida: Distancia minima, o inf si no existe ruta.
+    '''
+    def distance(self, start, goal):
+        labels = self.hub_labels
+        if labels is not None and labels.version == self.graph.version:
+            return labels.distance(start, goal)
+
+        result = self.shortest_route(start, goal)
+        return result[0] if result is not None else float('inf')
+
+    '''
+    Obtiene la heuristica ALT hacia goal. Si no hay landmarks o fueron
+    calculados sobre una version anterior del grafo se construyen de nuevo con
+    el mismo numero de landmarks.
+    '''
+    def _landmark_heuristic(self, goal):
+        frozen = self._freeze(self.graph)
+        if self.landmarks is None:
+            self.build_landmarks()
+        elif self.landmarks.frozen is not frozen:
+            self.repair()
+            if self.landmarks.frozen is not frozen:
+                self.build_landmarks(len(self.landmarks.landmarks))
+        return self.landmarks.heuristic(goal)
+
+    '''
+    Repara la tabla de todos los pares y los landmarks despues de cambios
+    dinamicos del grafo (Graph.close_edge, Graph.reopen_edge y
+    Graph.set_weight), recalculando solo las rutas afectadas. Las estructuras
+    que no se pueden reparar (por ejemplo despues de agregar vertices o
+    aristas) no se modifican: shortest_route deja de usar la tabla y los
+    landmarks se construyen de nuevo al usarse. Las jerarquias de contraccion
+    y el etiquetado por hubs siempre se construyen de nuevo.
+    Se llama automaticamente desde shortest_route y desde las busquedas ALT.
+    Salida: Lista con los nombres de los atributos reparados.
+    '''
+    def repair(self):
+        frozen = self._freeze(self.graph)
+        repaired = []
+        for name in ('all_pairs', 'landmarks'):
+            structure = getattr(self, name)
+            if structure is None or structure.frozen is frozen or not isinstance(self.graph, Graph):
+                continue
+            changes = self.graph.changes_since(structure.frozen.version)
+            if changes is not None:
+                structure.update(frozen, changes)
+                repaired.append(name)
+        return repaired
+
+    '''
+    Mide el numero de vertices expandidos por Dijkstra, por A* con la
+    heuristica geografica (gran circulo) y por A* con la heuristica ALT sobre
+    una lista de consultas.
+    Entradas:
+        * pairs: Lista de tuplas (id de inicio, id objetivo)
+    Salida: Diccionario {dijkstra, great_circle, alt} con el total de vertices
+    expandidos por cada heuristica.
+    '''
+    def compare_heuristics(self, pairs):
+        totals = {'dijkstra': 0, 'great_circle': 0, 'alt': 0}
+        for start, goal in pairs:
+            self._best_first_search(self.graph, None, start, goal)
+            totals['dijkstra'] = totals['dijkstra'] + self.last_expanded
+            self._best_first_search(self.graph, self.heuristic_table(self.graph, goal), start, goal)
+            totals['great_circle'] = totals['great_circle'] + self.last_expanded
+            self._best_first_search(self.graph, self._landmark_heuristic(goal), start, goal)
+            totals['alt'] = totals['alt'] + self.last_expanded
+        return totals
+
+"""# **Clase RouteCache**
+
+> Cache de rutas con politica LRU (se descarta la ruta usada hace mas tiempo) y, opcionalmente, un tiempo de vida (TTL) por entrada. Cada entrada guarda la version del grafo con la que se calculo, de modo que despues de un cambio en el grafo la entrada se invalida en lugar de devolverse. Los contadores `hits`, `misses`, `evictions`, `expirations` e `invalidations` permiten dimensionar la cache.
+"""
+
+class RouteCache:
+
+    # Valor devuelto por get cuando la clave no esta en la cache. Se usa en
+    # lugar de None porque None es un resultado valido (no existe ruta).
+    MISSING = object()
+
+    '''
+    Inicializacion
+    Entradas:
+        * max_size: Numero maximo de entradas
+        * ttl: Segundos de vigencia de cada entrada, o None para no expirar.
+    '''
+    def __init__(self, max_size = 1024, ttl = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
 
     '''
-    Algoritmo A* - Dijkstra - Algoritmo Voraz
-        * Sera A* cuando exista g(n) y h(n), y estos sean mayores a 0
-        * Cuando h(n) = 0 entonces este algoritmo es Dijkstra
-        * Cuando g(n) = 0 entonces este algoritmo es un algoritmo voraz
+    Obtiene una entrada de la cache.
     Entradas:
-        - graph: El objeto de la clase Graph
-        - heuristics: Diccionario con la distancia total entre un punto de 
-        destino y final.
-        - start: id del nodo de inicio
-        - end: id del vertice el cual es el final del recorrido
-        - gn: Booleano el cual indica si activar o no g(n). 
-        Si esta desactivado este algoritmo pasa a ser Dijkstra.
-    Salida: Lista con la ruta optima encontrada por este algoritmo. Cada indice
-    es el id del nodo que pertenece a aquel camino optimo.
-    Excepciones:
-        * TypeError: Se produce cuando el campo de esta clase graph no es un 
-        objeto de la instancia de la clase Graph, o cuando la variable gn es 
-        falsa al mismo tiempo que heuristics es None.
+        * key: Clave de la entrada
+        * version: Version actual del grafo
+    Salida: El valor guardado, o RouteCache.MISSING si la clave no existe, si
+    expiro o si fue calculada con otra version del grafo.
     '''
+    def get(self, key, version):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses = self.misses + 1
+            return RouteCache.MISSING
+
+        (entry_version, created, value) = entry
+        if entry_version != version:
+            del self.entries[key]
+            self.invalidations = self.invalidations + 1
+            self.misses = self.misses + 1
+            return RouteCache.MISSING
+        if self.ttl is not None and monotonic() - created > self.ttl:
+            del self.entries[key]
+            self.expirations = self.expirations + 1
+            self.misses = self.misses + 1
+            return RouteCache.MISSING
+
+        self.entries.move_to_end(key)
+        self.hits = self.hits + 1
+        return value
 
-    def astar_search(self, graph, heuristics, start, end, gn = True):
-        if (isinstance(self.graph, dict)):
-            raise TypeError('El grafo no es instancia de la clase Graph')
+    '''
+    Guarda una entrada en la cache, descartando la menos usada recientemente
+    si se supera max_size.
+    Entradas:
+        * key: Clave de la entrada
+        * version: Version del grafo con la que se calculo el valor
+        * value: Valor a guardar
+    '''
+    def put(self, key, version, value):
+        self.entries[key] = (version, monotonic(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last = False)
+            self.evictions = self.evictions + 1
 
-        if gn is False and heuristic is None:
-            raise TypeError('El parametro gn no puede ser falso al mismo tiempo que heuristics es None')
-        # Creacion de las listas para guardar los vertices abiertos y cerrados
-        open = []
-        closed = []
+    '''
+    Elimina todas las entradas de la cache. Los contadores se conservan.
+    '''
+    def clear(self):
+        self.entries.clear()
 
-        # Crear un nodo inicial y final
-        start_node = Node(start, None)
-        goal_node = Node(end, None)
+    '''
+    Obtiene los contadores de la cache.
+    Salida: Diccionario con hits, misses, evictions, expirations,
+    invalidations y el numero de entradas actual (size).
+    '''
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'expirations': self.expirations,
+                'invalidations': self.invalidations, 'size': len(self.entries)}
 
-        # Agregar el nodo de inicio a la lista de vertices abiertos
-        open.append(start_node)
-        
-        # Iterar hasta que la lista de nodos abiertos este vacia
-        while len(open) > 0:
-
-            #Ordenar la lista de ndoos abiertos para obtener el vertice con costo mas bajo
-            open.sort()
-
-            # Obtner el nodo con el menor costo
-            current_node = open.pop(0)
-
-            # Agregar el nodo a la lista de vertices cerrados.
-            closed.append(current_node)
-            
-            # Si se llego al nodo final retornar la ruta mas optima
-            if current_node == goal_node:
-                path = []
-                while current_node != start_node:
-                    path.append(str(current_node.name) + ': ' + str(current_node.g))
-                    current_node = current_node.parent
-                path.append(str(start_node.name) + ': ' + str(start_node.g))
-                # Retornar la lista en reversa.
-                return path[::-1]
-
-            # Obtener vecinos del nodo actual
-            neighbors = graph.get_vertex(current_node.name).get_dict_childrens_weights()
+"""# **Clase RouteMatrix**
 
-            # Iterar sobre los vecinos del nodo actual
-            for key, value in neighbors.items():
+> Resultado de `TreeSearch.route_matrix` y `TreeSearch.parallel_route_matrix`. Guarda los costos en un arreglo denso `costs` de `len(sources) x len(targets)` (fila por origen) y el arreglo de predecesores del arbol de cada origen, a partir del cual las rutas se reconstruyen solo cuando se piden con `path`. Si el arbol de un origen no esta guardado (calculo en paralelo) se calcula al pedir la primera ruta de ese origen.
+"""
 
-                # Crear un nodo vecino
-                neighbor = Node(key, current_node)
+class RouteMatrix:
 
-                # Verificar si el nodo esta en la lista de vertices cerrados
-                if(neighbor in closed):
-                    continue
+    '''
+    Inicializacion
+    Entradas:
+        * frozen: Objeto de la clase FrozenGraph sobre el cual se calcula
+        * sources: Lista de ids de los vertices de origen
+        * targets: Lista de ids de los vertices de destino
+        * algorithm: Algoritmo con el que se calculan los arboles (dijkstra,
+        ucs o bfs)
+    '''
+    def __init__(self, frozen, sources, targets, algorithm = 'dijkstra'):
+        self.frozen = frozen
+        self.algorithm = algorithm
+        self.sources = list(sources)
+        self.targets = list(targets)
+        self.source_indices = [frozen.index[node] for node in self.sources]
+        self.target_indices = [frozen.index[node] for node in self.targets]
+        self.source_rows = {node: row for row, node in enumerate(self.sources)}
+        self.target_columns = {node: column for column, node in enumerate(self.targets)}
+        self.costs = array('d', [float('inf')]) * (len(self.sources) * len(self.targets))
+        self.parents = {}
 
-                # Calcular el costo de la ruta completa
-                neig_node = graph.get_vertex(neighbor.name)
-                cost = graph.get_vertex(current_node.name).get_weight(neig_node)
+    '''
+    Obtiene el costo entre un origen y un destino de la matriz.
+    Entradas:
+        * source: id del vertice de origen
+        * target: id del vertice de destino
+    Salida: Costo de la ruta, o inf si no existe ruta.
+    '''
+    def cost(self, source, target):
+        return self.costs[self.source_rows[source] * len(self.targets) + self.target_columns[target]]
 
-                if gn is True:
-                    neighbor.g = current_node.g + cost
-                else:
-                    neighbor.g = 0
+    '''
+    Reconstruye la ruta entre un origen y un destino de la matriz.
+    Entradas:
+        * source: id del vertice de origen
+        * target: id del vertice de destino
+    Salida: Lista con los ids de la ruta, o None si no existe ruta.
+    '''
+    def path(self, source, target):
+        row = self.source_rows[source]
+        if row not in self.parents:
+            if self.algorithm == 'bfs':
+                tree = self.frozen.breadth_first_tree
+            else:
+                tree = self.frozen.shortest_path_tree
+            self.parents[row] = tree(self.source_indices[row], self.target_indices)[1]
+
+        parents = self.parents[row]
+        node = self.target_indices[self.target_columns[target]]
+        if parents[node] == -1:
+            return None
 
-                if heuristics is not None:
-                    neighbor.h = heuristics.get(neighbor.name)
-                else:
-                    neighbor.h = 0
-                neighbor.f = neighbor.g + neighbor.h
+        ids = self.frozen.ids
+        path = [ids[node]]
+        while parents[node] != node:
+            node = parents[node]
+            path.append(ids[node])
+        return path[::-1]
 
-                #Verificar si el nodo vecino esta en la lista abierta y si este tiene un valor f mas bajo
-                if(self.add_to_open(open, neighbor) == True):
-                    open.append(neighbor)
+    '''
+    Convierte la matriz de costos en una lista de filas, una por origen.
+    '''
+    def to_list(self):
+        columns = len(self.targets)
+        return [list(self.costs[row * columns:(row + 1) * columns]) for row in range(len(self.sources))]
 
-        # Retorna None si no se encontro ruta optima
-        return None
+"""# **Clase SpatialIndex**
 
-    '''
-    Metodo que verifica si un vecino debe de ser agregado a la lista de vertices
-    abiertos. Funcion utilizada para el algoritmo A*
+> Indice espacial de rejilla sobre las coordenadas de los vertices, para encontrar la estacion mas cercana a unas coordenadas GPS, o las que estan dentro de un radio, sin calcular la distancia a todas las estaciones. El rectangulo que contiene a los vertices se divide en celdas de por lo menos `cell_size` metros de lado, y los vertices se guardan agrupados por celda en 2 arreglos (`cell_offsets` y `cell_vertices`) con el mismo formato CSR de `FrozenGraph`, fila por fila, de modo que las celdas consecutivas de una fila forman un solo tramo de `cell_vertices`. Una consulta recorre las celdas en anillos alrededor de la celda del punto: los vertices que quedan fuera de los primeros `r` anillos estan a mas de `r` celdas en latitud o en longitud, y de ahi se obtiene una cota inferior de su distancia sobre la esfera (la distancia sobre un meridiano, o la distancia al meridiano con esa diferencia de longitud), valida tambien para puntos lejos de la red. La busqueda se detiene en cuanto los `k` mejores encontrados estan mas cerca que esa cota. Las distancias son las del gran circulo, iguales a las de `great_circle_distance`.
+"""
+
+class SpatialIndex:
 
+    # Numero promedio de vertices por celda ocupada que se busca cuando el
+    # lado de las celdas no se indica, y numero maximo de celdas por vertice
+    OCCUPANCY = 2
+    MAX_CELLS = 8
+
+    '''
+    Inicializacion. Agrupa los vertices por celda.
     Entradas:
-        * open: Lista de vertices abiertos
-        * neighbor: Vertice vecino a evaluar
-    Salidas: Retorna verdadero si se cumplen las indicaciones para que el vertice
-    vecino sea agregado a la lista de nodos abiertos, de lo contrario retorna 
-    falso.
+        * graph: Objeto de la clase Graph o FrozenGraph
+        * cell_size: Lado minimo de cada celda en metros. Si no se indica se
+        escoge para que haya en promedio OCCUPANCY vertices por celda ocupada.
     '''
-    # Check if a neighbor should be added to open list
-    def add_to_open(self, open, neighbor):
-        for node in open:
-            if (neighbor == node and neighbor.f > node.f):
-                return False
-        return True
+    def __init__(self, graph, cell_size = None):
+        frozen = graph if isinstance(graph, FrozenGraph) else graph.freeze()
+        latitudes, longitudes = frozen.latitudes, frozen.longitudes
+        n = frozen.num_vertices
+        meters_per_degree = EARTH_RADIUS * 1000 * radians(1.0)
+
+        self.frozen = frozen
+        if n > 0:
+            self.min_latitude, max_latitude = min(latitudes), max(latitudes)
+            self.min_longitude, max_longitude = min(longitudes), max(longitudes)
+        else:
+            self.min_latitude = max_latitude = self.min_longitude = max_longitude = 0.0
+
+        # Coseno de la latitud mas alejada del ecuador: con el, una celda mide
+        # por lo menos cell_size de ancho en cualquier latitud del rectangulo
+        self.min_cos = cos(radians(min(max(abs(self.min_latitude), abs(max_latitude)), 89.0)))
+        height = (max_latitude - self.min_latitude) * meters_per_degree
+        width = (max_longitude - self.min_longitude) * meters_per_degree * self.min_cos
+        automatic = cell_size is None
+        if automatic:
+            if height > 0 and width > 0:
+                cell_size = sqrt(self.OCCUPANCY * height * width / n)
+                smallest = sqrt(height * width / (self.MAX_CELLS * n))
+            else:
+                cell_size = self.OCCUPANCY * max(height, width) / max(n, 1)
+                smallest = max(height, width) / (self.MAX_CELLS * max(n, 1))
+        self._set_cell_size(cell_size, max_latitude, max_longitude)
+
+        # Si los vertices estan agrupados (por ejemplo a lo largo de troncales)
+        # la mayoria de celdas queda vacia y las ocupadas tienen muchos
+        # vertices: se reduce la celda mientras la rejilla no sea muy grande
+        for _ in range(4):
+            if not automatic or n == 0 or self.rows * self.columns >= self.MAX_CELLS * n:
+                break
+            occupied = len({self._cell(x, y) for x, y in zip(latitudes, longitudes)})
+            if n <= 2 * self.OCCUPANCY * occupied:
+                break
+            cell_size = self.cell_size / sqrt(n / (self.OCCUPANCY * occupied))
+            self._set_cell_size(max(cell_size, smallest), max_latitude, max_longitude)
+
+        # Ordenamiento por conteo de los vertices segun su celda
+        cells = array('l', [0]) * n
+        self.cell_offsets = array('l', [0]) * (self.rows * self.columns + 1)
+        for v, (x, y) in enumerate(zip(latitudes, longitudes)):
+            row, column = self._cell(x, y)
+            cells[v] = row * self.columns + column
+            self.cell_offsets[cells[v] + 1] += 1
+        for cell in range(self.rows * self.columns):
+            self.cell_offsets[cell + 1] += self.cell_offsets[cell]
+        self.cell_vertices = array('l', [0]) * n
+        position = self.cell_offsets[:-1]
+        for v, cell in enumerate(cells):
+            self.cell_vertices[position[cell]] = v
+            position[cell] += 1
 
     '''
-    Metodo el cual calcula la funcion heuristica para cada estacion o ubicacion
-    geografica.
+    Fija el lado de las celdas y calcula el tamaño de la rejilla.
+    '''
+    def _set_cell_size(self, cell_size, max_latitude, max_longitude):
+        meters_per_degree = EARTH_RADIUS * 1000 * radians(1.0)
+        self.cell_size = max(cell_size, 1.0)
+        self.cell_height = self.cell_size / meters_per_degree
+        self.cell_width = self.cell_size / (meters_per_degree * self.min_cos)
+        self.rows = int((max_latitude - self.min_latitude) // self.cell_height) + 1
+        self.columns = int((max_longitude - self.min_longitude) // self.cell_width) + 1
 
-    Entradas:
-        * graph: Grafo de la clase graph
-        * station: objeto de la clase Station
-    Salida: Diccionario el cual contiene la distancia desde una ubicacion 
-    geografica a todas las demas registradas.
     '''
-    def construct_heristic(self, graph, station):
-        heuristic = {}
+    Obtiene la celda (fila, columna) de unas coordenadas. Para coordenadas
+    fuera del rectangulo de los vertices la celda queda fuera de la rejilla.
+    '''
+    def _cell(self, latitude, longitude):
+        return (int((latitude - self.min_latitude) // self.cell_height),
+                int((longitude - self.min_longitude) // self.cell_width))
 
-        #Obtener el nodo del cual se va a medir la distancia hacia demas
-        frm = graph.get_vertex(24)
+    '''
+    Obtiene los vertices de las celdas del anillo d alrededor de una celda, es
+    decir, de las celdas que estan a d filas o d columnas de ella.
+    Salida: Lista con los indices internos de los vertices.
+    '''
+    def _ring(self, row, column, d):
+        offsets, vertices = self.cell_offsets, self.cell_vertices
+        rows, columns = self.rows, self.columns
+        candidates = []
+
+        # Filas superior e inferior completas: cada una es un solo tramo
+        left, right = max(column - d, 0), min(column + d, columns - 1)
+        if left <= right:
+            for r in ((row - d, row + d) if d > 0 else (row,)):
+                if 0 <= r < rows:
+                    start = r * columns
+                    candidates.extend(vertices[offsets[start + left]:offsets[start + right + 1]])
+
+        # Columnas izquierda y derecha sin las esquinas
+        if d > 0:
+            low, high = max(row - d + 1, 0), min(row + d - 1, rows - 1)
+            for c in (column - d, column + d):
+                if 0 <= c < columns:
+                    for r in range(low, high + 1):
+                        cell = r * columns + c
+                        candidates.extend(vertices[offsets[cell]:offsets[cell + 1]])
+        return candidates
 
-        #Obtener coordenadas
-        coordinates_from = frm.get_coordinates()
+    '''
+    Busca los vertices mas cercanos a un grupo de puntos de la misma celda. Los
+    anillos se recorren una sola vez para todo el grupo y cada punto deja de
+    buscar en cuanto su resultado no puede mejorar.
+    Entradas:
+        * row, column: Celda de los puntos
+        * points: Lista de coordenadas (latitud, longitud)
+        * k: Numero de vertices por punto, o None para todos los del radio
+        * radius: Distancia maxima en metros, o None para no limitarla
+    Salida: Lista, por punto, de tuplas (distancia, id) de menor a mayor.
+    '''
+    def _search(self, row, column, points, k, radius):
+        sin_lats, cos_lats, lngs = self.frozen.trigonometric()
+        queries = []
+        for latitude, longitude in points:
+            lat1 = radians(latitude)
+            # Mayor diferencia de longitud, sin dar la vuelta al globo, con la
+            # que un vertice del rectangulo sigue a la misma diferencia
+            # angular de longitud
+            span = radians(max(abs(longitude - self.min_longitude),
+                               abs(longitude - self.min_longitude - self.columns * self.cell_width)))
+            queries.append((sin(lat1), cos(lat1), radians(longitude), 2 * pi - span))
+        results = [[] for _ in points]
+
+        # Primer anillo que toca la rejilla y ultimo anillo con celdas
+        first = max(0, -row, row - self.rows + 1, -column, column - self.columns + 1)
+        last = max(row, self.rows - 1 - row, column, self.columns - 1 - column)
+        pending = list(range(len(points)))
+        d = first
+        while pending and d <= last:
+            candidates = self._ring(row, column, d)
+            searching = []
+            for q in pending:
+                sin_lat1, cos_lat1, lng1, wrap = queries[q]
+                found = results[q]
+                for v in candidates:
+                    distance = _great_circle(sin_lat1, cos_lat1, lng1, sin_lats[v], cos_lats[v], lngs[v])
+                    if radius is None or distance <= radius:
+                        found.append((distance, v))
+
+                # Los vertices que faltan estan a mas de d celdas en latitud,
+                # y por lo tanto a mas de d * cell_size metros sobre un
+                # meridiano, o a mas de d celdas en longitud, y por lo tanto
+                # mas lejos que el meridiano a esa diferencia de longitud
+                alpha = min(radians(d * self.cell_width), wrap, pi / 2)
+                bound = min(d * self.cell_size,
+                            EARTH_RADIUS * asin(cos_lat1 * sin(max(alpha, 0.0))) * 1000)
+                if radius is not None and bound > radius:
+                    continue
+                if k is not None and len(found) >= k:
+                    found.sort()
+                    del found[k:]
+                    if found[-1][0] <= bound:
+                        continue
+                searching.append(q)
+            pending = searching
+            d = d + 1
+
+        ids = self.frozen.ids
+        return [[(distance, ids[v]) for distance, v in sorted(found)[:k]] for found in results]
 
-        #Iterar en todos los vertices existentes en el grafo
-        for i in range(graph.num_vertices):
+    '''
+    Agrupa los puntos de una consulta por lotes segun su celda y busca cada
+    grupo de una vez.
+    Salida: Lista con el resultado de cada punto, en el orden de entrada.
+    '''
+    def _search_many(self, latitudes, longitudes, k, radius):
+        groups = {}
+        for i, (latitude, longitude) in enumerate(zip(latitudes, longitudes)):
+            groups.setdefault(self._cell(latitude, longitude), []).append(i)
+
+        results = [None] * len(latitudes)
+        for (row, column), group in groups.items():
+            points = [(latitudes[i], longitudes[i]) for i in group]
+            for i, result in zip(group, self._search(row, column, points, k, radius)):
+                results[i] = result
+        return results
 
-            #Obtener nodo y coordenadas del nodo a medir su distancia
-            to_node = graph.get_vertex(i)
-            coordinates_to = to_node.get_coordinates()
+    '''
+    Busca los k vertices mas cercanos a unas coordenadas.
+    Entradas:
+        * latitude, longitude: Coordenadas del punto, por ejemplo de un GPS
+        * k: Numero de vertices
+    Salida: Lista de hasta k tuplas (distancia en metros, id) de menor a mayor
+    distancia.
+    '''
+    def nearest(self, latitude, longitude, k = 1):
+        if k <= 0:
+            return []
+        row, column = self._cell(latitude, longitude)
+        return self._search(row, column, [(latitude, longitude)], k, None)[0]
 
-            #Calcular la distancia
-            dist = station.distance(coordinates_from, coordinates_to)
+    '''
+    Busca los vertices que estan a lo mas a cierta distancia de unas
+    coordenadas.
+    Entradas:
+        * latitude, longitude: Coordenadas del punto
+        * radius: Distancia maxima en metros
+    Salida: Lista de tuplas (distancia en metros, id) de menor a mayor
+    distancia.
+    '''
+    def within(self, latitude, longitude, radius):
+        row, column = self._cell(latitude, longitude)
+        return self._search(row, column, [(latitude, longitude)], None, radius)[0]
 
-            #Ingresar estacion y distancia al diccionario
-            heuristic.setdefault(i, dist)
+    '''
+    Version por lotes de nearest. Los puntos que caen en la misma celda se
+    buscan juntos, recorriendo sus anillos una sola vez.
+    Entradas:
+        * latitudes, longitudes: Secuencias con las coordenadas de cada punto
+        * k: Numero de vertices por punto
+    Salida: Lista con el resultado de nearest para cada punto.
+    '''
+    def nearest_many(self, latitudes, longitudes, k = 1):
+        if k <= 0:
+            return [[] for _ in latitudes]
+        return self._search_many(latitudes, longitudes, k, None)
 
-        return heuristic
+    '''
+    Version por lotes de within.
+    Entradas:
+        * latitudes, longitudes: Secuencias con las coordenadas de cada punto
+        * radius: Distancia maxima en metros
+    Salida: Lista con el resultado de within para cada punto.
+    '''
+    def within_many(self, latitudes, longitudes, radius):
+        return self._search_many(latitudes, longitudes, None, radius)
 
 """# **Clase Station**
 Esta clase se encarga de almacenar el diccionario completo de estaciones que se van a utilizar. Para la construccion de este tipo de estructura de datos se utiliza la funcion `build_all_stations`, la cual agrega el nombre de la estacion, y una lista que contiene el id que va a tener dentro de la ejecucion de este proyecto en conjunto con las coordenadas terrestres (latitud, longitud) en la que se ubica la estacion.
@@ -613,13 +4527,116 @@ Esta clase se encarga de almacenar el diccionario completo de estaciones que se
 
 Es por ello que se ha ingresado todas las coordenadas a mano, extrayendolas del sitio de Google Maps una a una. Es mas tedioso pero asegura que las coordenadas sean las mas exactas posibles.
 
+Para convertir rutas en nombres de estaciones sin recorrer el diccionario completo por cada parada, `build_all_stations` construye dos indices: `by_id`, que relaciona cada id con un registro `StationRecord` (id, nombre y coordenadas), y `by_name`, que relaciona cada nombre con su id. El diccionario `stations` cuenta sus cambios (agregar, reemplazar o quitar estaciones, o asignar otro diccionario), y los metodos de consulta reconstruyen los indices cuando el diccionario cambio desde la ultima vez. Modificar la lista `[id, coordenadas]` de una estacion en su lugar no se detecta: para cambiarla se asigna una lista nueva, `s.stations[nombre] = [id, coordenadas]`.
+
 Aunque hay algunos mapas libres, no dan las coordenadas exactas, y otros requieren una llave de la API *(API key)* para funcionar, y para que esta tenga alguna utilidad el desarrollador se ve obligado a pagar, como es el caso de Google Maps.
 """
 
+class StationRecord:
+
+    __slots__ = ('id', 'name', 'coordinates')
+
+    def __init__(self, id, name, coordinates):
+        self.id = id
+        self.name = name
+        self.coordinates = coordinates # (latitud, longitud)
+
+    def __repr__(self):
+        return '{}, {}, {}'.format(repr(self.id), repr(self.name), repr(self.coordinates))
+
+'''
+Diccionario de estaciones que cuenta sus modificaciones en version, para que
+Station sepa cuando debe reconstruir sus indices.
+'''
+class _StationDict(dict):
+
+    # Valor inicial tambien para los diccionarios que pickle reconstruye
+    # agregando las entradas antes de restaurar los atributos
+    version = 0
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.version += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def setdefault(self, key, default = None):
+        if key not in self:
+            self.version += 1
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self.version += 1
+        return dict.popitem(self)
+
+    def clear(self):
+        dict.clear(self)
+        self.version += 1
+
 class Station:
 
     def __init__(self):
         self.stations = {}
+        self.platforms = {}
+        self.by_id = {}
+        self.by_name = {}
+        # Diccionarios y versiones con los que se construyeron los indices
+        self._indexed = None
+
+    '''
+    Diccionario {nombre: [id, (latitud, longitud)]} de las estaciones. Al
+    asignarle otro diccionario se copia en uno que cuenta sus cambios.
+    '''
+    @property
+    def stations(self):
+        return self._stations
+
+    @stations.setter
+    def stations(self, stations):
+        self._stations = stations if isinstance(stations, _StationDict) else _StationDict(stations)
+
+    '''
+    Diccionario {id: [nombre, (latitud, longitud)]} de las paradas cuyo nombre
+    ya usa otra estacion de stations, por ejemplo una parada por plataforma en
+    GTFS. No aparecen en by_name, pero si en by_id, por lo que sus ids se
+    convierten en nombres igual que los de stations.
+    '''
+    @property
+    def platforms(self):
+        return self._platforms
+
+    @platforms.setter
+    def platforms(self, platforms):
+        self._platforms = platforms if isinstance(platforms, _StationDict) else _StationDict(platforms)
+
+    '''
+    Agrega una parada. Si su nombre no existe se agrega a stations; si ya lo
+    usa otra parada se agrega a platforms.
+    Entradas:
+        * id: id de la parada
+        * name: Nombre de la parada
+        * coordinates: Coordenadas (latitud, longitud)
+    '''
+    def add_stop(self, id, name, coordinates):
+        entry = self._stations.get(name)
+        if entry is None:
+            self._stations[name] = [id, coordinates]
+        elif entry[0] != id:
+            self._platforms[id] = [name, coordinates]
     '''
     Metodo para agregar las estaciones a un diccionario de datos. Se agrega el
     nombre de la estacion, junto a una lista que contiene el id que va a tener
@@ -672,6 +4689,63 @@ class Station:
         self.stations.setdefault('Concejo de Bogotá', [40, (4.626496, -74.080722)])
         self.stations.setdefault('Centro Memoria', [41, (4.621915, -74.077436)])
         self.stations.setdefault('U. Nacional', [42, (4.636493, -74.079328)])
+
+        self.build_index()
+
+    '''
+    Construye los indices de las estaciones a partir del diccionario stations:
+        * by_id: {id: StationRecord}, de stations y platforms
+        * by_name: {nombre: id}
+    Si varias estaciones tienen el mismo id se conserva la primera, igual que
+    get_station_by_id. Los metodos de consulta lo llaman de nuevo cuando
+    stations cambio desde la ultima vez (ver _refresh_index).
+    '''
+    def build_index(self):
+        self.by_id = {}
+        self.by_name = {}
+        for name, (id, coordinates) in self.stations.items():
+            self.by_id.setdefault(id, StationRecord(id, name, coordinates))
+            self.by_name[name] = id
+        for id, (name, coordinates) in self.platforms.items():
+            self.by_id.setdefault(id, StationRecord(id, name, coordinates))
+        self._indexed = self._index_key()
+
+    '''
+    Identifica el contenido actual de stations y platforms: los objetos y
+    sus versiones.
+    '''
+    def _index_key(self):
+        return (id(self._stations), self._stations.version, id(self._platforms), self._platforms.version)
+
+    '''
+    Reconstruye los indices si stations o platforms son otros diccionarios o
+    si cambiaron desde que se construyeron.
+    '''
+    def _refresh_index(self):
+        if self._indexed != self._index_key():
+            self.build_index()
+
+    '''
+    Obtiene el registro de una estacion dado su id.
+    Entrada:
+        * id: id de la estacion
+    Salida:
+        Objeto de la clase StationRecord, o None si no existe.
+    '''
+    def get_record(self, id):
+        self._refresh_index()
+        return self.by_id.get(id)
+
+    '''
+    Obtiene el id de una estacion dado su nombre.
+    Entrada:
+        * name: Nombre de la estacion
+    Salida:
+        El id de la estacion, o None si no existe.
+    '''
+    def get_id_by_name(self, name):
+        self._refresh_index()
+        return self.by_name.get(name)
     '''
     Mide la distancia entre 2 coordenadas geograficas.
     Entradas:
@@ -679,11 +4753,11 @@ class Station:
         * to: Coordenadas geograficas del sitio 2
     Salida:
         La distancia en metros entre 2 puntos utilizando el algoritmo gran circulo
-        de la libreria Geopy
+        (el mismo resultado que la libreria Geopy)
     '''
     def distance(self, frm, to):
         
-        return float(great_circle(frm, to).meters)
+        return great_circle_distance(frm, to)
 
     '''
     Metodo que se encarga de crear las conexiones entre 2 estaciones en el grafo.
@@ -694,9 +4768,9 @@ class Station:
     '''
     def set_connections_stations(self, graph, frm, to):
 
-        #Se obtienen los IDs de los nodos de incio y fin de la clase Vertex
-        frm = vertex[self.stations[frm][0]]
-        to = vertex[self.stations[to][0]]
+        #Se obtienen los nodos de incio y fin de la clase Vertex
+        frm = graph.get_vertex(self.stations[frm][0])
+        to = graph.get_vertex(self.stations[to][0])
 
         #Calcula el costo
         cost = self.distance(frm.get_coordinates(), to.get_coordinates())
@@ -713,6 +4787,10 @@ class Station:
         Retorna el nombre de la estacion. Si no se encontro retorna None.
     '''
     def get_station_by_id(self, dictionary, value):
+        if dictionary is self.stations:
+            record = self.get_record(value)
+            return record.name if record is not None else None
+
         for s in dictionary:
             if dictionary[s][0] == value:
                 return s
@@ -727,196 +4805,801 @@ class Station:
         * Lista con los nombre de las estaciones que conforman la mejor ruta optima
     '''
     def convert_id_to_station(self, list_stations_id):
+        self._refresh_index()
+
+        by_id = self.by_id
         new_list = []
         for id in list_stations_id:
-            name_station = self.get_station_by_id(self.stations, id)
-            new_list.append(name_station)
+            record = by_id.get(id)
+            new_list.append(record.name if record is not None else None)
         return new_list
 
-"""# **Inicializacion de objetos**
+"""# **Clase NetworkLoader**
 
-Para poder utilizar las funciones, crear y tener acceso al grafo y a las estaciones se procede a instanciar objetos de algunas clases vistas anteriormente.
+> Carga la red de estaciones desde archivos de texto con el formato de GTFS (o cualquier CSV con las mismas columnas), en lugar de escribir cada estacion y cada conexion en el codigo:
 
-> `g` sera el objeto del grafo, almacena el grafo y los vertices, ademas tiene las operaciones para agregar vertices y aristas con los pesos correspondientes.
+*   `stops.txt`: columnas `stop_id`, `stop_name`, `stop_lat` y `stop_lon`. Los `stop_id` formados solo por digitos se convierten a enteros, igual que los ids de `build_all_stations`.
+*   `transfers.txt`: columnas `from_stop_id` y `to_stop_id`. Cada fila es una conexion en ambas direcciones.
 
-> `s` va a ser el objeto para la clase `Station`, el cual contiene el diccionario con las estaciones a crear y las operaciones sobre estas estaciones.
+Los archivos se leen fila por fila y sus valores se guardan directamente en arreglos, sin construir listas de filas. Los vertices y las aristas se agregan al grafo en bloque (`Graph.add_vertices`, `Graph.add_edges`), y el peso de cada conexion se calcula desde las posiciones de sus estaciones con la formula de `great_circle_distance`, reutilizando los senos y cosenos de cada estacion, por lo que la memoria adicional es de unos pocos arreglos del tamaño de la red. Si varias paradas tienen el mismo `stop_name` (por ejemplo una por plataforma) la primera queda en `Station.stations` y las demas en `Station.platforms`, y todas se convierten en nombres con `convert_id_to_station`.
 
-Por ultimo, tenemos la variable `tree`, el cual actuara como instancia de la clase `TreeSearch`, y contendra todos los elementos para la busqueda de rutas mas cortas utilizando diferentes algoritmos informados y no informados.
+La red de este proyecto esta en la carpeta `data`.
 """
 
-g = Graph()
-s = Station()
-tree = TreeSearch(g)
+class NetworkLoader:
+
+    # Carpeta con los archivos de la red de Transmilenio
+    DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+    '''
+    Inicializacion
+    Entradas:
+        * stops_path: Ruta del archivo de estaciones. Por defecto
+        data/stops.txt
+        * transfers_path: Ruta del archivo de conexiones. Por defecto
+        data/transfers.txt
+        * delimiter: Separador de columnas de ambos archivos
+    '''
+    def __init__(self, stops_path = None, transfers_path = None, delimiter = ','):
+        self.stops_path = stops_path or os.path.join(NetworkLoader.DATA_DIR, 'stops.txt')
+        self.transfers_path = transfers_path or os.path.join(NetworkLoader.DATA_DIR, 'transfers.txt')
+        self.delimiter = delimiter
+
+    '''
+    Convierte un stop_id en el id de la estacion.
+    '''
+    @staticmethod
+    def parse_id(value):
+        value = value.strip()
+        return int(value) if value.isdigit() else value
 
-"""# **Construccion de las estaciones**
+    '''
+    Lee el archivo de estaciones y agrega las estaciones a station y los
+    vertices a graph.
+    Salida: Diccionario {id: posicion} de las estaciones leidas, y los
+    arreglos de latitudes y longitudes en ese orden.
+    '''
+    def load_stops(self, graph, station):
+        ids = []
+        latitudes = array('d')
+        longitudes = array('d')
+        positions = {}
+
+        with open(self.stops_path, newline = '', encoding = 'utf-8-sig') as f:
+            reader = csv.reader(f, delimiter = self.delimiter)
+            header = next(reader)
+            id_column = header.index('stop_id')
+            name_column = header.index('stop_name')
+            lat_column = header.index('stop_lat')
+            lon_column = header.index('stop_lon')
+
+            for row in reader:
+                if not row:
+                    continue
+                node = NetworkLoader.parse_id(row[id_column])
+                x = float(row[lat_column])
+                y = float(row[lon_column])
+                positions[node] = len(ids)
+                ids.append(node)
+                latitudes.append(x)
+                longitudes.append(y)
+                station.add_stop(node, row[name_column], (x, y))
+
+        graph.add_vertices(ids, latitudes, longitudes)
+        station.build_index()
+        return positions, latitudes, longitudes
 
-Mediante el metodo `build_all_stations` de la clase `Station` construimos todas las estaciones que vamos a utilizar y posteriormente guardandolas en el diccionario que se aloja en la anterior clase mencionada.
+    '''
+    Lee el archivo de conexiones y agrega las aristas a graph, calculando
+    todos los pesos en un solo recorrido.
+    Entradas:
+        * graph: Grafo de la clase Graph
+        * positions, latitudes, longitudes: Resultado de load_stops
+    Excepciones:
+        * ValueError: Se produce cuando una conexion usa una estacion que no
+        existe en el archivo de estaciones.
+    '''
+    def load_transfers(self, graph, positions, latitudes, longitudes):
+        frm_positions = array('l')
+        to_positions = array('l')
+
+        with open(self.transfers_path, newline = '', encoding = 'utf-8-sig') as f:
+            reader = csv.reader(f, delimiter = self.delimiter)
+            header = next(reader)
+            from_column = header.index('from_stop_id')
+            to_column = header.index('to_stop_id')
+
+            for row in reader:
+                if not row:
+                    continue
+                # Misma conversion que parse_id, sin una llamada por valor
+                frm = row[from_column].strip()
+                frm = positions.get(int(frm) if frm.isdigit() else frm)
+                to = row[to_column].strip()
+                to = positions.get(int(to) if to.isdigit() else to)
+                if frm is None or to is None:
+                    raise ValueError('La conexion ' + row[from_column].strip() + ' - ' +
+                                     row[to_column].strip() + ' usa una estacion que no existe')
+                frm_positions.append(frm)
+                to_positions.append(to)
+
+        # Senos y cosenos de cada estacion, una sola vez, y el peso de cada
+        # conexion directamente desde las posiciones de sus estaciones
+        n = len(latitudes)
+        sin_lats, cos_lats, lngs = array('d', [0.0]) * n, array('d', [0.0]) * n, array('d', [0.0]) * n
+        for i in range(n):
+            lat = radians(latitudes[i])
+            sin_lats[i], cos_lats[i], lngs[i] = sin(lat), cos(lat), radians(longitudes[i])
+        costs = array('d', [0.0]) * len(frm_positions)
+        for k in range(len(frm_positions)):
+            i, j = frm_positions[k], to_positions[k]
+            costs[k] = _great_circle(sin_lats[i], cos_lats[i], lngs[i], sin_lats[j], cos_lats[j], lngs[j])
+
+        ids = [None] * n
+        for node, i in positions.items():
+            ids[i] = node
+        graph.add_edges(map(ids.__getitem__, frm_positions), map(ids.__getitem__, to_positions), costs)
 
-Por ultimo verificamos que todas las estaciones se hayan ingresado correctamente.
+    '''
+    Carga la red completa.
+    Entradas:
+        * graph: Grafo de la clase Graph. Si es None se crea uno nuevo.
+        * station: Objeto de la clase Station. Si es None se crea uno nuevo.
+    Salida: Tupla (graph, station) con la red cargada.
+    '''
+    def load(self, graph = None, station = None):
+        if graph is None:
+            graph = Graph()
+        if station is None:
+            station = Station()
+
+        # La carga solo crea objetos que siguen en uso (vertices, aristas y
+        # estaciones), por lo que el recolector de ciclos no libera nada y
+        # sus pasadas sobre la red a medio construir solo agregan tiempo
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            positions, latitudes, longitudes = self.load_stops(graph, station)
+            self.load_transfers(graph, positions, latitudes, longitudes)
+        finally:
+            if collecting:
+                gc.enable()
+        return graph, station
+
+"""# **Clase Timetable**
+
+> Enrutamiento con horarios (algoritmo RAPTOR). El grafo solo tiene distancias, por lo que no puede responder "a que hora llego si salgo a las 07:40". `Timetable` guarda los horarios de los buses en arreglos y responde esa consulta por rondas: en la ronda k se recorren una sola vez las rutas que pasan por las estaciones mejoradas en la ronda anterior, tomando en cada estacion el primer viaje que todavia se puede alcanzar, de modo que la ronda k encuentra las mejores llegadas con k buses. No se construye un grafo expandido en el tiempo (un vertice por parada de cada viaje).
+
+*   **Rutas:** los viajes con la misma linea y la misma secuencia de estaciones forman una ruta. Las estaciones de cada ruta, y los tiempos de llegada y salida de todos sus viajes (ordenados por hora de salida), se guardan en arreglos `array('l')` contiguos, en segundos desde la medianoche. Si un viaje adelanta a otro de la misma ruta se separa en otra ruta, para que el primer viaje alcanzable se pueda buscar por biseccion.
+*   **Estaciones:** se usan los mismos ids de `Station`, y para cada estacion se guardan las rutas que pasan por ella y su posicion en cada una.
+*   **Transbordos:** cambiar de bus en una estacion toma `transfer_time` segundos.
+
+Los horarios se cargan con `Timetable.load` desde archivos con el formato de GTFS (`trips.txt`, `stop_times.txt` y, si existe, `frequencies.txt`); los de este proyecto estan en la carpeta `data`.
 """
 
-s.build_all_stations()
-s.stations
+class Journey:
+
+    __slots__ = ('departure', 'arrival', 'legs')
 
-"""# **Agregar vertices al grafo**
+    '''
+    Inicializacion
+    Entradas:
+        * departure: Hora de salida en segundos desde la medianoche
+        * arrival: Hora de llegada en segundos desde la medianoche
+        * legs: Lista de tramos, cada uno una tupla (linea, id de la estacion
+        donde se sube, hora de salida, id de la estacion donde se baja, hora de
+        llegada)
+    '''
+    def __init__(self, departure, arrival, legs):
+        self.departure = departure
+        self.arrival = arrival
+        self.legs = legs
 
-Cada estacion es un estado del problema, por lo tanto cada estacion sera un vertice del grafo.
+    '''
+    Numero de transbordos del viaje.
+    '''
+    @property
+    def transfers(self):
+        return max(len(self.legs) - 1, 0)
 
-> Para lograr esto se añadira cada estacion como un vertice, apoyandonos en la funcion `add_vertex` de la clase `Graph` utilizando solamente el id de la estacion y las coordenadas que estan guardadas en el diccionario de estaciones.
+    '''
+    Describe el viaje con un texto por tramo, por ejemplo
+    "07:41 B1 Calle 100 -> 08:05 AV. Jiménez".
+    Entradas:
+        * station: Objeto de la clase Station para mostrar los nombres de las
+        estaciones. Si es None se muestran los ids.
+    Salida: Lista de textos.
+    '''
+    def describe(self, station = None):
+        def name(id):
+            record = station.get_record(id) if station is not None else None
+            return record.name if record is not None else str(id)
 
-Por ultimo se verifican que los vertices se hayan agregado correctamente y que se haya creado el diccionario correctamente guardando todos los ids en un nuevo diccionario de muestra.
-"""
+        return ['{} {} {} -> {} {}'.format(Timetable.format_time(departure), line, name(frm),
+                                            Timetable.format_time(arrival), name(to))
+                for line, frm, departure, to, arrival in self.legs]
 
-vertex = {}
-#CREAR VERTICES
-i = 0
-for index in s.stations:
-    v = g.add_vertex(s.stations[index][0], s.stations[index][1])
-    #print(s.stations[index][0], s.stations[index][1])
-    vertex.setdefault(i, v)
-    i = i + 1
+    def __repr__(self):
+        return 'Journey({} -> {}, transfers={}, legs={})'.format(
+            Timetable.format_time(self.departure), Timetable.format_time(self.arrival),
+            self.transfers, self.legs)
 
-vertex
+class Timetable:
 
-"""# **Impresion de las estaciones**
+    # Segundos necesarios para cambiar de bus en una estacion
+    DEFAULT_TRANSFER_TIME = 60
 
-Para verificar que las estaciones e hayan agregado se imprime el id y el nombre de la estacion.
-"""
+    '''
+    Inicializacion. Agrupa los viajes en rutas y los guarda en arreglos.
+    Entradas:
+        * trips: Lista de viajes, cada uno una tupla (linea, lista de ids de
+        estaciones, lista de horas de llegada, lista de horas de salida). Las
+        horas son segundos desde la medianoche.
+        * transfer_time: Segundos necesarios para cambiar de bus
+    '''
+    def __init__(self, trips, transfer_time = DEFAULT_TRANSFER_TIME):
+        self.transfer_time = transfer_time
+        self.stop_ids = []
+        self.index = {}
+
+        groups = {}
+        for line, stops, arrivals, departures in trips:
+            for id in stops:
+                if id not in self.index:
+                    self.index[id] = len(self.stop_ids)
+                    self.stop_ids.append(id)
+            groups.setdefault((line, tuple(stops)), []).append((arrivals, departures))
+
+        self.route_names = []
+        self.route_stop_offsets = array('l', [0])
+        self.route_stops = array('l')
+        self.route_time_offsets = array('l', [0])
+        self.arrivals = array('l')
+        self.departures = array('l')
+        stop_routes = [[] for _ in self.stop_ids]
+
+        for (line, stops), group in groups.items():
+            # Cada cadena es una ruta en la cual ningun viaje adelanta a otro
+            chains = []
+            for arrivals, departures in sorted(group, key = lambda trip: (trip[1][0], trip[0][-1])):
+                for chain in chains:
+                    last_arrivals, last_departures = chain[-1]
+                    if all(a >= b for a, b in zip(arrivals, last_arrivals)) and \
+                       all(a >= b for a, b in zip(departures, last_departures)):
+                        chain.append((arrivals, departures))
+                        break
+                else:
+                    chains.append([(arrivals, departures)])
+
+            for chain in chains:
+                r = len(self.route_names)
+                self.route_names.append(line)
+                for position, id in enumerate(stops):
+                    stop_routes[self.index[id]].append((r, position))
+                self.route_stops.extend(self.index[id] for id in stops)
+                self.route_stop_offsets.append(len(self.route_stops))
+                for arrivals, departures in chain:
+                    self.arrivals.extend(arrivals)
+                    self.departures.extend(departures)
+                self.route_time_offsets.append(len(self.arrivals))
+
+        self.stop_route_offsets = array('l', [0])
+        self.stop_routes = array('l')
+        self.stop_positions = array('l')
+        for routes in stop_routes:
+            for r, position in routes:
+                self.stop_routes.append(r)
+                self.stop_positions.append(position)
+            self.stop_route_offsets.append(len(self.stop_routes))
 
-for station in s.stations:
-    print(s.stations[station][0], station)
+    '''
+    Convierte una hora HH:MM o HH:MM:SS en segundos desde la medianoche. Las
+    horas pueden ser mayores a 24, como en GTFS. Los enteros se retornan sin
+    cambios.
+    '''
+    @staticmethod
+    def parse_time(value):
+        if isinstance(value, int):
+            return value
+        parts = [int(part) for part in value.strip().split(':')]
+        if len(parts) == 2:
+            parts.append(0)
+        return parts[0] * 3600 + parts[1] * 60 + parts[2]
 
-"""# **Conectar estaciones**
+    '''
+    Convierte segundos desde la medianoche en una hora HH:MM:SS.
+    '''
+    @staticmethod
+    def format_time(seconds):
+        return '{:02d}:{:02d}:{:02d}'.format(seconds // 3600, seconds // 60 % 60, seconds % 60)
 
-Utilizando la funcion `Station.distance` para obtener el costo entre 2 estaciones y luego `Graph.add_edge` para conectar 2 vertices, se procede a crear las conexiones entre 2 estaciones con el metodo `Station.set_connections_stations`, pasandole como parametros el nombre de las 2 estaciones a conectar. Este metodo busca las estaciones y escoge el id de cada estacion para luego buscar su vertice correspondiente con este numero de identificacion qeu se aloja en el diccionario del grafo, conectandolos asi utilizando el objeto `g` de la clase `Graph.`.
-"""
+    '''
+    Lee los viajes de los archivos trips.txt y stop_times.txt de GTFS (ver
+    load).
+    Salida: Diccionario {trip_id: linea} y diccionario {trip_id: lista de
+    tuplas (stop_sequence, id de la estacion, llegada, salida)} ordenadas por
+    stop_sequence.
+    Excepciones:
+        * ValueError: Se produce cuando un horario usa un viaje o una estacion
+        que no existe.
+    '''
+    @staticmethod
+    def read_trips(station = None, stop_times_path = None, trips_path = None, delimiter = ','):
+        stop_times_path = stop_times_path or os.path.join(NetworkLoader.DATA_DIR, 'stop_times.txt')
+        trips_path = trips_path or os.path.join(NetworkLoader.DATA_DIR, 'trips.txt')
+        parse_time = Timetable.parse_time
+
+        lines = {}
+        with open(trips_path, newline = '', encoding = 'utf-8-sig') as f:
+            reader = csv.reader(f, delimiter = delimiter)
+            header = next(reader)
+            route_column = header.index('route_id')
+            trip_column = header.index('trip_id')
+            for row in reader:
+                if row:
+                    lines[row[trip_column].strip()] = row[route_column].strip()
+
+        stop_times = {}
+        with open(stop_times_path, newline = '', encoding = 'utf-8-sig') as f:
+            reader = csv.reader(f, delimiter = delimiter)
+            header = next(reader)
+            trip_column = header.index('trip_id')
+            arrival_column = header.index('arrival_time')
+            departure_column = header.index('departure_time')
+            stop_column = header.index('stop_id')
+            sequence_column = header.index('stop_sequence')
+            for row in reader:
+                if not row:
+                    continue
+                trip = row[trip_column].strip()
+                id = NetworkLoader.parse_id(row[stop_column])
+                if trip not in lines:
+                    raise ValueError('El viaje ' + trip + ' no existe en ' + trips_path)
+                if station is not None and station.get_record(id) is None:
+                    raise ValueError('El viaje ' + trip + ' usa una estacion que no existe: ' + str(id))
+                stop_times.setdefault(trip, []).append((int(row[sequence_column]), id,
+                                                        parse_time(row[arrival_column]),
+                                                        parse_time(row[departure_column])))
+
+        for rows in stop_times.values():
+            rows.sort()
+        return lines, stop_times
 
-s.set_connections_stations(g, 'Portal Norte', 'Toberin')
-s.set_connections_stations(g, 'Toberin', 'Calle 161')
-s.set_connections_stations(g, 'Calle 161', 'Mazuren')
-s.set_connections_stations(g, 'Mazuren', 'Calle 146')
-s.set_connections_stations(g, 'Calle 146', 'Calle 142')
-s.set_connections_stations(g, 'Calle 142', 'Alcala')
-s.set_connections_stations(g, 'Alcala', 'Prado')
-s.set_connections_stations(g, 'Prado', 'Calle 127')
-s.set_connections_stations(g, 'Calle 127', 'Pepe Sierra')
-s.set_connections_stations(g, 'Pepe Sierra', 'Calle 106')
-s.set_connections_stations(g, 'Calle 106', 'Calle 100')
-s.set_connections_stations(g, 'Calle 100', 'La Castellana')
-s.set_connections_stations(g, 'La Castellana', 'NQS-Calle 75')
-s.set_connections_stations(g, 'NQS-Calle 75', 'AV. Chile')
-s.set_connections_stations(g, 'AV. Chile', 'Simon Bolivar')
-s.set_connections_stations(g, 'Simon Bolivar', 'Movistar Arena')
-s.set_connections_stations(g, 'Movistar Arena', 'Campin - U. Antonio Nariño')
-s.set_connections_stations(g, 'Campin - U. Antonio Nariño', 'U. Nacional')
-s.set_connections_stations(g, 'U. Nacional', 'AV. El Dorado')
-s.set_connections_stations(g, 'AV. El Dorado', 'CAD')
-s.set_connections_stations(g, 'CAD', 'Paloquemao')
-s.set_connections_stations(g, 'Paloquemao', 'Ricaurte')
-s.set_connections_stations(g, 'Ricaurte', 'San Façon')
-s.set_connections_stations(g, 'San Façon', 'De La Sabana')
-s.set_connections_stations(g, 'De La Sabana', 'AV. Jiménez')
-s.set_connections_stations(g, 'Calle 100', 'Virrey')
-s.set_connections_stations(g, 'Virrey', 'Calle 85')
-s.set_connections_stations(g, 'Calle 85', 'Héroes')
-s.set_connections_stations(g, 'Héroes', 'Calle 76')
-s.set_connections_stations(g, 'Calle 76', 'Calle 72')
-s.set_connections_stations(g, 'Calle 72', 'Flores')
-s.set_connections_stations(g, 'Flores', 'Calle 63')
-s.set_connections_stations(g, 'Calle 63', 'Calle 57')
-s.set_connections_stations(g, 'Calle 57', 'Marly')
-s.set_connections_stations(g, 'Marly', 'Calle 45')
-s.set_connections_stations(g, 'Calle 45', 'AV. 39')
-s.set_connections_stations(g, 'AV. 39', 'Calle 34')
-s.set_connections_stations(g, 'Calle 34', 'Calle 26')
-s.set_connections_stations(g, 'Calle 26', 'Calle 22')
-s.set_connections_stations(g, 'Calle 22', 'Calle 19')
-s.set_connections_stations(g, 'Calle 19', 'AV. Jiménez')
-s.set_connections_stations(g, 'Calle 26', 'Centro Memoria')
-s.set_connections_stations(g, 'Centro Memoria', 'Concejo de Bogotá')
-s.set_connections_stations(g, 'Concejo de Bogotá', 'AV. El Dorado')
-s.set_connections_stations(g, 'Concejo de Bogotá', 'CAD')
-
-g.get_dictionary()
-
-"""**Verificar Conexion**
-
-Se imprime la creacion del grafo, la conexion entre cada nodo y su peso. Por ultimo se muestran los vertices adyacentes por cada vertice.
-"""
+    '''
+    Lee las secuencias de estaciones de cada linea, sin sus horarios.
+    Entradas: Las mismas de read_trips.
+    Salida: Diccionario {linea: lista de secuencias distintas de ids de
+    estaciones}, por ejemplo una por sentido.
+    '''
+    @staticmethod
+    def load_lines(station = None, stop_times_path = None, trips_path = None, delimiter = ','):
+        lines, stop_times = Timetable.read_trips(station, stop_times_path, trips_path, delimiter)
+        sequences = {}
+        for trip, rows in stop_times.items():
+            sequence = [id for sequence, id, arrival, departure in rows]
+            if sequence not in sequences.setdefault(lines[trip], []):
+                sequences[lines[trip]].append(sequence)
+        return sequences
 
-for v in g:
-    for w in v.get_connections():
-        vid = v.get_id()
-        wid = w.get_id()
-        print ('( %s , %s, %3d)'  % ( vid, wid, v.get_weight(w)))
+    '''
+    Carga los horarios desde archivos con el formato de GTFS:
+        * trips.txt: columnas route_id y trip_id. route_id es el nombre de la
+        linea.
+        * stop_times.txt: columnas trip_id, arrival_time, departure_time,
+        stop_id y stop_sequence.
+        * frequencies.txt (opcional): columnas trip_id, start_time, end_time y
+        headway_secs. Los viajes con frecuencia son plantillas: se repiten cada
+        headway_secs segundos desde start_time hasta antes de end_time.
+    Entradas:
+        * station: Objeto de la clase Station. Si se indica, se verifica que
+        todas las estaciones de los horarios existan.
+        * stop_times_path, trips_path, frequencies_path: Rutas de los
+        archivos. Por defecto los de la carpeta data.
+        * delimiter: Separador de columnas de los archivos
+        * transfer_time: Segundos necesarios para cambiar de bus
+    Salida: Objeto de la clase Timetable.
+    Excepciones:
+        * ValueError: Se produce cuando un horario usa un viaje o una estacion
+        que no existe.
+    '''
+    @classmethod
+    def load(cls, station = None, stop_times_path = None, trips_path = None, frequencies_path = None,
+             delimiter = ',', transfer_time = DEFAULT_TRANSFER_TIME):
+        frequencies_path = frequencies_path or os.path.join(NetworkLoader.DATA_DIR, 'frequencies.txt')
+        parse_time = Timetable.parse_time
+        lines, stop_times = Timetable.read_trips(station, stop_times_path, trips_path, delimiter)
+
+        frequencies = {}
+        if os.path.exists(frequencies_path):
+            with open(frequencies_path, newline = '', encoding = 'utf-8-sig') as f:
+                reader = csv.reader(f, delimiter = delimiter)
+                header = next(reader)
+                trip_column = header.index('trip_id')
+                start_column = header.index('start_time')
+                end_column = header.index('end_time')
+                headway_column = header.index('headway_secs')
+                for row in reader:
+                    if row:
+                        frequencies.setdefault(row[trip_column].strip(), []).append(
+                            (parse_time(row[start_column]), parse_time(row[end_column]), int(row[headway_column])))
+
+        trips = []
+        for trip, rows in stop_times.items():
+            stops = [id for sequence, id, arrival, departure in rows]
+            arrivals = [arrival for sequence, id, arrival, departure in rows]
+            departures = [departure for sequence, id, arrival, departure in rows]
+            if trip not in frequencies:
+                trips.append((lines[trip], stops, arrivals, departures))
+                continue
+            first = departures[0]
+            for start, end, headway in frequencies[trip]:
+                for t in range(start, end, headway):
+                    trips.append((lines[trip], stops, [a - first + t for a in arrivals],
+                                  [d - first + t for d in departures]))
+
+        return cls(trips, transfer_time)
 
-for v in g:
-    print ('g.vert_dict[%s]=%s' %(v.get_id(), g.vert_dict[v.get_id()]))
+    '''
+    Busca por biseccion el primer viaje de la ruta r que sale de su posicion i
+    a la hora t o despues, entre los viajes anteriores a limit.
+    Salida: Indice del viaje, o limit si no hay ninguno.
+    '''
+    def _earliest_trip(self, r, i, t, limit):
+        length = self.route_stop_offsets[r + 1] - self.route_stop_offsets[r]
+        base = self.route_time_offsets[r] + i
+        departures = self.departures
+        low, high = 0, limit
+        while low < high:
+            middle = (low + high) // 2
+            if departures[base + middle * length] < t:
+                low = middle + 1
+            else:
+                high = middle
+        return low
 
-"""# **Escoger estaciones de inicio y destino**
+    '''
+    Crea las etiquetas de una consulta: por ronda, la mejor hora de llegada
+    a cada estacion y el tramo con el que se llego (tupla (ronda, ruta, viaje,
+    posicion donde se sube, posicion donde se baja)), y la mejor hora de
+    llegada de cualquier ronda.
+    '''
+    def _labels(self, rounds):
+        n = len(self.stop_ids)
+        arrivals = [[float('inf')] * n for _ in range(rounds + 1)]
+        parents = [[None] * n for _ in range(rounds + 1)]
+        return arrivals, parents, [float('inf')] * n
 
-Imaginemos que vamos a realizar un viaje desde una estacion a otra. para este caso se ha elegido como inicio el Portal Norte hasta la AV. Jimenez (Nodo 0 y nodo 24 correspondientemente).
+    '''
+    Ejecuta las rondas de RAPTOR desde source saliendo a la hora departure.
+    Las etiquetas se actualizan en su lugar, por lo que se pueden reutilizar
+    entre consultas con horas de salida decrecientes (ver profile).
+    '''
+    def _run(self, labels, source, target, departure, rounds):
+        arrival_labels, parents, best = labels
+        route_stop_offsets, route_stops = self.route_stop_offsets, self.route_stops
+        route_time_offsets, arrivals, departures = self.route_time_offsets, self.arrivals, self.departures
+        stop_route_offsets, stop_routes, stop_positions = self.stop_route_offsets, self.stop_routes, self.stop_positions
+
+        arrival_labels[0][source] = departure
+        parents[0][source] = None
+        best[source] = min(best[source], departure)
+        marked = set([source])
+
+        for k in range(1, rounds + 1):
+            previous, current, current_parents = arrival_labels[k - 1], arrival_labels[k], parents[k]
+            previous_parents = parents[k - 1]
+            for p, t in enumerate(previous):
+                if t < current[p]:
+                    current[p] = t
+                    current_parents[p] = previous_parents[p]
+
+            # Rutas que pasan por las estaciones mejoradas y la primera
+            # posicion mejorada de cada una
+            queue = {}
+            for p in marked:
+                for j in range(stop_route_offsets[p], stop_route_offsets[p + 1]):
+                    r, i = stop_routes[j], stop_positions[j]
+                    if queue.get(r, i + 1) > i:
+                        queue[r] = i
+            marked = set()
+            change = self.transfer_time if k > 1 else 0
+
+            for r, first in queue.items():
+                offset = route_stop_offsets[r]
+                length = route_stop_offsets[r + 1] - offset
+                base = route_time_offsets[r]
+                count = (route_time_offsets[r + 1] - base) // length
+                trip = count
+                board = -1
+                for i in range(first, length):
+                    p = route_stops[offset + i]
+                    if trip < count:
+                        a = arrivals[base + trip * length + i]
+                        if a < best[p] and a < best[target]:
+                            current[p] = a
+                            best[p] = a
+                            current_parents[p] = (k, r, trip, board, i)
+                            marked.add(p)
+
+                    t = previous[p] + change
+                    if trip == count or t < departures[base + trip * length + i]:
+                        earlier = self._earliest_trip(r, i, t, trip) if t != float('inf') else trip
+                        if earlier < trip:
+                            trip = earlier
+                            board = i
+
+            if not marked:
+                break
 
-Para lograr esto obtenemos los nodos con la funcion `Graph.get_vertex` y los guardamos en una variable, lo que nos devolvera sera un objeto de la clase `Vertex`.
-"""
+    '''
+    Reconstruye el viaje que llega a target en la ronda k (al menos un
+    tramo, ya que target no es el origen).
+    '''
+    def _journey(self, labels, target, k):
+        parents = labels[1]
+        legs = []
+        p = target
+        label = parents[k][p]
+        while label is not None:
+            k, r, trip, board, alight = label
+            offset = self.route_stop_offsets[r]
+            length = self.route_stop_offsets[r + 1] - offset
+            base = self.route_time_offsets[r] + trip * length
+            frm = self.route_stops[offset + board]
+            legs.append((self.route_names[r], self.stop_ids[frm], self.departures[base + board],
+                         self.stop_ids[p], self.arrivals[base + alight]))
+            p = frm
+            label = parents[k - 1][p]
+
+        legs.reverse()
+        return Journey(legs[0][2], legs[-1][4], legs)
 
-node_from = g.get_vertex(0)
-node_to = g.get_vertex(24)
+    '''
+    Obtiene la ronda con la mejor llegada a target usando el menor numero de
+    buses, o None si no se llego.
+    '''
+    def _best_round(self, labels, target):
+        arrival = labels[2][target]
+        if arrival == float('inf'):
+            return None
+        for k, round_labels in enumerate(labels[0]):
+            if round_labels[target] == arrival:
+                return k
 
-"""# **Ejecucion de los algoritmos de busqueda**
+    '''
+    Calcula el viaje que llega mas temprano.
+    Entradas:
+        * source: id de la estacion de origen
+        * target: id de la estacion de destino
+        * departure: Hora de salida (HH:MM, HH:MM:SS o segundos desde la
+        medianoche)
+        * max_transfers: Numero maximo de transbordos
+    Salida: Objeto de la clase Journey con la llegada mas temprana y, entre
+    los viajes con esa llegada, el de menos transbordos. None si no se puede
+    llegar.
+    Excepciones:
+        * KeyError: Se produce cuando una estacion no tiene horarios.
+    '''
+    def earliest_arrival(self, source, target, departure, max_transfers = 4):
+        departure = Timetable.parse_time(departure)
+        s, t = self.index[source], self.index[target]
+        if s == t:
+            return Journey(departure, departure, [])
 
-Se procede a llamar a los metodos de busqueda alojados en la clase `TreeSearch`.
+        labels = self._labels(max_transfers + 1)
+        self._run(labels, s, t, departure, max_transfers + 1)
+        k = self._best_round(labels, t)
+        return self._journey(labels, t, k) if k is not None else None
 
-> Todos los metodos devuelven la ruta mas corta en forma de id de cada nodo. En el caso de A* devuelve un arreglo con la ruta optima y su costo acumulado. Para eliminar este costo se coge solamente la parte del id del nodo que corresponde la camino de la ruta mas optima decidida por este algoritmo.
+    '''
+    Calcula el perfil de viajes entre 2 estaciones en un intervalo de horas de
+    salida: para cada salida posible, el viaje que llega mas temprano,
+    descartando los que no llegan antes que un viaje que sale despues.
+    Las salidas se procesan de la ultima a la primera reutilizando las
+    etiquetas (rRAPTOR): lo que se alcanza saliendo mas tarde tambien se
+    alcanza saliendo antes, por lo que cada salida solo recorre lo que mejora.
+    Entradas:
+        * source: id de la estacion de origen
+        * target: id de la estacion de destino
+        * start, end: Intervalo de horas de salida (HH:MM, HH:MM:SS o segundos)
+        * max_transfers: Numero maximo de transbordos
+    Salida: Lista de objetos de la clase Journey ordenada por hora de salida.
+    Excepciones:
+        * KeyError: Se produce cuando una estacion no tiene horarios.
+    '''
+    def profile(self, source, target, start, end, max_transfers = 4):
+        start, end = Timetable.parse_time(start), Timetable.parse_time(end)
+        s, t = self.index[source], self.index[target]
+        if s == t:
+            return []
+
+        times = set()
+        for j in range(self.stop_route_offsets[s], self.stop_route_offsets[s + 1]):
+            r, i = self.stop_routes[j], self.stop_positions[j]
+            length = self.route_stop_offsets[r + 1] - self.route_stop_offsets[r]
+            if i == length - 1:
+                continue
+            for k in range(self.route_time_offsets[r] + i, self.route_time_offsets[r + 1], length):
+                if start <= self.departures[k] <= end:
+                    times.add(self.departures[k])
+
+        rounds = max_transfers + 1
+        labels = self._labels(rounds)
+        journeys = []
+        arrival = float('inf')
+        for departure in sorted(times, reverse = True):
+            self._run(labels, s, t, departure, rounds)
+            if labels[2][t] < arrival:
+                arrival = labels[2][t]
+                journeys.append(self._journey(labels, t, self._best_round(labels, t)))
+
+        journeys.reverse()
+        return journeys
+
+"""# **Tiempo de importacion**
+
+> El modulo se puede importar desde otros programas (por ejemplo un servicio) sin construir la red ni ejecutar la demostracion, que solo se ejecuta con `python transmilenio.py`. Tampoco importa GeoPy ni `multiprocessing` al cargarse: la distancia del gran circulo se calcula con `great_circle_distance`, y los modulos de procesos se importan solo cuando se usan.
+
+Para que esto se mantenga, `python transmilenio.py --import-time` mide cuanto tarda `import transmilenio` en un proceso nuevo (el menor de varios intentos) y termina con error si supera `IMPORT_TIME_BUDGET`.
 """
 
-def delete_weights_dict(dictionary):
-    for index, element in enumerate(dictionary):
-        cad = element.split(':')
-        node = cad[0]
-        dictionary[index] = int(node)
-    return dictionary
+# Tiempo maximo, en segundos, que puede tardar importar este modulo, incluida
+# su compilacion cuando no hay bytecode guardado en __pycache__
+IMPORT_TIME_BUDGET = 0.1
 
-bfs = tree.bfs_shortest_path(node_from.get_id(), node_to.get_id())
-ucs = tree.ucs(node_from, node_to)
+'''
+Mide el tiempo que tarda importar este modulo en un interprete nuevo, sin
+contar el arranque del interprete.
+Entrada:
+    * repeat: Numero de intentos
+Salida: El menor tiempo en segundos de todos los intentos.
+'''
+def measure_import_time(repeat = 5):
+    import subprocess
 
-tree.graph = g.get_dictionary()
-dfs = tree.dfs_paths(node_from.get_id(), node_to.get_id())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    code = ('import sys, time; sys.path.insert(0, ' + repr(directory) + '); '
+            't = time.perf_counter(); import ' + module + '; '
+            'print(time.perf_counter() - t)')
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], check = True,
+                                stdout = subprocess.PIPE, universal_newlines = True).stdout
+        times.append(float(output))
+    return min(times)
 
-tree.graph = g
+"""# **Demostracion**"""
 
-heuristic = tree.construct_heristic(g, s)
-a_star = tree.astar_search(g, heuristic, node_from.get_id(), node_to.get_id())
-a_star = delete_weights_dict(a_star)
+def main(argv = None):
+    if argv is None:
+        argv = sys.argv[1:]
 
-dijkstra = tree.astar_search(g, None, node_from.get_id(), node_to.get_id())
-dijkstra = delete_weights_dict(dijkstra)
+    if '--import-time' in argv:
+        elapsed = measure_import_time()
+        print('Tiempo de importacion: %.1f ms (limite %.1f ms)' % (elapsed * 1000, IMPORT_TIME_BUDGET * 1000))
+        return 0 if elapsed <= IMPORT_TIME_BUDGET else 1
 
-greedy = tree.astar_search(g, heuristic, node_from.get_id(), node_to.get_id(), gn = False)
-greedy = delete_weights_dict(greedy)
+    """# **Inicializacion de objetos**
 
-#dijkstra = tree.a_star_search(g, node_from.get_id(), node_to.get_id(), heuris=False)
+    Para poder utilizar las funciones, crear y tener acceso al grafo y a las estaciones se procede a instanciar objetos de algunas clases vistas anteriormente.
 
-"""# **Conversion de id a nombre de la estacion**
+    > `g` sera el objeto del grafo, almacena el grafo y los vertices, ademas tiene las operaciones para agregar vertices y aristas con los pesos correspondientes.
 
-Con el diccionario de estaciones podemos buscar que numero de identificacion tiene. Le pasamos la lista que contiene la ruta optima de cada algoritmo al metodo `Station.convert_id_to_station` para que nos devuelva la misma ruta pero con los nombres de la estacion.
-"""
+    > `s` va a ser el objeto para la clase `Station`, el cual contiene el diccionario con las estaciones a crear y las operaciones sobre estas estaciones.
+
+    Por ultimo, tenemos la variable `tree`, el cual actuara como instancia de la clase `TreeSearch`, y contendra todos los elementos para la busqueda de rutas mas cortas utilizando diferentes algoritmos informados y no informados.
+    """
+
+    g = Graph()
+    s = Station()
+    tree = TreeSearch(g)
+
+    """# **Carga de la red**
+
+    Las estaciones y sus conexiones se leen de los archivos `data/stops.txt` y `data/transfers.txt` con la clase `NetworkLoader`. Cada estacion es un estado del problema, por lo tanto cada estacion sera un vertice del grafo, y cada conexion una arista cuyo costo es la distancia del gran circulo entre las 2 estaciones.
+
+    > El metodo `build_all_stations` de la clase `Station` y el metodo `Station.set_connections_stations` siguen disponibles para construir la red a mano.
+
+    Por ultimo verificamos que todas las estaciones se hayan ingresado correctamente.
+    """
+
+    NetworkLoader().load(g, s)
+    s.stations
+
+    """# **Impresion de las estaciones**
+
+    Para verificar que las estaciones e hayan agregado se imprime el id y el nombre de la estacion.
+    """
+
+    for station in s.stations:
+        print(s.stations[station][0], station)
+
+    g.get_dictionary()
+
+    """**Verificar Conexion**
+
+    Se imprime la creacion del grafo, la conexion entre cada nodo y su peso. Por ultimo se muestran los vertices adyacentes por cada vertice.
+    """
+
+    for v in g:
+        for w in v.get_connections():
+            vid = v.get_id()
+            wid = w.get_id()
+            print ('( %s , %s, %3d)'  % ( vid, wid, v.get_weight(w)))
+
+    for v in g:
+        print ('g.vert_dict[%s]=%s' %(v.get_id(), g.vert_dict[v.get_id()]))
+
+    """# **Escoger estaciones de inicio y destino**
+
+    Imaginemos que vamos a realizar un viaje desde una estacion a otra. para este caso se ha elegido como inicio el Portal Norte hasta la AV. Jimenez (Nodo 0 y nodo 24 correspondientemente).
+
+    Para lograr esto obtenemos los nodos con la funcion `Graph.get_vertex` y los guardamos en una variable, lo que nos devolvera sera un objeto de la clase `Vertex`.
+    """
+
+    node_from = g.get_vertex(0)
+    node_to = g.get_vertex(24)
+
+    """# **Ejecucion de los algoritmos de busqueda**
+
+    Se procede a llamar a los metodos de busqueda alojados en la clase `TreeSearch`.
+
+    > Todos los metodos devuelven la ruta mas corta en forma de id de cada nodo. En el caso de A* devuelve un arreglo con la ruta optima y su costo acumulado. Para eliminar este costo se coge solamente la parte del id del nodo que corresponde la camino de la ruta mas optima decidida por este algoritmo.
+    """
+
+    def delete_weights_dict(dictionary):
+        for index, element in enumerate(dictionary):
+            cad = element.split(':')
+            node = cad[0]
+            dictionary[index] = int(node)
+        return dictionary
+
+    bfs = tree.bfs_shortest_path(node_from.get_id(), node_to.get_id())
+    ucs = tree.ucs(node_from, node_to)
+
+    tree.graph = g.get_dictionary()
+    dfs = tree.dfs_paths(node_from.get_id(), node_to.get_id())
+
+    tree.graph = g
+
+    heuristic = tree.construct_heristic(g, s)
+    a_star = tree.astar_search(g, heuristic, node_from.get_id(), node_to.get_id())
+    a_star = delete_weights_dict(a_star)
+
+    dijkstra = tree.astar_search(g, None, node_from.get_id(), node_to.get_id())
+    dijkstra = delete_weights_dict(dijkstra)
+
+    greedy = tree.astar_search(g, heuristic, node_from.get_id(), node_to.get_id(), gn = False)
+    greedy = delete_weights_dict(greedy)
+
+    #dijkstra = tree.a_star_search(g, node_from.get_id(), node_to.get_id(), heuris=False)
+
+    """# **Conversion de id a nombre de la estacion**
+
+    Con el diccionario de estaciones podemos buscar que numero de identificacion tiene. Le pasamos la lista que contiene la ruta optima de cada algoritmo al metodo `Station.convert_id_to_station` para que nos devuelva la misma ruta pero con los nombres de la estacion.
+    """
+
+    bfs_convert = s.convert_id_to_station(bfs)
+    ucs_convert = s.convert_id_to_station(ucs)
+    dfs_convert = s.convert_id_to_station(dfs)
+    astar_convert = s.convert_id_to_station(a_star)
+    dijkstra_convert = s.convert_id_to_station(dijkstra)
+    greedy_convert = s.convert_id_to_station(greedy)
+
+    """# **Impresion de las rutas optimas por algoritmo**"""
+
+    print("BFS: " + str(bfs_convert))
+    print('UCS: ' + str(ucs_convert))
+    print("DFS: " + str(dfs_convert))
+    print('A*: ', astar_convert)
+    print('Dijkstra: ', dijkstra_convert)
+    print('Greedy: ', dijkstra_convert)
+
+    return 0
 
-bfs_convert = s.convert_id_to_station(bfs)
-ucs_convert = s.convert_id_to_station(ucs)
-dfs_convert = s.convert_id_to_station(dfs)
-astar_convert = s.convert_id_to_station(a_star)
-dijkstra_convert = s.convert_id_to_station(dijkstra)
-greedy_convert = s.convert_id_to_station(greedy)
-
-"""# **Impresion de las rutas optimas por algoritmo**"""
-
-print("BFS: " + str(bfs_convert))
-print('UCS: ' + str(ucs_convert))
-print("DFS: " + str(dfs_convert))
-print('A*: ', astar_convert)
-print('Dijkstra: ', dijkstra_convert)
-print('Greedy: ', dijkstra_convert)
+if __name__ == '__main__':
+    sys.exit(main())
 
 """# **Conclusiones**
 Como conclusiones se tiene que: